@@ -0,0 +1,208 @@
+"""
+Admin side port: on-demand profiling and memory introspection
+
+With ADMIN_PORT set, the pipeline serves these JSON POST endpoints on
+ADMIN_HOST:ADMIN_PORT, apart from the public API:
+
+- ``/admin/profile`` ``{"seconds": 10, "interval": 0.01}``: samples every
+  thread's Python stack for ``seconds`` and returns the samples in collapsed
+  stack format (``thread;outer;...;inner count`` lines, ready for
+  flamegraph.pl or speedscope: ``jq -r .collapsed``). UDFs, the connector
+  thread and the server threads all show up. Only one profile runs at a time.
+- ``/admin/tracemalloc`` ``{"action": "start" | "snapshot" | "diff" | "stop"}``:
+  starts tracing (``"frames"``: traceback depth), reports the top allocation
+  sites of a new snapshot, or the top growth since the previous snapshot
+  (``"limit"`` lines), and stops tracing.
+- ``/admin/structures``: RSS, threads, GC counts and the sizes of the
+  registered structures (connector seen URLs, index entries, queues).
+
+Nothing requires a restart, and nothing costs anything until requested,
+except tracemalloc while it is started.
+"""
+
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from http.server import ThreadingHTTPServer
+
+from json_http import JSONRequestHandler
+
+logger = logging.getLogger("news_rag.admin")
+
+MAX_PROFILE_SECONDS = 300
+
+
+def rss_mb() -> float | None:
+    """Current resident set size (Linux only)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.01) -> dict:
+    """Sample all other threads' stacks for ``seconds``; collapsed stacks with their counts"""
+    names = {}
+    stacks = Counter()
+    samples = 0
+    me = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names.update((thread.ident, thread.name) for thread in threading.enumerate())
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            stacks[";".join(reversed(labels))] += 1
+        samples += 1
+        time.sleep(interval)
+    return {
+        "seconds": seconds,
+        "interval": interval,
+        "samples": samples,
+        "collapsed": "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()),
+    }
+
+
+class MemoryTracer:
+    """tracemalloc control with a baseline snapshot to diff against"""
+
+    IGNORED = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self):
+        self._baseline: tracemalloc.Snapshot | None = None
+        self._lock = threading.Lock()
+
+    def _status(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "traced_mb": round(current / 2**20, 3),
+            "peak_mb": round(peak / 2**20, 3),
+        }
+
+    @staticmethod
+    def _site(stat) -> str:
+        return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in stat.traceback)
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise ValueError('tracemalloc is not started (action "start")')
+        return tracemalloc.take_snapshot().filter_traces(self.IGNORED)
+
+    def run(self, action: str, frames: int = 1, limit: int = 25) -> dict:
+        """Apply ``action``; ``frames`` is the traceback depth tracing starts with"""
+        key_type = "traceback" if tracemalloc.get_traceback_limit() > 1 else "lineno"
+        with self._lock:
+            if action == "start":
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(frames)
+                return self._status()
+            if action == "stop":
+                tracemalloc.stop()
+                self._baseline = None
+                return self._status()
+            if action == "snapshot":
+                snapshot = self._baseline = self._snapshot()
+                top = [
+                    {"site": self._site(stat), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                    for stat in snapshot.statistics(key_type)[:limit]
+                ]
+                return dict(self._status(), top=top)
+            if action == "diff":
+                if self._baseline is None:
+                    raise ValueError('No snapshot to diff against (action "snapshot")')
+                snapshot = self._snapshot()
+                changes = snapshot.compare_to(self._baseline, key_type)
+                self._baseline = snapshot
+                growth = [
+                    {
+                        "site": self._site(stat),
+                        "size_kb": round(stat.size / 1024, 1),
+                        "size_diff_kb": round(stat.size_diff / 1024, 1),
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in changes[:limit]
+                ]
+                return dict(self._status(), growth=growth)
+            raise ValueError(f"Unknown action {action!r} (start, snapshot, diff, stop)")
+
+
+class AdminRequestHandler(JSONRequestHandler):
+    """The admin endpoints; ``structures`` maps a name to a zero-argument size function"""
+
+    logger = logger
+    failure_event = "admin_request_failed"
+    structures: dict = {}
+    tracer = MemoryTracer()
+    profiling = threading.Lock()
+    routes = {
+        "/admin/profile": "profile",
+        "/admin/tracemalloc": "memory",
+        "/admin/structures": "structure_sizes",
+    }
+
+    def profile(self, payload: dict) -> dict:
+        seconds = float(payload.get("seconds", 10))
+        interval = float(payload.get("interval", 0.01))
+        if not 0 < seconds <= MAX_PROFILE_SECONDS or not 0.001 <= interval <= 1:
+            raise ValueError(f"seconds must be in (0, {MAX_PROFILE_SECONDS}] and interval in [0.001, 1]")
+        if not self.profiling.acquire(blocking=False):
+            raise ValueError("A profile is already running")
+        try:
+            logger.info("Profiling for %.0fs", seconds, extra={"event": "admin_profile", "seconds": seconds})
+            return sample_stacks(seconds, interval)
+        finally:
+            self.profiling.release()
+
+    def memory(self, payload: dict) -> dict:
+        return self.tracer.run(
+            payload.get("action", "snapshot"),
+            frames=int(payload.get("frames", 1)),
+            limit=int(payload.get("limit", 25)),
+        )
+
+    def structure_sizes(self, payload: dict) -> dict:
+        sizes = {}
+        for name, size in self.structures.items():
+            try:
+                sizes[name] = size()
+            except Exception as e:
+                sizes[name] = {"error": str(e)}
+        rss = rss_mb()
+        return {
+            "pid": os.getpid(),
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "threads": threading.active_count(),
+            "gc_counts": gc.get_count(),
+            "tracemalloc": tracemalloc.is_tracing(),
+            "structures": sizes,
+        }
+
+
+def start_admin_server(host: str, port: int, structures: dict) -> ThreadingHTTPServer:
+    """Serve the admin endpoints from a daemon thread"""
+    handler = type("Handler", (AdminRequestHandler,), {"structures": structures})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="admin-server", daemon=True).start()
+    return server
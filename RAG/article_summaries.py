@@ -0,0 +1,52 @@
+"""
+Per-article summaries generated at ingest, for short-context answers
+
+With ARTICLE_SUMMARIES on, the pipeline asks the model (at ``ingestion``
+priority, behind interactive calls) for a compact summary of every article,
+as a column of the article table, and indexes the summaries as one document
+per article next to the chunks. Broad questions ("top stories right now",
+"what's happening in tech") are then answered from the best matching
+summaries instead of ``TOP_K`` raw chunks, a much shorter prompt. A summary
+call that fails or is rejected is retried on later polls (SUMMARY_RETRIES);
+an article whose summary never comes is indexed with its headline.
+
+An answer request's ``answer_mode`` picks the grounding: ``chunks``,
+``summaries``, or ``auto`` (the default: summaries for broad questions).
+"""
+
+import re
+
+ANSWER_MODES = ("auto", "summaries", "chunks")
+
+# Questions about the news in general rather than about a specific story
+BROAD_QUERY_PATTERN = re.compile(
+    r"\b(top|latest|main|biggest|major|key|recent|today'?s|breaking|trending)\s+"
+    r"(\w+\s+){0,2}(stories|news|headlines|developments|events|updates|articles)\b"
+    r"|\bwhat'?s\s+(happening|new|going\s+on)\b|\bwhat\s+is\s+(happening|new|going\s+on)\b"
+    r"|\b(summar(y|ize|ise)|overview|roundup|recap|digest)\b",
+    re.IGNORECASE,
+)
+
+
+def is_broad_query(prompt: str) -> bool:
+    """Whether ``prompt`` asks about the news in general (answerable from summaries)"""
+    return BROAD_QUERY_PATTERN.search(prompt) is not None
+
+
+def wants_summaries(answer_mode: str | None, prompt: str) -> bool:
+    """Whether to ground the answer in summaries; unknown modes count as ``auto``"""
+    if answer_mode == "summaries":
+        return True
+    if answer_mode == "chunks":
+        return False
+    return is_broad_query(prompt)
+
+
+def summary_prompt(title: str, text: str, max_words: int) -> str:
+    """Instruction for summarizing one article"""
+    return (
+        f"Summarize this news article in at most {max_words} words. Keep the key facts "
+        "(who, what, when, figures) and write only the summary.\n\n"
+        f"Title: {title}\n\n{text}"
+    )
+
@@ -0,0 +1,60 @@
+"""
+Benchmark: in-process hashing embedder throughput
+
+Embeds synthetic news-sized chunks with ``HashingNgramEncoder`` at several
+batch sizes and reports texts/s and MB/s. This is the model-free baseline
+for ingestion: any gap between it and a real embedder is model latency.
+
+Usage:
+    python bench_embedder.py
+    python bench_embedder.py --texts 20000 --chunk-words 150 --dimensions 768
+"""
+
+import argparse
+import random
+import time
+
+from embedders import HashingNgramEncoder
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the hashing embedder")
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--chunk-words", type=int, default=160)
+    parser.add_argument("--dimensions", type=int, default=1024)
+    parser.add_argument("--ngrams", type=int, default=2)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 256])
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10)))
+        for _ in range(20000)
+    ]
+    texts = [" ".join(rng.choice(vocab) for _ in range(args.chunk_words)) for _ in range(args.texts)]
+    megabytes = sum(len(t) for t in texts) / 2**20
+
+    print("\n" + "="*70)
+    print(" HASHING EMBEDDER BENCHMARK")
+    print("="*70)
+    print(f"{args.texts} texts x {args.chunk_words} words, {args.dimensions} dims, {args.ngrams}-grams")
+    print(f"{'batch':>8} {'seconds':>9} {'texts/s':>10} {'MB/s':>8}")
+
+    for batch_size in args.batch_sizes:
+        encoder = HashingNgramEncoder(args.dimensions, args.ngrams)
+        encoder.encode(texts[:batch_size])  # warm numpy
+
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            encoder.encode(texts[i:i + batch_size])
+        seconds = time.perf_counter() - start
+
+        print(f"{batch_size:>8} {seconds:>9.2f} {len(texts) / seconds:>10.0f} {megabytes / seconds:>8.2f}")
+
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
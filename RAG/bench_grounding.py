@@ -0,0 +1,121 @@
+"""
+Benchmark: factual grounding scorer (substring scan vs. shingle index)
+
+Generates long answers over many sources, checks that both scorers return
+identical scores and reports their timings.
+
+Usage:
+    python bench_grounding.py
+    python bench_grounding.py --answer-words 2000 --sources 50 --source-words 300
+"""
+
+import argparse
+import random
+import re
+import time
+
+from grounding import factual_grounding_score
+
+
+def substring_grounding_score(answer: str, sources: list[dict]) -> float:
+    """Reference implementation: every answer phrase scanned over the joined sources"""
+    if not answer or not sources:
+        return 0.0
+
+    words = re.findall(r'\b\w+\b', answer.lower())
+    if len(words) < 3:
+        return 0.5
+
+    answer_phrases = set()
+    for n in range(3, min(7, len(words))):
+        for i in range(len(words) - n + 1):
+            phrase = ' '.join(words[i:i+n])
+            if len(phrase) > 12:
+                answer_phrases.add(phrase)
+
+    if not answer_phrases:
+        return 0.5
+
+    source_text = " ".join([
+        (s.get("text", "") or "") + " " +
+        ((s.get("metadata", {}) or {}).get("title", "") or "")
+        for s in sources
+    ]).lower()
+
+    if not source_text:
+        return 0.0
+
+    grounded_count = sum(1 for phrase in answer_phrases if phrase in source_text)
+    return min(grounded_count / len(answer_phrases) * 1.5, 1.0)
+
+
+def make_case(rng: random.Random, answer_words: int, n_sources: int, source_words: int):
+    """Sources of random words; the answer copies spans of them (some cut mid-word)"""
+    vocab = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+        for _ in range(2000)
+    ]
+    separators = [" "] * 12 + [", ", ". ", "  ", "\n"]
+
+    sources = []
+    for i in range(n_sources):
+        words = [rng.choice(vocab) for _ in range(source_words)]
+        text = "".join(w + rng.choice(separators) for w in words)
+        sources.append({"text": text, "metadata": {"title": f"Story {i} {rng.choice(vocab)}"}})
+
+    answer = []
+    while len(answer) < answer_words:
+        if rng.random() < 0.5:
+            source = rng.choice(sources)["text"]
+            start = rng.randrange(len(source))
+            answer.append(source[start:start + rng.randint(20, 120)])
+        else:
+            answer.append(" ".join(rng.choice(vocab) for _ in range(rng.randint(3, 15))))
+        answer[-1] = answer[-1].strip()
+        answer_words -= len(answer[-1].split()) - 1
+    return " ".join(answer), sources
+
+
+def timed(func, *args, repeat: int = 3) -> tuple[float, float]:
+    """Best wall time (ms) over ``repeat`` runs, and the result"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the factual grounding scorer")
+    parser.add_argument("--answer-words", type=int, nargs="+", default=[200, 1000, 3000])
+    parser.add_argument("--sources", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--source-words", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    print("\n" + "="*70)
+    print(" FACTUAL GROUNDING BENCHMARK")
+    print("="*70)
+    print(f"{'answer words':>12} {'sources':>8} {'substring ms':>13} {'index ms':>9} {'speedup':>8}  score")
+
+    for answer_words in args.answer_words:
+        for n_sources in args.sources:
+            answer, sources = make_case(rng, answer_words, n_sources, args.source_words)
+            old_ms, old_score = timed(substring_grounding_score, answer, sources)
+            new_ms, new_score = timed(factual_grounding_score, answer, sources)
+
+            if old_score != new_score:
+                raise AssertionError(f"Score mismatch: {old_score} != {new_score}")
+
+            print(f"{answer_words:>12} {n_sources:>8} {old_ms:>13.1f} {new_ms:>9.1f} "
+                  f"{old_ms / new_ms:>7.1f}x  {new_score:.4f}")
+
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
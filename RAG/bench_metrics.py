@@ -0,0 +1,252 @@
+"""
+Benchmark: per-response metric scorers vs. the batch metric engine
+
+Generates a batch of (query, answer, sources) triples whose sources overlap
+across queries, checks that the batch engine returns exactly the scores of
+the original per-response scorers (copied below, as they were before the
+evaluator was optimized) and reports their timings.
+
+Usage:
+    python bench_metrics.py
+    python bench_metrics.py --batch 500 --sources 10
+"""
+
+import argparse
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from metric_engine import MetricEngine
+
+
+def reference_relevance(query: str, sources: list[dict]) -> float:
+    """Original source relevance scorer (one regex pass per source)"""
+    if not sources:
+        return 0.0
+
+    query_keywords = set(re.findall(r'\b\w{4,}\b', query.lower()))
+    if not query_keywords:
+        return 0.5
+
+    relevance_scores = []
+    for source in sources:
+        text = source.get("text", "") or ""
+        metadata = source.get("metadata", {}) or {}
+        title = metadata.get("title", "") or ""
+
+        combined = (title + " " + text).lower()
+        source_words = set(re.findall(r'\b\w{4,}\b', combined))
+
+        if source_words:
+            overlap = len(query_keywords & source_words) / len(query_keywords)
+            relevance_scores.append(min(overlap * 2, 1.0))
+        else:
+            relevance_scores.append(0.0)
+
+    return sum(relevance_scores) / len(relevance_scores) if relevance_scores else 0.0
+
+
+def reference_recency(sources: list[dict], now: datetime) -> float:
+    """Original recency scorer (three strptime formats tried for every source)"""
+    if not sources:
+        return 0.0
+
+    recency_scores = []
+    for source in sources:
+        metadata = source.get("metadata", {}) or {}
+        pub_date_str = metadata.get("published_at", "") or ""
+
+        if not pub_date_str:
+            recency_scores.append(0.3)
+            continue
+
+        try:
+            pub_date = None
+            for fmt in ["%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%d %H:%M:%S"]:
+                try:
+                    pub_date = datetime.strptime(pub_date_str, fmt)
+                    break
+                except:
+                    continue
+
+            if not pub_date:
+                pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
+
+            hours_old = (now - pub_date).total_seconds() / 3600
+            if hours_old <= 24:
+                score = 1.0
+            elif hours_old <= 48:
+                score = 0.8
+            elif hours_old <= 72:
+                score = 0.6
+            elif hours_old <= 168:
+                score = 0.4
+            else:
+                score = 0.2
+            recency_scores.append(score)
+        except:
+            recency_scores.append(0.3)
+
+    return sum(recency_scores) / len(recency_scores) if recency_scores else 0.3
+
+
+def reference_grounding(answer: str, sources: list[dict]) -> float:
+    """Original factual grounding scorer (substring search of every answer n-gram)"""
+    if not answer or not sources:
+        return 0.0
+
+    answer_lower = answer.lower()
+    words = re.findall(r'\b\w+\b', answer_lower)
+
+    if len(words) < 3:
+        return 0.5
+
+    # Extract phrases
+    answer_phrases = set()
+    for n in range(3, min(7, len(words))):
+        for i in range(len(words) - n + 1):
+            phrase = ' '.join(words[i:i+n])
+            if len(phrase) > 12:
+                answer_phrases.add(phrase)
+
+    if not answer_phrases:
+        return 0.5
+
+    # Build source corpus
+    source_text = " ".join([
+        (s.get("text", "") or "") + " " +
+        ((s.get("metadata", {}) or {}).get("title", "") or "")
+        for s in sources
+    ]).lower()
+
+    if not source_text:
+        return 0.0
+
+    grounded_count = sum(1 for phrase in answer_phrases if phrase in source_text)
+    grounding_ratio = grounded_count / len(answer_phrases)
+
+    return min(grounding_ratio * 1.5, 1.0)
+
+
+def reference_enrichment(answer: str, sources: list[dict]) -> float:
+    """Original contextual enrichment scorer"""
+    if not answer or not sources:
+        return 0.0
+
+    answer_words = set(re.findall(r'\b\w{4,}\b', answer.lower()))
+
+    if not answer_words:
+        return 0.0
+
+    source_words = set()
+    for source in sources:
+        text = source.get("text", "") or ""
+        title = (source.get("metadata", {}) or {}).get("title", "") or ""
+        combined = text + " " + title
+        source_words.update(re.findall(r'\b\w{4,}\b', combined.lower()))
+
+    if not source_words:
+        return 0.5
+
+    unique_words = answer_words - source_words
+    enrichment_ratio = len(unique_words) / len(answer_words)
+
+    # Optimal: 0.15-0.5
+    if 0.15 <= enrichment_ratio <= 0.5:
+        return 1.0
+    elif enrichment_ratio < 0.15:
+        return max(enrichment_ratio / 0.15, 0.3)
+    else:
+        return max(0.5, 1.0 - (enrichment_ratio - 0.5))
+
+
+def make_batch(rng: random.Random, batch: int, n_sources: int, now: datetime):
+    """Triples drawing sources from a shared pool, with mixed timestamp formats and types"""
+    vocab = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10)))
+        for _ in range(3000)
+    ]
+
+    def sentence(n):
+        return " ".join(rng.choice(vocab) for _ in range(n))
+
+    def timestamp():
+        published = now - timedelta(hours=rng.uniform(0, 400))
+        return rng.choice([
+            published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            published.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            published.strftime("%Y-%m-%d %H:%M:%S"),
+            published.isoformat(),
+            published.strftime("%Y-%m-%dT%H:%M:%S+02:00"),
+            "not a date",
+            "",
+            None,
+            1760000000,
+            [published.isoformat()],
+        ])
+
+    pool = [
+        {"text": sentence(150), "metadata": {"title": sentence(8), "published_at": timestamp()}}
+        for _ in range(batch * n_sources // 3 + 1)
+    ]
+
+    items = []
+    for _ in range(batch):
+        sources = rng.sample(pool, n_sources)
+        answer = sentence(rng.randint(0, 250)) + " " + sources[0]["text"][:300]
+        items.append((sentence(rng.randint(0, 12)), answer, sources))
+    return items
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the batch metric engine")
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--sources", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    items = make_batch(rng, args.batch, args.sources, now)
+
+    start = time.perf_counter()
+    expected = [
+        {
+            "source_relevance": reference_relevance(query, sources),
+            "recency": reference_recency(sources, now),
+            "factual_grounding": reference_grounding(answer, sources),
+            "contextual_enrichment": reference_enrichment(answer, sources),
+        }
+        for query, answer, sources in items
+    ]
+    per_item_ms = (time.perf_counter() - start) * 1000
+
+    engine = MetricEngine()
+    engine.score_batch(items[:1], now=now)  # load numpy outside the timing
+    start = time.perf_counter()
+    actual = engine.score_batch(items, now=now)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    mismatches = [
+        (i, metric, expected[i][metric], actual[i][metric])
+        for i in range(len(items))
+        for metric in expected[i]
+        if expected[i][metric] != actual[i][metric]
+    ]
+    if mismatches:
+        raise AssertionError(f"{len(mismatches)} score mismatches, first: {mismatches[0]}")
+
+    print("\n" + "="*70)
+    print(" METRIC ENGINE BENCHMARK")
+    print("="*70)
+    print(f"Batch:      {len(items)} responses x {args.sources} sources")
+    print(f"Per-item:   {per_item_ms:.1f} ms")
+    print(f"Batch:      {batch_ms:.1f} ms ({per_item_ms / batch_ms:.1f}x)")
+    print("Scores:     identical")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
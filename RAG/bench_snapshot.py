@@ -0,0 +1,118 @@
+"""
+Benchmark: index snapshot export and memory-mapped loading
+
+Writes a snapshot of synthetic chunks and random vectors, then measures how
+long opening it takes and how much resident memory the open and the first
+queries add. Opening should cost milliseconds and almost no RSS; the vector
+pages are only read in when a query scans them. Chunks are spread over
+``--partitions`` categories; a query routed to one of them should cost about
+that share of a full scan. A query with a structured source + sentiment
+filter only scores the rows the metadata columns let through.
+
+Usage:
+    python bench_snapshot.py
+    python bench_snapshot.py --chunks 200000 --dimensions 768 --partitions 16 --path /tmp/snapshot
+"""
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from admin_server import rss_mb
+from index_snapshot import IndexSnapshot, write_snapshot
+from metadata_columns import SENTIMENT_LABELS, StructuredFilter
+
+
+def synthetic_records(count: int, dimensions: int, partitions: int, seed: int):
+    """Chunks shaped like the pipeline's, one at a time, grouped by category"""
+    rng = np.random.default_rng(seed)
+    words = random.Random(seed)
+    for i in range(count):
+        text = " ".join(words.choice(("markets", "chips", "growth", "AI", "earnings", "policy")) for _ in range(150))
+        metadata = {
+            "path": f"https://example.com/article/{i // 4}",
+            "title": f"Article {i // 4}",
+            "source": f"Source {i % 7}",
+            "author": "Unknown",
+            "published_at": "2026-10-19T00:00:00Z",
+            "category": f"category-{i * partitions // count}",
+            "sentiment": f"{SENTIMENT_LABELS[i % 3]}_{(i % 100) / 100:.2f}",
+            "indexed_at": "2026-10-19T00:00:00",
+            "text": text,
+        }
+        yield f"^{i:026d}", text, metadata, rng.standard_normal(dimensions, dtype=np.float32)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark index snapshot export and loading")
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--partitions", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--path", default="/tmp/bench_snapshot")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = write_snapshot(
+        args.path,
+        synthetic_records(args.chunks, args.dimensions, args.partitions, args.seed),
+        args.dimensions,
+        {"backend": "random"},
+        partition_key="category",
+    )
+    export_seconds = time.perf_counter() - start
+    on_disk = sum(os.path.getsize(os.path.join(args.path, name)) for name in os.listdir(args.path)) / 2**20
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    snapshot = IndexSnapshot(args.path)
+    load_ms = (time.perf_counter() - start) * 1000
+    rss_loaded = rss_mb()
+
+    rng = np.random.default_rng(args.seed + 1)
+    latencies = []
+    for _ in range(args.queries):
+        start = time.perf_counter()
+        snapshot.search(rng.standard_normal(args.dimensions, dtype=np.float32), 5)
+        latencies.append((time.perf_counter() - start) * 1000)
+    rss_queried = rss_mb()
+
+    routed = []
+    for i in range(args.queries):
+        query = rng.standard_normal(args.dimensions, dtype=np.float32)
+        start = time.perf_counter()
+        snapshot.search(query, 5, partitions=[f"category-{i % args.partitions}"])
+        routed.append((time.perf_counter() - start) * 1000)
+
+    filters = StructuredFilter({"source": "Source 3", "sentiment": "positive"})
+    matching = len(snapshot.candidate_rows(filters=filters))
+    filtered = []
+    for _ in range(args.queries):
+        query = rng.standard_normal(args.dimensions, dtype=np.float32)
+        start = time.perf_counter()
+        snapshot.search(query, 5, filters=filters)
+        filtered.append((time.perf_counter() - start) * 1000)
+
+    print("\n" + "="*70)
+    print(" INDEX SNAPSHOT BENCHMARK")
+    print("="*70)
+    print(f"{manifest['count']} chunks x {args.dimensions} dims, {on_disk:.1f} MB on disk")
+    print(f"Export:          {export_seconds:.2f}s")
+    print(f"Open:            {load_ms:.1f} ms")
+    print(f"First query:     {latencies[0]:.1f} ms")
+    print(f"Later queries:   {sorted(latencies[1:])[len(latencies[1:]) // 2]:.1f} ms (median)")
+    print(f"Routed queries:  {sorted(routed)[len(routed) // 2]:.1f} ms (median, 1 of {len(snapshot.partitions)} partitions)")
+    print(f"Filtered:        {sorted(filtered)[len(filtered) // 2]:.1f} ms (median, {matching} matching chunks)")
+    if rss_before is not None:
+        print(f"RSS after open:  +{rss_loaded - rss_before:.1f} MB")
+        print(f"RSS after scans: +{rss_queried - rss_before:.1f} MB (page cache mapped in)")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
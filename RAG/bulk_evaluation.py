@@ -0,0 +1,197 @@
+"""
+Bulk offline evaluation for the Hybrid Confidence Evaluator
+Evaluates a JSONL query set with bounded concurrency, streams one row per
+query into a single append-only CSV or JSONL file and prints aggregate
+statistics per metric and per stage
+"""
+
+import csv
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+METRICS = [
+    "overall_confidence",
+    "source_relevance",
+    "recency",
+    "factual_grounding",
+    "contextual_enrichment",
+    "sentiment_alignment",
+]
+
+STAGES = ["preflight_ms", "retrieve_ms", "answer_ms", "metrics_ms", "total_ms"]
+
+COLUMNS = [
+    "run_id", "id", "query", "timestamp", "error",
+    *METRICS,
+    "answer_length", "sources_count",
+    *STAGES,
+]
+
+
+def load_query_set(path: str) -> list[dict]:
+    """
+    Read a JSONL query set. Each line is either a JSON object with a
+    ``query`` field (plus optional ``id`` and ``top_k``) or a bare JSON string.
+    """
+    queries = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"query": item}
+            if not item.get("query"):
+                raise ValueError(f"{path}:{line_no}: missing 'query'")
+            item.setdefault("id", str(line_no))
+            queries.append(item)
+    return queries
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * p / 100))
+    return ordered[rank - 1]
+
+
+class ResultWriter:
+    """Thread-safe append-only writer; CSV for ``.csv`` paths, JSONL otherwise"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_csv = path.endswith(".csv")
+        write_header = self.is_csv and (not os.path.exists(path) or os.path.getsize(path) == 0)
+        self._file = open(path, "a", newline="")
+        self._lock = threading.Lock()
+        if self.is_csv:
+            self._writer = csv.DictWriter(self._file, fieldnames=COLUMNS, extrasaction="ignore")
+            if write_header:
+                self._writer.writeheader()
+
+    def write(self, row: dict):
+        with self._lock:
+            if self.is_csv:
+                self._writer.writerow(row)
+            else:
+                self._file.write(json.dumps(row) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def to_row(run_id: str, item: dict, scores: dict) -> dict:
+    """Flatten one evaluation result into a fixed set of columns"""
+    timings = scores.get("timings", {})
+    row = {
+        "run_id": run_id,
+        "id": item["id"],
+        "query": item["query"],
+        "timestamp": scores.get("timestamp"),
+        "error": scores.get("error"),
+        "answer_length": scores.get("answer_length"),
+        "sources_count": scores.get("sources_count"),
+    }
+    for metric in METRICS:
+        row[metric] = scores.get(metric)
+    for stage in STAGES:
+        row[stage] = timings.get(stage)
+    return {column: row[column] for column in COLUMNS}
+
+
+def summarize(rows: list[dict], wall_seconds: float) -> dict:
+    """Aggregate statistics over evaluated rows"""
+    ok = [r for r in rows if not r["error"]]
+    summary = {
+        "queries": len(rows),
+        "succeeded": len(ok),
+        "failed": len(rows) - len(ok),
+        "wall_seconds": round(wall_seconds, 2),
+        "metrics": {},
+        "stages": {},
+    }
+
+    for name, group in (("metrics", METRICS), ("stages", STAGES)):
+        for column in group:
+            values = [r[column] for r in ok if r[column] is not None]
+            if not values:
+                continue
+            summary[name][column] = {
+                "mean": round(sum(values) / len(values), 3),
+                "p50": round(percentile(values, 50), 3),
+                "p90": round(percentile(values, 90), 3),
+                "p99": round(percentile(values, 99), 3),
+            }
+
+    return summary
+
+
+def run_bulk_evaluation(
+    evaluator,
+    queries: list[dict],
+    output_path: str,
+    workers: int = 4,
+    top_k: int = 5,
+) -> dict:
+    """Evaluate ``queries`` with at most ``workers`` in flight, streaming rows to ``output_path``"""
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    writer = ResultWriter(output_path)
+    rows = []
+    start = time.perf_counter()
+
+    # Finish lazy imports, open the pool and cache the pre-flight result
+    # before the workers share them
+    evaluator.session
+    evaluator._preflight_check()
+
+    def evaluate(item: dict) -> dict:
+        scores = evaluator.evaluate_response(item["query"], top_k=item.get("top_k", top_k), save=False)
+        row = to_row(run_id, item, scores)
+        writer.write(row)
+        return row
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(evaluate, item) for item in queries]
+            for done, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                rows.append(row)
+                status = f"error: {row['error']}" if row["error"] else f"{row['overall_confidence']:.2%}"
+                print(f"[{done}/{len(queries)}] {row['query'][:60]} -> {status}")
+    finally:
+        writer.close()
+
+    summary = summarize(rows, time.perf_counter() - start)
+    summary["run_id"] = run_id
+    summary["output"] = output_path
+    return summary
+
+
+def print_summary(summary: dict):
+    """Pretty print bulk evaluation statistics"""
+    print("\n" + "="*80)
+    print(" BULK EVALUATION SUMMARY")
+    print("="*80)
+    print(f"Run:      {summary['run_id']}")
+    print(f"Queries:  {summary['queries']} ({summary['succeeded']} ok, {summary['failed']} failed)")
+    print(f"Wall:     {summary['wall_seconds']}s")
+    print(f"Output:   {summary['output']}")
+
+    for title, name in (("Metric", "metrics"), ("Stage (ms)", "stages")):
+        if not summary[name]:
+            continue
+        print(f"\n {title:<24}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}")
+        print("-"*80)
+        for column, stats in summary[name].items():
+            print(f" {column:<24}{stats['mean']:>10}{stats['p50']:>10}{stats['p90']:>10}{stats['p99']:>10}")
+
+    print("\n" + "="*80 + "\n")
@@ -0,0 +1,120 @@
+"""
+Smoke check for answer coalescing in the pipeline server.
+
+Serves a tiny document store (hashing embedder) through ``NewsRestServer``
+with the answer model from ``build_llm()``, whose completions are replaced by
+a slow stub that counts its calls. Two identical /v2/answer requests are sent
+so that the second arrives while the first one's completion is running; it
+must share that completion instead of starting another. Fails (exit code 1)
+otherwise. Needs no model server.
+
+Usage:
+    python coalescing_smoke.py
+"""
+
+import os
+
+os.environ["EMBEDDER_BACKEND"] = "hashing"
+os.environ["COALESCE_ANSWERS"] = "1"
+
+import json
+import socket
+import sys
+import threading
+import time
+import urllib.request
+
+import pathway as pw
+from pathway.stdlib.indexing import BruteForceKnnFactory
+from pathway.xpacks.llm.document_store import DocumentStore
+
+import pipeline
+from embedders import build_embedder
+
+COMPLETION_SECONDS = 3.0
+SECOND_REQUEST_DELAY = 1.0  # well after the first request's commit, well before its completion ends
+
+completions = []
+
+
+def stub_completion(self, messages, **kwargs) -> str:
+    """Stands in for the model call: slow, counted"""
+    completions.append(time.monotonic())
+    time.sleep(COMPLETION_SECONDS)
+    return "Chip makers rallied."
+
+
+class DocumentSchema(pw.Schema):
+    data: bytes
+    _metadata: pw.Json
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def post(url: str, payload: dict, results: list):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        results.append(json.loads(response.read()))
+
+
+def wait_until_serving(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            post(url, {"query": "chips", "k": 1}, [])
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def main():
+    """Main entry point"""
+    pipeline.LiteLLMChat.__wrapped__ = stub_completion
+    embedder, dimensions = build_embedder("interactive")
+    docs = pw.debug.table_from_rows(DocumentSchema, [
+        (text.encode("utf-8"), pw.Json({"path": f"https://example.com/article/{i}", "title": text}))
+        for i, text in enumerate(["Chip makers rally as AI demand lifts earnings", "Oil prices slide on weak growth"])
+    ])
+    store = DocumentStore(
+        docs=docs,
+        retriever_factory=BruteForceKnnFactory(embedder=embedder, dimensions=dimensions, reserved_space=10),
+        parser=None,
+        splitter=None,
+    )
+    rag = pipeline.NewsQuestionAnswerer(llm=pipeline.build_llm(), indexer=store, search_topk=2)
+    port = free_port()
+    server = pipeline.NewsRestServer(host="127.0.0.1", port=port, rag_question_answerer=rag, document_store=store)
+    server.run(threaded=True, with_cache=False)
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_serving(base_url + "/v1/retrieve")
+
+    answers = []
+    question = {"prompt": "Why did chip makers rally?"}
+    first = threading.Thread(target=post, args=(base_url + "/v2/answer", question, answers))
+    first.start()
+    time.sleep(SECOND_REQUEST_DELAY)
+    post(base_url + "/v2/answer", question, answers)
+    first.join()
+
+    failures = []
+    if len(answers) != 2 or answers[0] != answers[1]:
+        failures.append(f"expected two identical answers, got {answers}")
+    if len(completions) != 1:
+        failures.append(f"expected one completion for two overlapping identical requests, got {len(completions)}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(completions)} completion(s) for 2 overlapping requests; flights: {pipeline.answer_flights.snapshot()['coalesced']} coalesced")
+    sys.stdout.flush()
+    os._exit(1 if failures else 0)  # the pathway server thread does not stop
+
+
+if __name__ == "__main__":
+    main()
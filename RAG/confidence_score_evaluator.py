@@ -1,40 +1,92 @@
 """
 Hybrid Confidence Score Evaluator for Live News RAG
-Uses both /v1/pw_ai_answer and /v1/retrieve endpoints to get complete data
+Uses both /v1/pw_ai_answer and /v1/retrieve endpoints to get complete data,
+or in single-call mode only /v1/pw_ai_answer with its context documents
 """
 
 import json
-import requests
-import re
+import time
 from datetime import datetime
 from collections import Counter
 
+from lazy_imports import lazy_import
+from text_processing import tokenize
+
+requests = lazy_import("requests")
+
 
 class HybridConfidenceEvaluator:
     """
     Evaluates RAG response quality using hybrid approach:
     - Gets answer from /v1/pw_ai_answer
-    - Gets sources from /v1/retrieve
+    - Gets sources from /v1/retrieve (concurrently with the answer)
     - Combines them for comprehensive evaluation
+    
+    With ``single_call`` the sources are the context documents returned by
+    /v1/pw_ai_answer itself (``return_context_docs``), i.e. exactly what the
+    LLM was prompted with. This saves the retrieve round trip and its query
+    embedding; ``top_k`` is then the server's ``search_topk``.
+    
+    The pre-flight result is cached for ``preflight_ttl`` seconds and all
+    calls share one keep-alive session.
     """
     
-    def __init__(self, base_url: str = "http://0.0.0.0:8000"):
+    def __init__(
+        self,
+        base_url: str = "http://0.0.0.0:8000",
+        preflight_ttl: float = 60.0,
+        pool_size: int = 10,
+        verbose: bool = True,
+        single_call: bool = False,
+    ):
         self.base_url = base_url
         self.answer_endpoint = f"{base_url}/v1/pw_ai_answer"
         self.retrieve_endpoint = f"{base_url}/v1/retrieve"
         self.list_docs_endpoint = f"{base_url}/v1/pw_list_documents"
+        self.list_docs_page_endpoint = f"{base_url}/v1/pw_list_documents_page"
+        self.preflight_ttl = preflight_ttl
+        self.pool_size = pool_size
+        self._preflight_cache: tuple[float, bool, str] | None = None
+        self._session = None
+        self._metric_engine = None  # metric_engine.MetricEngine, built on first score_batch()
+        self.verbose = verbose
+        self.single_call = single_call
+    
+    @property
+    def session(self):
+        """Shared keep-alive session, created on first use"""
+        if self._session is None:
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=self.pool_size,
+            )
+            self._session = requests.Session()
+            self._session.headers["Content-Type"] = "application/json"
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
     
-    def evaluate_response(self, query: str, max_retries: int = 2, top_k: int = 5) -> dict:
+    def _log(self, *args, **kwargs):
+        """Progress output, silenced when ``verbose`` is off"""
+        if self.verbose:
+            print(*args, **kwargs)
+    
+    def evaluate_response(self, query: str, max_retries: int = 2, top_k: int = 5, save: bool = True) -> dict:
         """Comprehensive evaluation with hybrid approach"""
-        print("\n" + "="*80)
-        print(" HYBRID CONFIDENCE EVALUATION")
-        print("="*80)
-        print(f"Query: {query}")
-        print(f"Timestamp: {datetime.now().isoformat()}\n")
+        self._log("\n" + "="*80)
+        self._log(" HYBRID CONFIDENCE EVALUATION")
+        self._log("="*80)
+        self._log(f"Query: {query}")
+        self._log(f"Timestamp: {datetime.now().isoformat()}\n")
+        
+        timings = {}
+        started = time.perf_counter()
         
         # Pre-flight checks
-        print("Step 0: Running pre-flight checks...")
+        self._log("Step 0: Running pre-flight checks...")
+        stage_start = time.perf_counter()
         preflight_ok, preflight_msg = self._preflight_check()
+        timings["preflight_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
         if not preflight_ok:
             return {
                 "error": preflight_msg,
@@ -42,14 +94,33 @@ class HybridConfidenceEvaluator:
                 "query": query,
                 "timestamp": datetime.now().isoformat()
             }
-        print(f" {preflight_msg}\n")
-        
-        # Step 1: Get sources via retrieve endpoint (faster)
-        print(f"Step 1: Retrieving relevant sources (top {top_k})...")
-        sources = self._get_sources(query, top_k)
+        self._log(f" {preflight_msg}\n")
         
-        if not sources:
-            print(" Failed to retrieve sources")
+        if self.single_call:
+            # Steps 1+2: One answer call returning the documents it was prompted with
+            self._log("Steps 1+2: Getting RAG answer with its context sources (may take 60-120s)...")
+            (answer, sources), timings["answer_ms"] = self._timed(
+                self._get_answer_with_context, query, max_retries, 180
+            )
+            if answer and sources is None:
+                self._log("  Server did not return context_docs, falling back to /v1/retrieve")
+                sources, timings["retrieve_ms"] = self._timed(self._get_sources, query, top_k)
+        else:
+            # Steps 1+2: Retrieval and answer generation are independent, run them concurrently
+            from concurrent.futures import ThreadPoolExecutor  # ~15 ms, only this path needs it
+            
+            self.session  # finish lazy imports before the worker threads use the session
+            self._log(f"Step 1: Retrieving relevant sources (top {top_k})...")
+            self._log("Step 2: Getting RAG answer (may take 60-120s)...")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                sources_future = executor.submit(self._timed, self._get_sources, query, top_k)
+                answer_future = executor.submit(self._timed, self._get_answer, query, max_retries, 180)
+                sources, timings["retrieve_ms"] = sources_future.result()
+                answer, timings["answer_ms"] = answer_future.result()
+        
+        # In single-call mode a failed answer call also has no sources; report the answer
+        if not sources and not (self.single_call and not answer):
+            self._log(" Failed to retrieve sources")
             return {
                 "error": "Failed to retrieve sources",
                 "confidence": 0.0,
@@ -57,23 +128,19 @@ class HybridConfidenceEvaluator:
                 "timestamp": datetime.now().isoformat()
             }
         
-        print(f" Retrieved {len(sources)} sources\n")
-        
-        # Step 2: Get answer from RAG endpoint (slower)
-        print("Step 2: Getting RAG answer (may take 60-120s)...")
-        answer = self._get_answer(query, max_retries, timeout=180)
+        self._log(f" Retrieved {len(sources or [])} sources\n")
         
         if not answer:
-            print(" Failed to get answer (timeout or error)")
+            self._log(" Failed to get answer (timeout or error)")
             return {
                 "error": "Failed to get RAG answer",
                 "confidence": 0.0,
                 "query": query,
-                "sources_retrieved": len(sources),
+                "sources_retrieved": len(sources or []),
                 "timestamp": datetime.now().isoformat()
             }
         
-        print(f" Got answer ({len(answer)} chars)\n")
+        self._log(f" Got answer ({len(answer)} chars)\n")
         
         # Initialize scores
         scores = {
@@ -81,46 +148,104 @@ class HybridConfidenceEvaluator:
             "timestamp": datetime.now().isoformat(),
             "answer_length": len(answer),
             "sources_count": len(sources),
-            "method": "hybrid (separate retrieve + answer calls)",
+            "method": (
+                "single-call (answer with context docs)" if self.single_call
+                else "hybrid (separate retrieve + answer calls)"
+            ),
         }
         
         # Run all metrics
-        print("Step 3: Evaluating source relevance...")
+        stage_start = time.perf_counter()
+        self._log("Step 3: Evaluating source relevance...")
         scores["source_relevance"] = self._evaluate_source_relevance(query, sources)
-        print(f"  Score: {scores['source_relevance']:.2%}\n")
+        self._log(f"  Score: {scores['source_relevance']:.2%}\n")
         
-        print("Step 4: Evaluating recency...")
+        self._log("Step 4: Evaluating recency...")
         scores["recency"] = self._evaluate_recency(sources)
-        print(f"  Score: {scores['recency']:.2%}\n")
+        self._log(f"  Score: {scores['recency']:.2%}\n")
         
-        print("Step 5: Evaluating factual grounding...")
+        self._log("Step 5: Evaluating factual grounding...")
         scores["factual_grounding"] = self._evaluate_factual_grounding(answer, sources)
-        print(f"  Score: {scores['factual_grounding']:.2%}\n")
+        self._log(f"  Score: {scores['factual_grounding']:.2%}\n")
         
-        print("Step 6: Evaluating contextual enrichment...")
+        self._log("Step 6: Evaluating contextual enrichment...")
         scores["contextual_enrichment"] = self._evaluate_enrichment(answer, sources)
-        print(f"  Score: {scores['contextual_enrichment']:.2%}\n")
+        self._log(f"  Score: {scores['contextual_enrichment']:.2%}\n")
         
-        print("Step 7: Evaluating sentiment alignment...")
+        self._log("Step 7: Evaluating sentiment alignment...")
         scores["sentiment_alignment"] = self._evaluate_sentiment_alignment(answer, sources)
-        print(f"  Score: {scores['sentiment_alignment']:.2%}\n")
+        self._log(f"  Score: {scores['sentiment_alignment']:.2%}\n")
         
-        print("Step 8: Calculating overall confidence...")
+        self._log("Step 8: Calculating overall confidence...")
         scores["overall_confidence"] = self._calculate_overall_confidence(scores)
         scores["interpretation"] = self._interpret_confidence(scores["overall_confidence"])
         scores["detailed_analysis"] = self._generate_detailed_analysis(scores, answer, sources)
         
-        self._print_results(scores)
-        self._save_evaluation(scores, answer, sources)
+        timings["metrics_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        scores["timings"] = timings
+        
+        if self.verbose:
+            self._print_results(scores)
+        if save:
+            self._save_evaluation(scores, answer, sources)
         
         return scores
     
+    def score_batch(self, items: list[tuple[str, str, list[dict]]]) -> list[dict]:
+        """
+        Score many (query, answer, sources) triples offline in one pass.
+        Returns the same metric values as ``evaluate_response`` would.
+        """
+        if self._metric_engine is None:
+            from metric_engine import MetricEngine
+            
+            self._metric_engine = MetricEngine()
+        
+        results = self._metric_engine.score_batch(items)
+        for (_, answer, sources), scores in zip(items, results):
+            scores["sentiment_alignment"] = self._evaluate_sentiment_alignment(answer, sources)
+            scores["overall_confidence"] = self._calculate_overall_confidence(scores)
+            scores["interpretation"] = self._interpret_confidence(scores["overall_confidence"])
+        return results
+    
+    @staticmethod
+    def _timed(func, *args):
+        """Call ``func`` and return (result, elapsed ms)"""
+        start = time.perf_counter()
+        result = func(*args)
+        return result, round((time.perf_counter() - start) * 1000, 1)
+    
     def _preflight_check(self) -> tuple[bool, str]:
+        """Check if system is ready (cached for ``preflight_ttl`` seconds)"""
+        now = time.monotonic()
+        if self._preflight_cache and now - self._preflight_cache[0] < self.preflight_ttl:
+            _, ok, msg = self._preflight_cache
+            return ok, f"{msg} (cached)"
+        
+        ok, msg = self._run_preflight_check()
+        # Only cache success - a failing server should be re-checked right away
+        self._preflight_cache = (now, ok, msg) if ok else None
+        return ok, msg
+    
+    def _run_preflight_check(self) -> tuple[bool, str]:
         """Check if system is ready"""
         try:
-            response = requests.get(f"{self.base_url}/", timeout=5)
+            # A one-document page carries the index size without the full listing
+            docs_response = self.session.post(
+                self.list_docs_page_endpoint,
+                json={"limit": 1},
+                timeout=10
+            )
             
-            docs_response = requests.post(
+            if docs_response.status_code == 200:
+                doc_count = docs_response.json().get("total_count", 0)
+                if doc_count == 0:
+                    return False, "No documents indexed"
+                return True, f"System ready ({doc_count} documents)"
+            
+            # Older servers without the paginated endpoint
+            docs_response = self.session.post(
                 self.list_docs_endpoint,
                 json={},
                 timeout=10
@@ -142,10 +267,9 @@ class HybridConfidenceEvaluator:
     def _get_sources(self, query: str, k: int) -> list[dict]:
         """Get sources via retrieve endpoint"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.retrieve_endpoint,
                 json={"query": query, "k": k},
-                headers={"Content-Type": "application/json"},
                 timeout=60  # Retrieval is usually fast
             )
             
@@ -160,40 +284,60 @@ class HybridConfidenceEvaluator:
                 else:
                     return []
             else:
-                print(f"  Retrieve endpoint error: {response.status_code}")
+                self._log(f"  Retrieve endpoint error: {response.status_code}")
                 return []
                 
         except Exception as e:
-            print(f"  Error retrieving sources: {e}")
+            self._log(f"  Error retrieving sources: {e}")
             return []
     
     def _get_answer(self, query: str, max_retries: int, timeout: int) -> str | None:
         """Get answer from RAG endpoint with retries"""
+        data = self._post_answer({"prompt": query}, max_retries, timeout)
+        if data is None:
+            return None
+        return data.get("response") or data.get("answer", "")
+    
+    def _get_answer_with_context(self, query: str, max_retries: int, timeout: int) -> tuple[str | None, list[dict] | None]:
+        """Get answer plus the context documents it was generated from (None if not returned)"""
+        data = self._post_answer({"prompt": query, "return_context_docs": True}, max_retries, timeout)
+        if data is None:
+            return None, None
+        return data.get("response") or data.get("answer", ""), data.get("context_docs")
+    
+    def _post_answer(self, payload: dict, max_retries: int, timeout: int) -> dict | None:
+        """POST to the answer endpoint with retries, returning the JSON body"""
         for attempt in range(max_retries):
             try:
-                print(f"  Attempt {attempt + 1}/{max_retries} (timeout: {timeout}s)...")
+                self._log(f"  Attempt {attempt + 1}/{max_retries} (timeout: {timeout}s)...")
                 
-                response = requests.post(
+                # Evaluation traffic yields to interactive queries in the server's scheduler
+                response = self.session.post(
                     self.answer_endpoint,
-                    json={"prompt": query},
-                    headers={"Content-Type": "application/json"},
+                    json={**payload, "priority": "evaluation"},
                     timeout=timeout
                 )
                 
                 if response.status_code == 200:
                     data = response.json()
-                    answer = data.get("response") or data.get("answer", "")
-                    return answer
+                    if data.get("response") is not None or "answer" in data:
+                        return data
+                    # The server's evaluation queue was full; give it time to drain
+                    self._log("  Rejected by the server's scheduler")
+                    time.sleep(2 ** attempt)
+                elif response.status_code == 503:
+                    self._log("  Rejected by the server's scheduler")
+                    time.sleep(2 ** attempt)
                 else:
-                    print(f"  HTTP {response.status_code}")
+                    self._log(f"  HTTP {response.status_code}")
                     
             except requests.exceptions.Timeout:
-                print(f"  Timeout after {timeout}s")
+                self._log(f"  Timeout after {timeout}s")
                 if attempt < max_retries - 1:
-                    print(f"  Retrying with increased timeout...")
+                    self._log(f"  Retrying with increased timeout...")
                     timeout += 60  # Add 60s each retry
             except Exception as e:
-                print(f"  Error: {e}")
+                self._log(f"  Error: {e}")
         
         return None
     
@@ -202,7 +346,7 @@ class HybridConfidenceEvaluator:
         if not sources:
             return 0.0
         
-        query_keywords = set(re.findall(r'\b\w{4,}\b', query.lower()))
+        query_keywords = tokenize(query).long_token_set
         if not query_keywords:
             return 0.5
         
@@ -212,8 +356,7 @@ class HybridConfidenceEvaluator:
             metadata = source.get("metadata", {}) or {}
             title = metadata.get("title", "") or ""
             
-            combined = (title + " " + text).lower()
-            source_words = set(re.findall(r'\b\w{4,}\b', combined))
+            source_words = tokenize(title).long_token_set | tokenize(text).long_token_set
             
             if source_words:
                 overlap = len(query_keywords & source_words) / len(query_keywords)
@@ -228,6 +371,8 @@ class HybridConfidenceEvaluator:
         if not sources:
             return 0.0
         
+        from metric_engine import parse_published_at
+        
         now = datetime.now()
         recency_scores = []
         
@@ -240,21 +385,9 @@ class HybridConfidenceEvaluator:
                 continue
             
             try:
-                # Try multiple date formats
-                pub_date = None
-                for fmt in [
-                    "%Y-%m-%dT%H:%M:%SZ",
-                    "%Y-%m-%dT%H:%M:%S.%fZ",
-                    "%Y-%m-%d %H:%M:%S",
-                ]:
-                    try:
-                        pub_date = datetime.strptime(pub_date_str, fmt)
-                        break
-                    except:
-                        continue
-                
-                if not pub_date:
-                    pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
+                pub_date = parse_published_at(pub_date_str)
+                if pub_date is None:
+                    raise ValueError(f"Unusable published_at: {pub_date_str}")
                 
                 hours_old = (now - pub_date).total_seconds() / 3600
                 
@@ -278,47 +411,16 @@ class HybridConfidenceEvaluator:
     
     def _evaluate_factual_grounding(self, answer: str, sources: list[dict]) -> float:
         """Evaluate factual grounding"""
-        if not answer or not sources:
-            return 0.0
-        
-        answer_lower = answer.lower()
-        words = re.findall(r'\b\w+\b', answer_lower)
-        
-        if len(words) < 3:
-            return 0.5
+        from grounding import factual_grounding_score
         
-        # Extract phrases
-        answer_phrases = set()
-        for n in range(3, min(7, len(words))):
-            for i in range(len(words) - n + 1):
-                phrase = ' '.join(words[i:i+n])
-                if len(phrase) > 12:
-                    answer_phrases.add(phrase)
-        
-        if not answer_phrases:
-            return 0.5
-        
-        # Build source corpus
-        source_text = " ".join([
-            (s.get("text", "") or "") + " " + 
-            ((s.get("metadata", {}) or {}).get("title", "") or "")
-            for s in sources
-        ]).lower()
-        
-        if not source_text:
-            return 0.0
-        
-        grounded_count = sum(1 for phrase in answer_phrases if phrase in source_text)
-        grounding_ratio = grounded_count / len(answer_phrases)
-        
-        return min(grounding_ratio * 1.5, 1.0)
+        return factual_grounding_score(answer, sources)
     
     def _evaluate_enrichment(self, answer: str, sources: list[dict]) -> float:
         """Evaluate contextual enrichment"""
         if not answer or not sources:
             return 0.0
         
-        answer_words = set(re.findall(r'\b\w{4,}\b', answer.lower()))
+        answer_words = tokenize(answer).long_token_set
         
         if not answer_words:
             return 0.0
@@ -327,8 +429,7 @@ class HybridConfidenceEvaluator:
         for source in sources:
             text = source.get("text", "") or ""
             title = (source.get("metadata", {}) or {}).get("title", "") or ""
-            combined = text + " " + title
-            source_words.update(re.findall(r'\b\w{4,}\b', combined.lower()))
+            source_words.update(tokenize(text).long_token_set, tokenize(title).long_token_set)
         
         if not source_words:
             return 0.5
@@ -537,11 +638,16 @@ class HybridConfidenceEvaluator:
         if sentiment_dist := breakdown.get("sentiment_distribution"):
             print(f"  - Sentiment: {sentiment_dist}")
         
+        if timings := scores.get("timings"):
+            print("\n Stage Latency:")
+            for stage, ms in timings.items():
+                print(f"  - {stage.removesuffix('_ms').capitalize():<10} {ms:>10.1f} ms")
+        
         print("\n" + "="*80 + "\n")
     
     def _save_evaluation(self, scores: dict, answer: str, sources: list[dict]):
         """Save evaluation"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         filename = f"confidence_eval_{timestamp}.json"
         
         data = {
@@ -558,11 +664,35 @@ class HybridConfidenceEvaluator:
 
 def main():
     """Main entry point"""
-    import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Evaluate Live News RAG response quality")
+    parser.add_argument("query", nargs="*", help="question to evaluate")
+    parser.add_argument("--base-url", default="http://0.0.0.0:8000")
+    parser.add_argument("--single-call", action="store_true",
+                        help="score against the answer's own context docs instead of a separate retrieve")
+    parser.add_argument("--bulk", metavar="QUERIES_JSONL", help="evaluate every query in a JSONL file")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent evaluations in bulk mode")
+    parser.add_argument("--output", default="confidence_evals.jsonl",
+                        help="bulk results file, appended to (.csv or .jsonl)")
+    args = parser.parse_args()
+    
+    if args.bulk:
+        from bulk_evaluation import load_query_set, print_summary, run_bulk_evaluation
+        
+        evaluator = HybridConfidenceEvaluator(
+            args.base_url,
+            pool_size=2 * args.workers,
+            verbose=False,
+            single_call=args.single_call,
+        )
+        summary = run_bulk_evaluation(evaluator, load_query_set(args.bulk), args.output, workers=args.workers)
+        print_summary(summary)
+        exit(0 if not summary["failed"] else 1)
     
-    evaluator = HybridConfidenceEvaluator()
+    evaluator = HybridConfidenceEvaluator(args.base_url, single_call=args.single_call)
     
-    query = " ".join(sys.argv[1:]) if len(sys.argv) > 1 else "What are the latest developments in AI technology?"
+    query = " ".join(args.query) if args.query else "What are the latest developments in AI technology?"
     
     results = evaluator.evaluate_response(query)
     
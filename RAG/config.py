@@ -0,0 +1,169 @@
+"""
+Application configuration for the Live News RAG pipeline.
+
+Kept free of heavy imports so the environment can be validated before
+pathway, litellm and the LLM xpacks are loaded.
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def valid_chunk_overlap(chunk_size: int, overlap: int) -> bool:
+    """
+    Whether ``chunk_text`` makes progress with this overlap. A chunk may end
+    at a sentence break just past half its size, so an overlap of half the
+    chunk size or more can step back to where the chunk started.
+    """
+    return 0 <= overlap < chunk_size / 2
+
+
+class Config:
+    """Application configuration"""
+    NEWSAPI_KEY = os.environ.get("NEWSAPI_KEY", "")
+    OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+    EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "nomic-embed-text")
+    # "ollama" (EMBEDDING_MODEL via LiteLLM) or "hashing" (in-process, offline)
+    EMBEDDER_BACKEND = os.environ.get("EMBEDDER_BACKEND", "ollama")
+    HASHING_DIMENSIONS = int(os.environ.get("HASHING_DIMENSIONS", "1024"))
+    HASHING_NGRAMS = int(os.environ.get("HASHING_NGRAMS", "2"))
+    LLM_MODEL = os.environ.get("LLM_MODEL", "llama3.1")
+    # One category or several, polled in turn: "business,technology"
+    NEWS_CATEGORY = os.environ.get("NEWS_CATEGORY", "technology")
+    NEWS_COUNTRY = os.environ.get("NEWS_COUNTRY", "us")
+    NEWS_QUERY = os.environ.get("NEWS_QUERY", "")
+    POLL_INTERVAL = int(os.environ.get("POLL_INTERVAL", "300"))
+    # A poll's new articles are committed to the pipeline together, in commits
+    # of at most this many articles (0: the whole poll in one commit)
+    MAX_COMMIT_ARTICLES = int(os.environ.get("MAX_COMMIT_ARTICLES", "256"))
+    HOST = os.environ.get("HOST", "0.0.0.0")
+    PORT = int(os.environ.get("PORT", "8000"))
+    CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", "1000"))
+    CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", "200"))
+    TOP_K = int(os.environ.get("TOP_K", "5"))
+    # Two-stage retrieval (opt-in): results are limited to chunks of the
+    # ARTICLE_TOP_K articles whose title and description best match the query.
+    # This focuses results on a few stories; it does not make the search
+    # smaller (the chunk search still scores every chunk and adds an article
+    # search and query embedding per request). 0 disables it.
+    ARTICLE_TOP_K = int(os.environ.get("ARTICLE_TOP_K", "0"))
+    # Per-article summaries generated at ingestion priority; broad questions are
+    # answered from the summaries of the SUMMARY_TOP_K best matching articles
+    ARTICLE_SUMMARIES = os.environ.get("ARTICLE_SUMMARIES", "0").lower() in ("1", "true", "yes")
+    SUMMARY_MODEL = os.environ.get("SUMMARY_MODEL", "")  # empty: LLM_MODEL
+    SUMMARY_MAX_WORDS = int(os.environ.get("SUMMARY_MAX_WORDS", "60"))
+    SUMMARY_TOP_K = int(os.environ.get("SUMMARY_TOP_K", "8"))
+    # Failed or rejected summary calls are retried this many times, one poll apart
+    SUMMARY_RETRIES = int(os.environ.get("SUMMARY_RETRIES", "3"))
+    # Length of the publication time windows sentiment analytics are grouped by
+    ANALYTICS_WINDOW_MINUTES = int(os.environ.get("ANALYTICS_WINDOW_MINUTES", "60"))
+    # Structured logging (JSON lines to LOG_PATH, or stdout when empty)
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    LOG_PATH = os.environ.get("LOG_PATH", "")
+    LOG_RING_SIZE = int(os.environ.get("LOG_RING_SIZE", "1000"))
+    LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+    LOG_EMIT_MAX_PER_SECOND = float(os.environ.get("LOG_EMIT_MAX_PER_SECOND", "20"))
+    LOG_ERROR_MAX_PER_SECOND = float(os.environ.get("LOG_ERROR_MAX_PER_SECOND", "0.2"))
+    # Online shadow evaluation of live answers (0 disables it)
+    SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "0"))
+    SHADOW_WORKERS = int(os.environ.get("SHADOW_WORKERS", "2"))
+    SHADOW_QUEUE_SIZE = int(os.environ.get("SHADOW_QUEUE_SIZE", "256"))
+    SHADOW_WINDOW = int(os.environ.get("SHADOW_WINDOW", "500"))
+    SHADOW_LOG_PATH = os.environ.get("SHADOW_LOG_PATH", "")
+    SHADOW_LOG_INTERVAL = float(os.environ.get("SHADOW_LOG_INTERVAL", "60"))
+    # Periodic index snapshots for replicas (empty disables them)
+    INDEX_SNAPSHOT_PATH = os.environ.get("INDEX_SNAPSHOT_PATH", "")
+    INDEX_SNAPSHOT_INTERVAL = float(os.environ.get("INDEX_SNAPSHOT_INTERVAL", "300"))
+    # Append-only log of index changes between snapshots, tailed by query replicas
+    # (each generation is written to INDEX_DELTA_LOG.<log id>)
+    INDEX_DELTA_LOG = os.environ.get("INDEX_DELTA_LOG", "")
+    # Metadata field the published index is partitioned by (category, country, source)
+    # and partitions left out of it at startup (comma-separated)
+    INDEX_PARTITION_KEY = os.environ.get("INDEX_PARTITION_KEY", "category")
+    INDEX_DROPPED_PARTITIONS = os.environ.get("INDEX_DROPPED_PARTITIONS", "")
+    # Admin side port for profiling and memory introspection (0 disables it);
+    # keep it on a loopback or otherwise private interface
+    ADMIN_HOST = os.environ.get("ADMIN_HOST", "127.0.0.1")
+    ADMIN_PORT = int(os.environ.get("ADMIN_PORT", "0"))
+    REPLICA_PORT = int(os.environ.get("REPLICA_PORT", "8001"))
+    REPLICA_PROCESSES = int(os.environ.get("REPLICA_PROCESSES", "2"))
+    # Concurrent identical answer requests share one LLM completion
+    COALESCE_ANSWERS = os.environ.get("COALESCE_ANSWERS", "1").lower() not in ("0", "false", "no")
+    # Query embeddings cached by normalized query text (0 entries disables the cache)
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+    QUERY_EMBEDDING_CACHE_TTL = float(os.environ.get("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+    # Admission control for calls to the model server (llm_scheduler.py):
+    # total and per-class concurrency, per-class queue bounds
+    MODEL_MAX_CONCURRENCY = int(os.environ.get("MODEL_MAX_CONCURRENCY", "4"))
+    INTERACTIVE_CONCURRENCY = int(os.environ.get("INTERACTIVE_CONCURRENCY", "4"))
+    INGESTION_CONCURRENCY = int(os.environ.get("INGESTION_CONCURRENCY", "2"))
+    EVALUATION_CONCURRENCY = int(os.environ.get("EVALUATION_CONCURRENCY", "1"))
+    INTERACTIVE_QUEUE_SIZE = int(os.environ.get("INTERACTIVE_QUEUE_SIZE", "32"))
+    INGESTION_QUEUE_SIZE = int(os.environ.get("INGESTION_QUEUE_SIZE", "64"))
+    EVALUATION_QUEUE_SIZE = int(os.environ.get("EVALUATION_QUEUE_SIZE", "16"))
+
+    @classmethod
+    def validate(cls) -> list[str]:
+        """Return a list of configuration problems (empty when valid)"""
+        errors = []
+
+        if not cls.NEWSAPI_KEY:
+            errors.append("NEWSAPI_KEY must be set")
+        if cls.EMBEDDER_BACKEND not in ("ollama", "hashing"):
+            errors.append(f"EMBEDDER_BACKEND must be 'ollama' or 'hashing', got {cls.EMBEDDER_BACKEND!r}")
+        if cls.EMBEDDER_BACKEND == "hashing" and (cls.HASHING_DIMENSIONS <= 0 or cls.HASHING_NGRAMS <= 0):
+            errors.append("HASHING_DIMENSIONS and HASHING_NGRAMS must be positive")
+        if cls.POLL_INTERVAL <= 0:
+            errors.append("POLL_INTERVAL must be positive")
+        if cls.MAX_COMMIT_ARTICLES < 0:
+            errors.append("MAX_COMMIT_ARTICLES cannot be negative")
+        if not 0 < cls.PORT < 65536:
+            errors.append(f"PORT out of range: {cls.PORT}")
+        if cls.ADMIN_PORT and (not 0 < cls.ADMIN_PORT < 65536 or cls.ADMIN_PORT == cls.PORT):
+            errors.append(f"ADMIN_PORT must be a free port other than PORT: {cls.ADMIN_PORT}")
+        if cls.CHUNK_SIZE <= 0:
+            errors.append("CHUNK_SIZE must be positive")
+        if not valid_chunk_overlap(cls.CHUNK_SIZE, cls.CHUNK_OVERLAP):
+            errors.append("CHUNK_OVERLAP must be >= 0 and smaller than half of CHUNK_SIZE")
+        if cls.TOP_K <= 0:
+            errors.append("TOP_K must be positive")
+        if cls.ARTICLE_TOP_K < 0:
+            errors.append("ARTICLE_TOP_K cannot be negative")
+        if cls.ARTICLE_SUMMARIES and min(cls.SUMMARY_MAX_WORDS, cls.SUMMARY_TOP_K) <= 0:
+            errors.append("SUMMARY_MAX_WORDS and SUMMARY_TOP_K must be positive")
+        if cls.SUMMARY_RETRIES < 0:
+            errors.append("SUMMARY_RETRIES cannot be negative")
+        if cls.ANALYTICS_WINDOW_MINUTES <= 0:
+            errors.append("ANALYTICS_WINDOW_MINUTES must be positive")
+        if cls.QUERY_EMBEDDING_CACHE_SIZE > 0 and cls.QUERY_EMBEDDING_CACHE_TTL <= 0:
+            errors.append("QUERY_EMBEDDING_CACHE_TTL must be positive")
+        if cls.LOG_LEVEL.upper() not in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
+            errors.append(f"LOG_LEVEL is not a logging level: {cls.LOG_LEVEL}")
+        if min(cls.LOG_RING_SIZE, cls.LOG_QUEUE_SIZE) <= 0:
+            errors.append("LOG_RING_SIZE and LOG_QUEUE_SIZE must be positive")
+        if min(cls.LOG_EMIT_MAX_PER_SECOND, cls.LOG_ERROR_MAX_PER_SECOND) <= 0:
+            errors.append("LOG_EMIT_MAX_PER_SECOND and LOG_ERROR_MAX_PER_SECOND must be positive")
+        if not 0 <= cls.SHADOW_SAMPLE_RATE <= 1:
+            errors.append("SHADOW_SAMPLE_RATE must be between 0 and 1")
+        if cls.SHADOW_SAMPLE_RATE and min(cls.SHADOW_WORKERS, cls.SHADOW_QUEUE_SIZE, cls.SHADOW_WINDOW) <= 0:
+            errors.append("SHADOW_WORKERS, SHADOW_QUEUE_SIZE and SHADOW_WINDOW must be positive")
+        if cls.SHADOW_LOG_PATH and cls.SHADOW_LOG_INTERVAL <= 0:
+            errors.append("SHADOW_LOG_INTERVAL must be positive")
+        if cls.INDEX_SNAPSHOT_PATH and cls.INDEX_SNAPSHOT_INTERVAL <= 0:
+            errors.append("INDEX_SNAPSHOT_INTERVAL must be positive")
+        if cls.INDEX_DELTA_LOG and not cls.INDEX_SNAPSHOT_PATH:
+            errors.append("INDEX_DELTA_LOG needs INDEX_SNAPSHOT_PATH (replicas start from a snapshot)")
+        if not cls.INDEX_PARTITION_KEY:
+            errors.append("INDEX_PARTITION_KEY cannot be empty")
+        if not 0 < cls.REPLICA_PORT < 65536:
+            errors.append(f"REPLICA_PORT out of range: {cls.REPLICA_PORT}")
+        if cls.REPLICA_PROCESSES <= 0:
+            errors.append("REPLICA_PROCESSES must be positive")
+        if min(cls.MODEL_MAX_CONCURRENCY, cls.INTERACTIVE_CONCURRENCY, cls.INGESTION_CONCURRENCY, cls.EVALUATION_CONCURRENCY) <= 0:
+            errors.append("MODEL_MAX_CONCURRENCY and the per-class concurrency limits must be positive")
+        if min(cls.INTERACTIVE_QUEUE_SIZE, cls.INGESTION_QUEUE_SIZE, cls.EVALUATION_QUEUE_SIZE) < 0:
+            errors.append("Scheduler queue sizes cannot be negative")
+
+        return errors
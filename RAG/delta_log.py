@@ -0,0 +1,152 @@
+"""
+Append-only index delta log
+
+The ingestion pipeline appends every change to its index (a chunk added or
+updated, a chunk retracted) to a local log file; query replicas tail it to
+stay current between snapshots. The file starts with a header carrying a
+random log id. Each entry is a frame:
+
+    op (1 byte, b"A" upsert / b"D" delete) | record length (uint32) |
+    vector length in bytes (uint32) | record | vector
+
+where the record is ``index_snapshot.encode_record`` JSON and the vector is
+little-endian float32 (empty for deletes). Each generation of the log is its
+own file, ``<path>.<log id>``. The writer starts a new generation when it
+starts and when a snapshot is taken; the snapshot's manifest names the id
+and offset its contents are current up to. Older generations are deleted
+only once a manifest naming a newer one is published (``retire``), so a
+replica that loads the published snapshot always finds its log. Readers
+keep their open handle on an old generation until they load the snapshot
+that follows it.
+"""
+
+import glob
+import os
+import struct
+import uuid
+
+import numpy as np
+
+from index_snapshot import decode_record, encode_record
+
+MAGIC = b"NRDL"
+VERSION = 1
+HEADER = struct.Struct("<4sH16s")
+FRAME = struct.Struct("<cII")
+UPSERT = b"A"
+DELETE = b"D"
+
+
+def generation_path(path: str, log_id: str) -> str:
+    """File of the log generation ``log_id``"""
+    return f"{path}.{log_id}"
+
+
+class DeltaLogWriter:
+    """Appends index changes to generations of ``path``; not thread-safe, callers serialize"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.log_id = ""
+        self._file = None
+        self._open_new()
+
+    def _open_new(self):
+        """Start an empty generation under a new id; earlier ones stay until retired"""
+        log_id = uuid.uuid4().hex
+        self._file = open(generation_path(self.path, log_id), "xb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, bytes.fromhex(log_id)))
+        self._file.flush()
+        self.log_id = log_id
+
+    def append_upsert(self, chunk_id: str, text: str, metadata: dict, vector: np.ndarray):
+        record = encode_record(chunk_id, text, metadata)
+        data = np.asarray(vector, dtype="<f4").tobytes()
+        self._file.write(FRAME.pack(UPSERT, len(record), len(data)) + record + data)
+
+    def append_delete(self, chunk_id: str, text: str, metadata: dict):
+        record = encode_record(chunk_id, text, metadata)
+        self._file.write(FRAME.pack(DELETE, len(record), 0) + record)
+
+    def flush(self):
+        """Make everything appended so far visible to readers"""
+        self._file.flush()
+
+    def position(self) -> dict:
+        """Current end of the log as ``{"id", "offset"}``"""
+        self._file.flush()
+        return {"id": self.log_id, "offset": self._file.tell()}
+
+    def rotate(self) -> dict:
+        """Start a new, empty generation; returns its starting position"""
+        self._file.close()
+        self._open_new()
+        return self.position()
+
+    def retire(self, log_id: str) -> int:
+        """
+        Delete every generation other than ``log_id`` and the current one;
+        call once a manifest naming ``log_id`` is published. Returns the
+        number of files deleted.
+        """
+        keep = {generation_path(self.path, log_id), generation_path(self.path, self.log_id)}
+        deleted = 0
+        for name in glob.glob(glob.escape(self.path) + "." + "[0-9a-f]" * 32):
+            if name not in keep:
+                try:
+                    os.remove(name)
+                    deleted += 1
+                except FileNotFoundError:
+                    pass
+        return deleted
+
+    def close(self):
+        self._file.close()
+
+
+class DeltaLogReader:
+    """
+    Tails generation ``log_id`` of the delta log at ``path`` from ``offset``.
+    Raises ``OSError`` when the generation is gone and ``ValueError`` when its
+    file is not that log.
+    """
+
+    def __init__(self, path: str, log_id: str, offset: int):
+        self.path = generation_path(path, log_id)
+        self.log_id = log_id
+        self._file = open(self.path, "rb")
+        header = self._file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            self._file.close()
+            raise ValueError(f"{self.path}: truncated delta log header")
+        magic, version, raw_id = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            self._file.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} delta log")
+        if raw_id.hex() != log_id:
+            self._file.close()
+            raise ValueError(f"{self.path} is log {raw_id.hex()}, expected {log_id}")
+        self.offset = max(offset, HEADER.size)
+        self._file.seek(self.offset)
+
+    def read(self):
+        """
+        Yield ``(op, record, vector)`` for every complete frame appended since
+        the last call; a frame still being written is left for the next call.
+        """
+        while True:
+            header = self._file.read(FRAME.size)
+            if len(header) < FRAME.size:
+                break
+            op, record_length, vector_length = FRAME.unpack(header)
+            payload = self._file.read(record_length + vector_length)
+            if len(payload) < record_length + vector_length:
+                break
+            self.offset = self._file.tell()
+            record = decode_record(payload[:record_length])
+            vector = np.frombuffer(payload[record_length:], dtype="<f4") if vector_length else None
+            yield op, record, vector
+        self._file.seek(self.offset)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,220 @@
+"""
+Paginated, filterable document listing for the Live News RAG index
+Server side: ``paginate_documents`` backs /v1/pw_list_documents_page
+Client side: ``DocumentCache`` keeps a local copy synced with deltas
+
+Documents are ordered by (indexed_at, id). The cursor is the position of the
+last returned document, so a cursor kept from an earlier sync doubles as a
+"changed since" marker: resuming from it returns only documents indexed later.
+
+A cursor only reports additions. To reconcile retractions, every page also
+carries the server's ``generation`` (random per server process) and an
+``ids_digest`` of all listed document ids. A client whose ids hash to another
+digest after syncing to the end, or that sees another generation, rebuilds
+its copy.
+"""
+
+import base64
+import hashlib
+import json
+import os
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+# Identifies this server process's listing; a restart re-indexes everything
+GENERATION = os.urandom(16).hex()
+
+
+def ids_digest(ids) -> str:
+    """Order-independent digest of a set of document ids"""
+    total = 0
+    for doc_id in ids:
+        total += int.from_bytes(hashlib.blake2b(str(doc_id).encode("utf-8"), digest_size=8).digest(), "little")
+    return f"{total % 2**64:016x}"
+
+
+def encode_cursor(indexed_at: str, doc_id: str) -> str:
+    """Opaque cursor for the position (indexed_at, doc_id)"""
+    raw = json.dumps([indexed_at, doc_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str | None) -> tuple[str, str] | None:
+    """Inverse of ``encode_cursor``; None for an empty cursor"""
+    if not cursor:
+        return None
+    try:
+        indexed_at, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(indexed_at), str(doc_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def _matches(
+    metadata: dict,
+    source: str | None,
+    published_after: str | None,
+    published_before: str | None,
+) -> bool:
+    if source and metadata.get("source") != source:
+        return False
+    published_at = metadata.get("published_at") or ""
+    if published_after and published_at < published_after:
+        return False
+    if published_before and published_at >= published_before:
+        return False
+    return True
+
+
+def paginate_documents(
+    metadatas: list[dict],
+    limit: int = DEFAULT_PAGE_LIMIT,
+    cursor: str | None = None,
+    changed_since: str | None = None,
+    source: str | None = None,
+    published_after: str | None = None,
+    published_before: str | None = None,
+    include_text: bool = False,
+) -> dict:
+    """
+    Select one page of document metadata.
+
+    ``metadatas`` are the per-chunk metadata dicts of the index, each with an
+    ``id``. ``published_after``/``published_before`` and ``changed_since`` are
+    ISO-8601 strings compared lexicographically, which matches the NewsAPI and
+    ``datetime.isoformat`` formats stored at ingest.
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_LIMIT), MAX_PAGE_LIMIT))
+    position = decode_cursor(cursor)
+
+    selected = []
+    for metadata in metadatas:
+        key = (metadata.get("indexed_at") or "", metadata.get("id") or "")
+        if position and key <= position:
+            continue
+        if changed_since and key[0] <= changed_since:
+            continue
+        if not _matches(metadata, source, published_after, published_before):
+            continue
+        selected.append((key, metadata))
+
+    selected.sort(key=lambda item: item[0])
+    page = selected[:limit]
+
+    documents = []
+    for _, metadata in page:
+        if not include_text:
+            metadata = {k: v for k, v in metadata.items() if k != "text"}
+        documents.append({"metadata": metadata})
+
+    if page:
+        next_cursor = encode_cursor(*page[-1][0])
+    else:
+        next_cursor = cursor
+
+    return {
+        "documents": documents,
+        "next_cursor": next_cursor,
+        "has_more": len(selected) > limit,
+        "total_count": len(metadatas),
+        "generation": GENERATION,
+        "ids_digest": ids_digest(metadata["id"] for metadata in metadatas if metadata.get("id")),
+    }
+
+
+class DocumentCache:
+    """
+    Local copy of the index listing, kept in sync with deltas.
+
+    Each ``sync`` only pulls documents indexed after the stored cursor. When
+    the server's generation changed (restart) or, once the sync reached the
+    end, the cached ids do not match the server's digest (retractions), the
+    cache is dropped and rebuilt from scratch. With a ``path`` the cache is
+    persisted there between runs; without one it lives in memory.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.documents: dict[str, dict] = {}
+        self.cursor: str | None = None
+        self.generation: str | None = None
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.documents = data.get("documents", {})
+            self.cursor = data.get("cursor")
+            self.generation = data.get("generation")
+        except Exception:
+            # Corrupt cache - start over
+            self.reset()
+
+    def _save(self):
+        if not self.path:
+            return
+        with open(self.path, "w") as f:
+            json.dump({"cursor": self.cursor, "generation": self.generation, "documents": self.documents}, f)
+
+    def reset(self):
+        """Forget everything; the next sync downloads the full listing"""
+        self.documents, self.cursor, self.generation = {}, None, None
+
+    def apply_page(self, page: dict) -> int:
+        """Merge one listing page, returning the number of new documents"""
+        added = 0
+        for doc in page.get("documents", []):
+            metadata = doc.get("metadata", {})
+            doc_id = metadata.get("id")
+            if doc_id is None:
+                continue
+            if doc_id not in self.documents:
+                added += 1
+            self.documents[doc_id] = metadata
+        self.cursor = page.get("next_cursor") or self.cursor
+        return added
+
+    def sync(self, fetch_page, limit: int = DEFAULT_PAGE_LIMIT) -> int:
+        """
+        Pull all changes since the last sync.
+
+        ``fetch_page(cursor, limit)`` returns one listing page (or None on error).
+        Returns the number of new documents.
+        """
+        added = 0
+        rebuilt = False
+        while True:
+            page = fetch_page(self.cursor, limit)
+            if page is None:
+                break
+            generation = page.get("generation")
+            if self.generation is not None and generation != self.generation:
+                self.reset()  # the server restarted: ids and cursors from before are void
+                added, rebuilt = 0, True
+                continue
+            self.generation = generation
+            added += self.apply_page(page)
+            if page.get("has_more"):
+                continue
+            digest = page.get("ids_digest")
+            if digest is not None and digest != ids_digest(self.documents) and not rebuilt:
+                self.reset()  # documents were retracted since they were cached
+                added, rebuilt = 0, True
+                continue
+            break
+
+        self._save()
+        return added
+
+    def latest(self, n: int = 10, source: str | None = None) -> list[dict]:
+        """Most recently published cached documents"""
+        docs = [
+            m for m in self.documents.values()
+            if not source or m.get("source") == source
+        ]
+        docs.sort(key=lambda m: m.get("published_at") or "", reverse=True)
+        return docs[:n]
@@ -0,0 +1,156 @@
+"""
+Embedder backends for the Live News RAG pipeline
+
+``build_embedder()`` returns the embedder selected by ``Config.EMBEDDER_BACKEND``
+together with its vector dimension:
+
+- ``ollama``: ``LiteLLMEmbedder`` against the Ollama server (the default),
+  each call admitted by the model call scheduler under the embedder's
+  priority class (``ingestion`` for chunks, ``interactive`` for queries);
+  query embeddings are served from the query embedding cache when possible
+- ``hashing``: an in-process, deterministic feature-hashing embedder over
+  word n-grams, computed with NumPy a whole batch at a time. It needs no model
+  server, so it is the stand-in for offline runs and CI, and the throughput
+  baseline that separates index and retrieval cost from model latency.
+"""
+
+import time
+import zlib
+
+import numpy as np
+import pathway as pw
+from pathway.xpacks.llm.embedders import BaseEmbedder, LiteLLMEmbedder
+
+from config import Config
+from embedding_cache import EmbeddingCache, get_query_cache
+from llm_scheduler import get_scheduler
+from text_processing import tokenize
+
+
+class HashingNgramEncoder:
+    """
+    Deterministic bag-of-n-grams vectors. Each lower-cased word is hashed with
+    crc32 and word n-gram hashes (n = 2 .. ``ngrams``) are rolled from the
+    word hashes with NumPy. Every feature adds +1/-1 (sign from the hash) to
+    one of ``dimensions`` buckets, and vectors are L2-normalized, so a dot
+    product is the cosine similarity.
+    """
+
+    NGRAM_MULTIPLIER = 0x01000193  # FNV prime, rolls word hashes into n-gram hashes
+    MIX_MULTIPLIER = 0x9E3779B1  # spreads the rolled hashes before bucketing
+
+    def __init__(self, dimensions: int = 1024, ngrams: int = 2, max_cached_words: int = 1_000_000):
+        self.dimensions = dimensions
+        self.ngrams = ngrams
+        self.max_cached_words = max_cached_words
+        self._word_hashes: dict[str, int] = {}
+
+    def _word_hash(self, word: str) -> int:
+        h = self._word_hashes.get(word)
+        if h is None:
+            if len(self._word_hashes) >= self.max_cached_words:
+                self._word_hashes.clear()
+            h = self._word_hashes[word] = zlib.crc32(word.encode("utf-8", "surrogatepass"))
+        return h
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Embed ``texts`` into a ``(len(texts), dimensions)`` float32 array"""
+        token_lists = [tokenize(text).tokens for text in texts]
+        lengths = [len(tokens) for tokens in token_lists]
+        hashes = np.fromiter(
+            (self._word_hash(word) for tokens in token_lists for word in tokens),
+            dtype=np.uint64,
+            count=sum(lengths),
+        )
+        rows = np.repeat(np.arange(len(texts)), lengths)
+
+        features, feature_rows = [hashes], [rows]
+        rolled = hashes
+        for n in range(2, self.ngrams + 1):
+            rolled = (rolled[:-1] * self.NGRAM_MULTIPLIER + hashes[n - 1:]) & 0xFFFFFFFF
+            # Keep n-grams whose first and last word belong to the same text
+            same_text = rows[:len(rolled)] == rows[n - 1:]
+            features.append(rolled[same_text])
+            feature_rows.append(rows[:len(rolled)][same_text])
+
+        mixed = (np.concatenate(features) * self.MIX_MULTIPLIER) & 0xFFFFFFFF
+        mixed ^= mixed >> 16
+        signs = np.where(mixed & 0x80000000, 1.0, -1.0)
+        flat = np.concatenate(feature_rows) * self.dimensions + (mixed % self.dimensions).astype(np.int64)
+        vectors = np.bincount(flat, weights=signs, minlength=len(texts) * self.dimensions)
+        vectors = vectors.reshape(len(texts), self.dimensions)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+
+class HashingEmbedder(BaseEmbedder):
+    """Pathway embedder UDF around ``HashingNgramEncoder``, called in batches"""
+
+    def __init__(self, dimensions: int = 1024, ngrams: int = 2, batch_size: int = 256):
+        super().__init__(max_batch_size=batch_size, deterministic=True)
+        self.encoder = HashingNgramEncoder(dimensions, ngrams)
+        self.kwargs = {}
+
+    def __wrapped__(self, input: list[str], **kwargs) -> list[np.ndarray]:
+        # get_embedding_dimension() calls this with a single string
+        if isinstance(input, str):
+            return self.encoder.encode([input])[0]
+        return list(self.encoder.encode(input))
+
+
+class ScheduledLiteLLMEmbedder(LiteLLMEmbedder):
+    """
+    LiteLLMEmbedder whose calls wait for a model call slot of class
+    ``priority``. With a ``cache``, texts found there skip the call entirely.
+    """
+
+    def __init__(self, *, priority: str, cache: EmbeddingCache | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.priority = priority
+        self.cache = cache
+
+    async def __wrapped__(self, input, **kwargs) -> np.ndarray:
+        if self.cache is None:
+            async with get_scheduler().aslot(self.priority):
+                return await super().__wrapped__(input, **kwargs)
+
+        model = str(kwargs.get("model") or self.kwargs.get("model"))
+        vector = self.cache.get(model, input)
+        if vector is not None:
+            return vector
+        start = time.perf_counter()
+        async with get_scheduler().aslot(self.priority):
+            vector = await super().__wrapped__(input, **kwargs)
+        return self.cache.put(model, input, vector, time.perf_counter() - start)
+
+
+def embedder_spec() -> dict:
+    """What ``build_embedder()`` builds, enough to embed queries the same way elsewhere"""
+    if Config.EMBEDDER_BACKEND == "hashing":
+        return {"backend": "hashing", "dimensions": Config.HASHING_DIMENSIONS, "ngrams": Config.HASHING_NGRAMS}
+    return {"backend": "ollama", "model": Config.EMBEDDING_MODEL}
+
+
+def build_embedder(priority: str = "ingestion") -> tuple[BaseEmbedder, int]:
+    """Embedder selected in ``Config`` and its vector dimension"""
+    if Config.EMBEDDER_BACKEND == "hashing":
+        return (
+            HashingEmbedder(dimensions=Config.HASHING_DIMENSIONS, ngrams=Config.HASHING_NGRAMS),
+            Config.HASHING_DIMENSIONS,
+        )
+
+    embedder = ScheduledLiteLLMEmbedder(
+        priority=priority,
+        cache=get_query_cache() if priority == "interactive" else None,
+        capacity=5,
+        retry_strategy=pw.udfs.ExponentialBackoffRetryStrategy(
+            max_retries=4,
+            initial_delay=1000
+        ),
+        model=f"ollama/{Config.EMBEDDING_MODEL}",
+        api_base=Config.OLLAMA_HOST,
+    )
+    embedding_dimension = 768 if Config.EMBEDDING_MODEL == "nomic-embed-text" else 1536
+    return embedder, embedding_dimension
@@ -0,0 +1,106 @@
+"""
+Bounded LRU/TTL cache of query embeddings
+
+Dashboards and the test tools ask the same questions over and over, and each
+retrieve or answer request used to embed its query through the model server
+first. ``EmbeddingCache`` maps ``(model, normalized query text)`` to the
+vector, holds at most ``max_entries`` of them (least recently used evicted
+first) and drops entries older than ``ttl`` seconds. It is used on the query
+side only: by the pipeline's query embedder and by the snapshot server and
+replicas (``index_snapshot.query_encoder``).
+
+``snapshot()`` reports the hit rate and an estimate of the time saved: every
+hit is credited with the mean latency of the misses so far.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from config import Config
+from text_processing import normalize_prompt
+
+
+class EmbeddingCache:
+    """Thread-safe; vectors are stored read-only and returned as is"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.counters = Counter()
+        self._entries: OrderedDict[tuple[str, str], tuple[float, np.ndarray]] = OrderedDict()
+        self._miss_seconds = 0.0
+        self._saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, text: str) -> tuple[str, str]:
+        return model, normalize_prompt(text or "")
+
+    def get(self, model: str, text: str) -> np.ndarray | None:
+        """The cached vector of ``text``, or None (counted as a miss)"""
+        key = self.key(model, text)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.ttl:
+                del self._entries[key]
+                self.counters["expired"] += 1
+                entry = None
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            if self.counters["stored"]:
+                self._saved_seconds += self._miss_seconds / self.counters["stored"]
+            return entry[1]
+
+    def put(self, model: str, text: str, vector, seconds: float) -> np.ndarray:
+        """Cache the vector of ``text``, embedded in ``seconds``; returns the stored copy"""
+        vector = np.array(vector, dtype=np.float32)
+        vector.flags.writeable = False
+        key = self.key(model, text)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            self.counters["stored"] += 1
+            self._miss_seconds += seconds
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evicted"] += 1
+        return vector
+
+    def snapshot(self) -> dict:
+        """Size, hit/miss totals, hit rate and estimated model server time saved"""
+        with self._lock:
+            hits, misses = self.counters["hits"], self.counters["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+                "expired": self.counters["expired"],
+                "evicted": self.counters["evicted"],
+                "mean_miss_seconds": round(self._miss_seconds / self.counters["stored"], 4) if self.counters["stored"] else None,
+                "saved_seconds": round(self._saved_seconds, 3),
+            }
+
+
+_cache: EmbeddingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> EmbeddingCache | None:
+    """The process-wide query embedding cache, None when QUERY_EMBEDDING_CACHE_SIZE is 0"""
+    global _cache
+    if Config.QUERY_EMBEDDING_CACHE_SIZE <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(Config.QUERY_EMBEDDING_CACHE_SIZE, Config.QUERY_EMBEDDING_CACHE_TTL)
+        return _cache
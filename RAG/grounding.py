@@ -0,0 +1,152 @@
+"""
+Factual grounding scorer for the confidence evaluator
+
+Scores the share of answer phrases (3- to 6-word n-grams longer than 12
+characters) that appear verbatim in the source texts. The sources are indexed
+once, so each phrase is checked with a hash lookup instead of a substring scan
+over the whole source corpus.
+"""
+
+import re
+
+from text_processing import tokenize
+
+WORD_PATTERN = re.compile(r'\w+')
+# Maximal runs of words separated by exactly one space
+WORD_RUN_PATTERN = re.compile(r'\w+(?: \w+)*')
+
+MIN_PHRASE_WORDS = 3
+MAX_PHRASE_WORDS = 6
+MIN_PHRASE_CHARS = 13
+
+
+def answer_phrases(answer: str) -> set[tuple[str, ...]]:
+    """Distinct answer n-grams that are long enough to count as phrases"""
+    words = tokenize(answer).tokens
+    # offsets[i] = characters in words[:i], so a joined phrase has
+    # offsets[i+n] - offsets[i] + (n - 1) characters
+    offsets = [0]
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+
+    phrases = set()
+    for n in range(MIN_PHRASE_WORDS, min(MAX_PHRASE_WORDS + 1, len(words))):
+        min_chars = MIN_PHRASE_CHARS - (n - 1)
+        for i in range(len(words) - n + 1):
+            if offsets[i+n] - offsets[i] >= min_chars:
+                phrases.add(tuple(words[i:i+n]))
+    return phrases
+
+
+class SourceShingleIndex:
+    """
+    Hash index answering "is this phrase a substring of the source text?".
+
+    A phrase ``w1 .. wn`` occurs in the text exactly when some run of
+    single-space separated source words ``s0 s1 .. s(n-1)`` has
+    ``s1 .. s(n-2) == w2 .. w(n-1)``, ``s0`` ending with ``w1`` and ``s(n-1)``
+    starting with ``wn`` (the edge words may be cut mid-word). The index maps
+    each middle word sequence to the (left, right) word pairs around it, so a
+    lookup costs one hash probe plus a scan of that middle's few occurrences.
+
+    Only middles of the given ``phrases`` are indexed, which keeps the build a
+    single pass with one or two hash probes per source word.
+    """
+
+    def __init__(self, runs: list[list[str]], phrases: set[tuple[str, ...]]):
+        wanted = {phrase[1:-1] for phrase in phrases}
+        # Every prefix of a wanted middle, so the scan can stop extending early
+        prefixes = {middle[:k] for middle in wanted if len(middle) > 1 for k in range(1, len(middle))}
+        prefixes |= wanted
+        first_words = {middle[0] for middle in wanted}
+        max_middle = MAX_PHRASE_WORDS - 2
+
+        self.edges: dict[tuple[str, ...], set[tuple[str, str]]] = {}
+        for run in runs:
+            last = len(run) - 1
+            for i in range(1, last):
+                if run[i] not in first_words:
+                    continue
+                for m in range(1, min(max_middle, last - i) + 1):
+                    middle = tuple(run[i:i+m])
+                    if middle not in prefixes:
+                        break
+                    if middle in wanted:
+                        self.edges.setdefault(middle, set()).add((run[i-1], run[i+m]))
+
+    def contains(self, phrase: tuple[str, ...]) -> bool:
+        """True when ``' '.join(phrase)`` is a substring of the indexed text"""
+        edges = self.edges.get(phrase[1:-1])
+        if not edges:
+            return False
+        first, last = phrase[0], phrase[-1]
+        if (first, last) in edges:
+            return True
+        return any(left.endswith(first) and right.startswith(last) for left, right in edges)
+
+
+def source_corpus(sources: list[dict]) -> str:
+    """Lower-cased text and titles of all sources, as scored by the evaluator"""
+    return " ".join([
+        (s.get("text", "") or "") + " " +
+        ((s.get("metadata", {}) or {}).get("title", "") or "")
+        for s in sources
+    ]).lower()
+
+
+def _source_piece(source: dict) -> str:
+    return ((source.get("text", "") or "") + " " +
+            ((source.get("metadata", {}) or {}).get("title", "") or "")).lower()
+
+
+def _word_runs(text: str) -> list[list[str]]:
+    return [run.split(" ") for run in WORD_RUN_PATTERN.findall(text)]
+
+
+def corpus_word_runs(sources: list[dict], cache: dict | None = None) -> list[list[str]]:
+    """
+    Word runs of ``source_corpus(sources)``, built from per-source runs.
+
+    Sources are joined with a single space, so the last run of one source
+    continues into the first run of the next when both sides of the join are
+    word characters. With a ``cache``, each source is split into runs once and
+    reused across calls.
+    """
+    runs: list[list[str]] = []
+    previous = ""
+    for source in sources:
+        piece = _source_piece(source)
+        piece_runs = cache.get(piece) if cache is not None else None
+        if piece_runs is None:
+            piece_runs = _word_runs(piece)
+            if cache is not None:
+                cache[piece] = piece_runs
+        if runs and piece_runs and WORD_PATTERN.match(previous[-1]) and WORD_PATTERN.match(piece[0]):
+            runs[-1] = runs[-1] + piece_runs[0]
+            runs.extend(piece_runs[1:])
+        else:
+            runs.extend(piece_runs)
+        previous = piece
+    return runs
+
+
+def factual_grounding_score(answer: str, sources: list[dict], run_cache: dict | None = None) -> float:
+    """
+    Share of answer phrases found in the sources, scaled by 1.5 and capped at 1.
+    ``run_cache`` (see ``corpus_word_runs``) lets batch callers reuse source runs.
+    """
+    if not answer or not sources:
+        return 0.0
+
+    if len(tokenize(answer).tokens) < 3:
+        return 0.5
+
+    phrases = answer_phrases(answer)
+    if not phrases:
+        return 0.5
+
+    index = SourceShingleIndex(corpus_word_runs(sources, run_cache), phrases)
+    grounded_count = sum(1 for phrase in phrases if index.contains(phrase))
+    grounding_ratio = grounded_count / len(phrases)
+
+    return min(grounding_ratio * 1.5, 1.0)
@@ -0,0 +1,723 @@
+"""
+Index snapshots for the Live News RAG pipeline
+
+A snapshot is a directory holding what the DocumentStore's KNN index was
+built from, in a versioned binary layout:
+
+- ``manifest.json``: format name and version, row count, vector dimension,
+  the embedder that produced the vectors and, for a partitioned snapshot,
+  the partition key and the row range of each partition
+- ``vectors.f32``: all chunk vectors as one contiguous little-endian float32
+  ``(count, dimensions)`` array
+- ``norms.f32``: the L2 norm of every vector (``count`` float32)
+- ``records.bin``: one compact JSON array per chunk, ``[id, text, metadata]``
+- ``offsets.u64``: ``count + 1`` little-endian uint64 byte offsets into
+  ``records.bin``
+- ``source.u32``, ``published_at.i64``, ``sentiment.u8``,
+  ``sentiment_score.f32``: the filterable metadata as columns (see
+  ``metadata_columns.py``), the source dictionary being in the manifest
+
+``SnapshotRecorder`` keeps the ingestion pipeline's indexed chunks and writes
+a snapshot every ``interval`` seconds when they changed; with a delta log
+(see ``delta_log.py``) it also appends every change to it, and the manifest
+records the log position the snapshot is current up to. ``IndexSnapshot``
+memory-maps a snapshot: opening one reads only the manifest, so a new node
+can answer ``/v1/retrieve`` in seconds, without re-ingesting or
+re-embedding, and pages are only read in when queries touch them.
+
+Rows are grouped by the value of one metadata field (``partition_key``, e.g.
+the feed category or ``source``), so a search routed to some partitions only
+scans their rows, and structured ``filters`` are evaluated on the metadata
+columns so only matching rows are scored. A partition appears when the first
+chunk with a new value is indexed; ``SnapshotRecorder.drop_partition`` takes
+one out of the published index and ``restore_partition`` puts it back.
+
+Usage:
+    python index_snapshot.py info ./snapshot
+    python index_snapshot.py serve ./snapshot --port 8001
+"""
+
+import argparse
+import fnmatch
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+
+from config import Config
+from embedding_cache import get_query_cache
+from json_http import JSONRequestHandler
+from metadata_columns import COLUMN_DTYPES, ColumnBuilder, FilterColumns, StructuredFilter
+from llm_scheduler import SchedulerRejected, get_scheduler
+
+FORMAT = "news-rag-index"
+VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.f32"
+NORMS_FILE = "norms.f32"
+RECORDS_FILE = "records.bin"
+OFFSETS_FILE = "offsets.u64"
+COLUMN_FILES = {
+    "source": "source.u32",
+    "published_at": "published_at.i64",
+    "sentiment": "sentiment.u8",
+    "sentiment_score": "sentiment_score.f32",
+}
+
+logger = logging.getLogger("news_rag.snapshot")
+
+
+def encode_record(chunk_id: str, text: str, metadata: dict) -> bytes:
+    """Compact JSON ``[id, text, metadata]`` for one chunk"""
+    record = [chunk_id, text, metadata]
+    # The pipeline's metadata repeats the chunk text; store it once
+    if metadata.get("text") == text:
+        record = [chunk_id, text, {k: v for k, v in metadata.items() if k != "text"}, 1]
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode_record(data: bytes) -> dict:
+    """Chunk written by ``encode_record`` as ``{"id", "text", "metadata"}``"""
+    raw = json.loads(data)
+    chunk_id, text, metadata = raw[:3]
+    if len(raw) > 3:
+        metadata["text"] = text
+    return {"id": chunk_id, "text": text, "metadata": metadata}
+
+
+def partition_of(metadata: dict, partition_key: str) -> str:
+    """Partition a chunk belongs to: its ``partition_key`` metadata value ("" when missing)"""
+    value = metadata.get(partition_key)
+    return "" if value is None else str(value)
+
+
+def write_snapshot(
+    path: str,
+    records,
+    dimensions: int,
+    embedder: dict,
+    delta_log: dict | None = None,
+    partition_key: str | None = None,
+) -> dict:
+    """
+    Write ``records`` (``(id, text, metadata, vector)`` tuples) as a snapshot
+    at ``path``, streaming one row at a time. The snapshot is assembled in a
+    sibling directory and swapped in, so readers never see a partial one;
+    processes that have the previous snapshot mapped keep reading it.
+    ``delta_log`` is the delta log position (``{"id", "offset"}``) the
+    records are current up to. With a ``partition_key`` the records must come
+    grouped by partition and the manifest records each partition's rows.
+    Returns the manifest.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    count = 0
+    offsets = [0]
+    partitions: dict[str, list[int]] = {}  # partition -> [first row, end row)
+    partition = None
+    columns = ColumnBuilder()
+    with open(os.path.join(tmp_path, VECTORS_FILE), "wb") as vectors, \
+            open(os.path.join(tmp_path, NORMS_FILE), "wb") as norms, \
+            open(os.path.join(tmp_path, RECORDS_FILE), "wb") as data:
+        for chunk_id, text, metadata, vector in records:
+            vector = np.asarray(vector, dtype="<f4")
+            if vector.shape != (dimensions,):
+                raise ValueError(f"chunk {chunk_id}: vector shape {vector.shape}, expected ({dimensions},)")
+            if partition_key is not None and partition_of(metadata, partition_key) != partition:
+                partition = partition_of(metadata, partition_key)
+                if partition in partitions:
+                    raise ValueError(f"chunk {chunk_id}: records are not grouped by {partition_key}")
+                partitions[partition] = [count, count]
+            if partition is not None:
+                partitions[partition][1] = count + 1
+            vectors.write(vector.tobytes())
+            norms.write(np.float32(np.linalg.norm(vector)).astype("<f4").tobytes())
+            data.write(encode_record(chunk_id, text, metadata))
+            offsets.append(data.tell())
+            columns.add(metadata)
+            count += 1
+
+    np.asarray(offsets, dtype="<u8").tofile(os.path.join(tmp_path, OFFSETS_FILE))
+    filter_columns = columns.build()
+    for name, file_name in COLUMN_FILES.items():
+        filter_columns.arrays[name].tofile(os.path.join(tmp_path, file_name))
+    manifest = {
+        "format": FORMAT,
+        "version": VERSION,
+        "count": count,
+        "dimensions": dimensions,
+        "dtype": "float32",
+        "embedder": embedder,
+        "created_at": datetime.now().isoformat(),
+        "filter_columns": {"sources": filter_columns.sources},
+    }
+    if partition_key is not None:
+        manifest["partition_key"] = partition_key
+        manifest["partitions"] = partitions
+    if delta_log is not None:
+        manifest["delta_log"] = delta_log
+    with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return manifest
+
+
+def _map(f, dtype: str, shape: tuple) -> np.ndarray:
+    """Read-only memory map of a raw array file (mmap cannot map empty files)"""
+    if 0 in shape:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(f, dtype=dtype, mode="r", shape=shape)
+
+
+class IndexSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot directory with brute-force
+    cosine search that returns results in the ``/v1/retrieve`` format.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Open every file through one directory handle, so a snapshot swapped
+        # in meanwhile cannot mix its files with this one's
+        dir_fd = os.open(path, os.O_RDONLY) if os.open in os.supports_dir_fd else None
+        try:
+            self._open_files(dir_fd)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+
+    def _open_files(self, dir_fd: int | None):
+        def open_file(name: str, mode: str = "rb"):
+            if dir_fd is None:
+                return open(os.path.join(self.path, name), mode)
+            return open(name, mode, opener=lambda p, flags: os.open(p, flags, dir_fd=dir_fd))
+
+        with open_file(MANIFEST_FILE, "r") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT:
+            raise ValueError(f"{self.path} is not an index snapshot")
+        if self.manifest.get("version") != VERSION:
+            raise ValueError(f"Unsupported snapshot version {self.manifest.get('version')} (expected {VERSION})")
+
+        self.count = self.manifest["count"]
+        self.dimensions = self.manifest["dimensions"]
+        self.partition_key = self.manifest.get("partition_key")
+        self.partitions = {name: tuple(rows) for name, rows in self.manifest.get("partitions", {}).items()}
+        arrays = {
+            VECTORS_FILE: ("<f4", (self.count, self.dimensions)),
+            NORMS_FILE: ("<f4", (self.count,)),
+            OFFSETS_FILE: ("<u8", (self.count + 1,)),
+        }
+        has_columns = "filter_columns" in self.manifest
+        if has_columns:
+            arrays.update({COLUMN_FILES[name]: (dtype, (self.count,)) for name, dtype in COLUMN_DTYPES.items()})
+        mapped = {}
+        for name, (dtype, shape) in arrays.items():
+            with open_file(name) as f:
+                size = os.fstat(f.fileno()).st_size
+                expected = int(np.prod(shape)) * np.dtype(dtype).itemsize
+                if size != expected:
+                    raise ValueError(f"{name} is {size} bytes, expected {expected}: truncated or mismatched snapshot")
+                mapped[name] = _map(f, dtype, shape)
+        self.vectors, self.norms, self.offsets = mapped[VECTORS_FILE], mapped[NORMS_FILE], mapped[OFFSETS_FILE]
+        self._columns = None
+        if has_columns:
+            self._columns = FilterColumns(
+                {name: mapped[COLUMN_FILES[name]] for name in COLUMN_DTYPES},
+                self.manifest["filter_columns"]["sources"],
+            )
+
+        self._records = b""
+        self._row_ids: dict[str, int] | None = None
+        if self.count:
+            with open_file(RECORDS_FILE) as f:
+                self._records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def record(self, i: int) -> dict:
+        """Chunk ``i`` as ``{"id", "text", "metadata"}``"""
+        return decode_record(self._records[int(self.offsets[i]):int(self.offsets[i + 1])])
+
+    def row_ids(self) -> dict[str, int]:
+        """Row of every chunk id; decodes all records, so it is built once and on demand"""
+        if self._row_ids is None:
+            self._row_ids = {self.record(i)["id"]: i for i in range(self.count)}
+        return self._row_ids
+
+    def filter_columns(self) -> FilterColumns:
+        """The filterable metadata columns (built from the records for snapshots written without them)"""
+        if self._columns is None:
+            self._columns = FilterColumns.from_metadata(self.record(i)["metadata"] for i in range(self.count))
+        return self._columns
+
+    def candidate_rows(
+        self,
+        partitions: list[str] | None = None,
+        filters: StructuredFilter | None = None,
+    ) -> np.ndarray | None:
+        """Sorted rows in ``partitions`` that pass ``filters``; None for all rows"""
+        rows = self.partition_rows(partitions)
+        if filters is None:
+            return rows
+        mask = filters.mask(self.filter_columns(), rows)
+        return np.flatnonzero(mask) if rows is None else rows[mask]
+
+    def partition_rows(self, partitions: list[str] | None) -> np.ndarray | None:
+        """
+        Sorted rows of the named partitions (unknown names select nothing);
+        None for all rows when ``partitions`` is None.
+        """
+        if partitions is None:
+            return None
+        if self.partition_key is None:
+            raise ValueError(f"{self.path} is not partitioned")
+        ranges = sorted(self.partitions[name] for name in set(partitions) if name in self.partitions)
+        if not ranges:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, end) for start, end in ranges])
+
+    def scores(self, query_vector, rows: np.ndarray | None = None) -> np.ndarray:
+        """Cosine similarity of the query to every chunk, or to the chunks in ``rows``"""
+        if rows is None:
+            return cosine_scores(self.vectors, self.norms, query_vector)
+        if not len(rows):
+            return np.empty(0, dtype=np.float32)
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        if len(breaks) < 64:
+            # A few contiguous runs (whole partitions): scan each as a slice
+            return np.concatenate([
+                cosine_scores(self.vectors[run[0]:run[-1] + 1], self.norms[run[0]:run[-1] + 1], query_vector)
+                for run in np.split(rows, breaks)
+            ])
+        if len(rows) > self.count // 2:
+            # Scattered but most rows: one full scan beats gathering them
+            return cosine_scores(self.vectors, self.norms, query_vector)[rows]
+        return cosine_scores(self.vectors[rows], self.norms[rows], query_vector)
+
+    def search(
+        self,
+        query_vector,
+        k: int,
+        metadata_filter: str | None = None,
+        filepath_globpattern: str | None = None,
+        partitions: list[str] | None = None,
+        filters: StructuredFilter | None = None,
+    ) -> list[dict]:
+        """
+        Top-``k`` chunks as ``{"text", "metadata", "dist"}``, nearest first,
+        searching only the given ``partitions`` when there are any and only
+        the rows that pass the structured ``filters``
+        """
+        if not self.count:
+            return []
+        rows = self.candidate_rows(partitions, filters)
+        return rank(
+            self.scores(query_vector, rows),
+            k,
+            self.record if rows is None else lambda i: self.record(rows[i]),
+            metadata_matcher(metadata_filter, filepath_globpattern),
+        )
+
+    def partition_counts(self) -> dict[str, int]:
+        """Chunks per partition"""
+        return {name: end - start for name, (start, end) in self.partitions.items()}
+
+
+def cosine_scores(vectors: np.ndarray, norms: np.ndarray, query_vector) -> np.ndarray:
+    """Cosine similarity of ``query_vector`` to each row of ``vectors`` (with L2 ``norms``)"""
+    query = np.asarray(query_vector, dtype=np.float32)
+    query_norm = float(np.linalg.norm(query)) or 1.0
+    return (vectors @ query) / (np.where(norms > 0, norms, 1.0) * query_norm)
+
+
+def rank(scores: np.ndarray, k: int, record_at, matches=None) -> list[dict]:
+    """
+    The ``k`` best-scoring records that pass ``matches``, as ``/v1/retrieve``
+    results. ``record_at(i)`` decodes row ``i``; rows scored ``-inf`` are
+    excluded (deleted chunks).
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    if matches is None:
+        order = np.argpartition(-scores, k - 1)[:k]
+        order = order[np.argsort(-scores[order], kind="stable")]
+    else:
+        order = np.argsort(-scores, kind="stable")
+
+    results = []
+    for i in order:
+        if scores[i] == -np.inf:
+            break
+        record = record_at(i)
+        if matches is not None and not matches(record["metadata"]):
+            continue
+        results.append({"text": record["text"], "metadata": record["metadata"], "dist": float(1 - scores[i])})
+        if len(results) == k:
+            break
+    return results
+
+
+def metadata_matcher(metadata_filter: str | None, filepath_globpattern: str | None):
+    """
+    Predicate over metadata equivalent to the DocumentStore's filters: a
+    JMESPath ``metadata_filter`` and a glob on ``path``. None when unfiltered.
+    """
+    if not metadata_filter and not filepath_globpattern:
+        return None
+
+    expression = None
+    if metadata_filter:
+        import jmespath
+
+        # Same quoting rules as the DocumentStore's filter merging
+        metadata_filter = metadata_filter.replace("'", r"\'").replace("`", "'").replace('"', "")
+        expression = jmespath.compile(metadata_filter)
+
+    def matches(metadata: dict) -> bool:
+        if filepath_globpattern and not fnmatch.fnmatch(str(metadata.get("path", "")), filepath_globpattern):
+            return False
+        return expression is None or bool(expression.search(metadata))
+
+    return matches
+
+
+class SnapshotRecorder:
+    """
+    Live copy of the DocumentStore's chunks and their index vectors, fed by a
+    ``pw.io.subscribe`` callback and written to ``path`` every ``interval``
+    seconds when something changed since the last snapshot. Changes are also
+    appended to ``delta_log`` (a ``DeltaLogWriter``), which starts a new
+    generation with every snapshot and retires the older ones once that
+    snapshot is published: a snapshot plus its log is the current index.
+
+    Chunks are grouped into partitions by their ``partition_key`` metadata
+    value. The chunks of a dropped partition (initially ``dropped``) are kept
+    aside, out of snapshots and the delta log, until it is restored.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        embedder: dict,
+        interval: float = 300.0,
+        delta_log=None,
+        partition_key: str = "category",
+        dropped: tuple[str, ...] = (),
+    ):
+        self.path = path
+        self.embedder = embedder
+        self.interval = interval
+        self.delta_log = delta_log
+        self.partition_key = partition_key
+        self.exports = 0
+        self.last_manifest: dict | None = None
+        self._rows: dict[str, tuple] = {}
+        self._parked: dict[str, dict[str, tuple]] = {name: {} for name in dropped}  # dropped partition -> rows
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def on_change(self, key, row: dict, time: int, is_addition: bool):
+        """``pw.io.subscribe`` callback for a table with text, metadata and vector columns"""
+        chunk_id = str(key)
+        metadata = getattr(row["metadata"], "value", row["metadata"])
+        with self._lock:
+            parked = self._parked.get(partition_of(metadata, self.partition_key))
+            rows = self._rows if parked is None else parked
+            delta_log = self.delta_log if parked is None else None
+            if is_addition:
+                vector = np.asarray(row["vector"], dtype=np.float32)
+                rows[chunk_id] = (row["text"], metadata, vector)
+                if delta_log is not None:
+                    delta_log.append_upsert(chunk_id, row["text"], metadata, vector)
+            else:
+                if rows.get(chunk_id, (None, None))[:2] == (row["text"], metadata):
+                    # An update may deliver the new row before the retraction of the old one
+                    del rows[chunk_id]
+                if delta_log is not None:
+                    delta_log.append_delete(chunk_id, row["text"], metadata)
+            if parked is None:
+                self._dirty = True
+
+    def drop_partition(self, name: str) -> int:
+        """Take a partition out of the published index; returns the number of chunks removed"""
+        with self._lock:
+            if name in self._parked:
+                return 0
+            parked = self._parked[name] = {
+                chunk_id: row for chunk_id, row in self._rows.items()
+                if partition_of(row[1], self.partition_key) == name
+            }
+            for chunk_id, (text, metadata, _) in parked.items():
+                del self._rows[chunk_id]
+                if self.delta_log is not None:
+                    self.delta_log.append_delete(chunk_id, text, metadata)
+            self._publish_change()
+        logger.info(
+            "Index partition %r dropped (%d chunks)", name, len(parked),
+            extra={"event": "partition_dropped", "partition": name, "chunks": len(parked)},
+        )
+        return len(parked)
+
+    def restore_partition(self, name: str) -> int:
+        """Put a dropped partition back; returns the number of chunks restored"""
+        with self._lock:
+            parked = self._parked.pop(name, {})
+            self._rows.update(parked)
+            if self.delta_log is not None:
+                for chunk_id, (text, metadata, vector) in parked.items():
+                    self.delta_log.append_upsert(chunk_id, text, metadata, vector)
+            self._publish_change()
+        logger.info(
+            "Index partition %r restored (%d chunks)", name, len(parked),
+            extra={"event": "partition_restored", "partition": name, "chunks": len(parked)},
+        )
+        return len(parked)
+
+    def _publish_change(self):
+        """Flush a change made outside a pathway batch; call with the lock held"""
+        self._dirty = True
+        if self.delta_log is not None:
+            self.delta_log.flush()
+
+    def partitions(self) -> dict:
+        """Chunks per partition, published and dropped"""
+        with self._lock:
+            published = Counter(partition_of(metadata, self.partition_key) for _, metadata, _ in self._rows.values())
+            return {
+                "partition_key": self.partition_key,
+                "partitions": dict(sorted(published.items())),
+                "dropped": {name: len(rows) for name, rows in sorted(self._parked.items())},
+            }
+
+    def on_time_end(self, time: int):
+        """``pw.io.subscribe`` callback: make the changes of a finished batch visible to replicas"""
+        if self.delta_log is not None:
+            with self._lock:
+                self.delta_log.flush()
+
+    def export(self) -> dict | None:
+        """Write a snapshot of the current chunks; None when there is nothing to write"""
+        with self._lock:
+            rows = sorted(self._rows.items(), key=lambda item: partition_of(item[1][1], self.partition_key))
+            self._dirty = False
+            position = self.delta_log.rotate() if self.delta_log is not None and rows else None
+        if not rows:
+            return None
+
+        dimensions = len(rows[0][1][2])
+        start = time.perf_counter()
+        manifest = write_snapshot(
+            self.path,
+            ((chunk_id, text, metadata, vector) for chunk_id, (text, metadata, vector) in rows),
+            dimensions,
+            self.embedder,
+            delta_log=position,
+            partition_key=self.partition_key,
+        )
+        if position is not None:
+            # Replicas loading the new manifest read the new generation from now on
+            with self._lock:
+                self.delta_log.retire(position["id"])
+        self.exports += 1
+        self.last_manifest = manifest
+        logger.info(
+            "Index snapshot: %d chunks written to %s", manifest["count"], self.path,
+            extra={
+                "event": "snapshot_exported",
+                "chunks": manifest["count"],
+                "ms": round((time.perf_counter() - start) * 1000, 1),
+            },
+        )
+        return manifest
+
+    def start(self):
+        """Start the periodic export thread"""
+        self._thread = threading.Thread(target=self._run, name="index-snapshot", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self._dirty:
+                continue
+            try:
+                self.export()
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                logger.exception("Index snapshot failed: %s", e, extra={"event": "snapshot_export_failed"})
+
+
+def query_encoder(embedder: dict):
+    """
+    Function embedding one query string the way the snapshot's vectors were
+    embedded, as recorded in its manifest.
+    """
+    if embedder.get("backend") == "hashing":
+        from embedders import HashingNgramEncoder
+
+        encoder = HashingNgramEncoder(embedder["dimensions"], embedder["ngrams"])
+        return lambda text: encoder.encode([text])[0]
+
+    import requests
+
+    session = requests.Session()
+    cache = get_query_cache()
+
+    def encode(text: str) -> np.ndarray:
+        vector = cache.get(embedder["model"], text) if cache is not None else None
+        if vector is not None:
+            return vector
+        start = time.perf_counter()
+        with get_scheduler().slot("interactive"):
+            response = session.post(
+                f"{Config.OLLAMA_HOST}/api/embed",
+                json={"model": embedder["model"], "input": text},
+                timeout=30,
+            )
+        response.raise_for_status()
+        vector = np.asarray(response.json()["embeddings"][0], dtype=np.float32)
+        if cache is not None:
+            vector = cache.put(embedder["model"], text, vector, time.perf_counter() - start)
+        return vector
+
+    return encode
+
+
+class SnapshotRequestHandler(JSONRequestHandler):
+    """
+    ``/v1/retrieve``, ``/v1/snapshot_info``, ``/v1/partitions`` and
+    ``/v1/embedding_cache_metrics`` over a loaded snapshot (or any index with
+    the same ``search()``, ``partition_counts()``, ``manifest`` and
+    ``path``). Subclasses add endpoints by extending ``routes``. A missing
+    field is a 400 and a busy model server a 503.
+    """
+
+    snapshot: IndexSnapshot
+    encode = None  # query string -> vector, see query_encoder()
+    logger = logger
+    failure_event = "snapshot_request_failed"
+    routes = {
+        "/v1/retrieve": "retrieve",
+        "/v1/snapshot_info": "snapshot_info",
+        "/v1/partitions": "partitions",
+        "/v1/embedding_cache_metrics": "embedding_cache_metrics",
+    }
+
+    def error_status(self, error: Exception) -> tuple[int, str]:
+        if isinstance(error, SchedulerRejected):
+            return 503, f"Model server busy: {error}"
+        if isinstance(error, KeyError):
+            return 400, f"Missing field {error}"
+        return super().error_status(error)
+
+    def retrieve(self, payload: dict) -> list[dict]:
+        return self.snapshot.search(
+            self.encode(payload["query"]),
+            int(payload.get("k", Config.TOP_K)),
+            metadata_filter=payload.get("metadata_filter"),
+            filepath_globpattern=payload.get("filepath_globpattern"),
+            partitions=routing_partitions(payload),
+            filters=structured_filter(payload.get("filters")),
+        )
+
+    def snapshot_info(self, payload: dict) -> dict:
+        return dict(self.snapshot.manifest, path=self.snapshot.path)
+
+    def partitions(self, payload: dict) -> dict:
+        return {"partition_key": self.snapshot.partition_key, "partitions": self.snapshot.partition_counts()}
+
+    def embedding_cache_metrics(self, payload: dict) -> dict:
+        if self.snapshot.manifest.get("embedder", {}).get("backend") == "hashing":
+            raise ValueError("The query embedding cache is not in use with the hashing embedder")
+        cache = get_query_cache()
+        if cache is None:
+            raise ValueError("The query embedding cache is disabled (QUERY_EMBEDDING_CACHE_SIZE)")
+        return dict(cache.snapshot(), pid=os.getpid())
+
+
+def structured_filter(filters) -> StructuredFilter | None:
+    """The request's structured ``filters`` object, None when absent"""
+    if filters is None:
+        return None
+    if isinstance(filters, str):
+        raise ValueError("filters must be a JSON object; use metadata_filter for JMESPath expressions")
+    return StructuredFilter(filters)
+
+
+def routing_partitions(payload: dict) -> list[str] | None:
+    """The request's ``partitions`` routing filter (a name or a list of names), None for all"""
+    partitions = payload.get("partitions")
+    if partitions is None:
+        return None
+    if isinstance(partitions, str):
+        return [partitions]
+    if not isinstance(partitions, list) or not all(isinstance(name, str) for name in partitions):
+        raise ValueError("partitions must be a partition name or a list of names")
+    return partitions
+
+
+def serve_snapshot(path: str, host: str, port: int):
+    """Serve retrieval from a memory-mapped snapshot until interrupted"""
+    start = time.perf_counter()
+    snapshot = IndexSnapshot(path)
+    handler = type("Handler", (SnapshotRequestHandler,), {
+        "snapshot": snapshot,
+        "encode": staticmethod(query_encoder(snapshot.manifest["embedder"])),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+
+    print("\n" + "="*70)
+    print(" INDEX SNAPSHOT SERVER")
+    print("="*70)
+    print(f"Snapshot: {path} ({snapshot.count} chunks, {snapshot.dimensions} dims)")
+    print(f"Loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(f"Server: http://{host}:{port}/v1/retrieve")
+    print("="*70)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nSnapshot server stopped")
+    finally:
+        server.server_close()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Inspect or serve an index snapshot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    info_parser = subparsers.add_parser("info", help="print the snapshot manifest")
+    info_parser.add_argument("path")
+    serve_parser = subparsers.add_parser("serve", help="serve /v1/retrieve from a snapshot")
+    serve_parser.add_argument("path")
+    serve_parser.add_argument("--host", default=Config.HOST)
+    serve_parser.add_argument("--port", type=int, default=Config.PORT)
+    args = parser.parse_args()
+
+    if args.command == "info":
+        snapshot = IndexSnapshot(args.path)
+        print(json.dumps(snapshot.manifest, indent=2))
+    else:
+        serve_snapshot(args.path, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,47 @@ Interactive Terminal Query Interface for Live News RAG
 Tests the RAG pipeline with conversational queries in the terminal
 """
 
-import requests
+import argparse
 import json
 from datetime import datetime
-import sys
+
+from document_listing import DocumentCache
+from lazy_imports import lazy_import
+
+requests = lazy_import("requests")
 
 
 class NewsRAGTester:
     """Interactive tester for the Live News RAG pipeline"""
     
-    def __init__(self, base_url: str = "http://0.0.0.0:8000"):
+    def __init__(self, base_url: str = "http://0.0.0.0:8000", pool_size: int = 10, docs_cache: str | None = None):
         self.base_url = base_url
         self.answer_endpoint = f"{base_url}/v1/pw_ai_answer"
         self.retrieve_endpoint = f"{base_url}/v1/retrieve"
         self.list_docs_endpoint = f"{base_url}/v1/pw_list_documents"
+        self.list_docs_page_endpoint = f"{base_url}/v1/pw_list_documents_page"
+        self.pool_size = pool_size
+        self._session = None
+        self.doc_cache = DocumentCache(docs_cache)
+    
+    @property
+    def session(self):
+        """Shared keep-alive session, created on first use"""
+        if self._session is None:
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=self.pool_size,
+            )
+            self._session = requests.Session()
+            self._session.headers["Content-Type"] = "application/json"
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
         
     def check_server_health(self) -> bool:
         """Check if the RAG server is running"""
         try:
-            response = requests.get(f"{self.base_url}/", timeout=2)
+            response = self.session.get(f"{self.base_url}/", timeout=2)
             return response.status_code in [200, 404]  # 404 is ok, means server is up
         except requests.exceptions.RequestException:
             return False
@@ -31,10 +53,9 @@ class NewsRAGTester:
         try:
             # Try both 'query' and 'prompt' parameters
             payload = {"prompt": question}  # Changed from "query" to "prompt"
-            response = requests.post(
+            response = self.session.post(
                 self.answer_endpoint,
                 json=payload,
-                headers={"Content-Type": "application/json"},
                 timeout=180  # Increased timeout for LLM processing
             )
             response.raise_for_status()
@@ -47,10 +68,9 @@ class NewsRAGTester:
         """Retrieve relevant context chunks without LLM answer"""
         try:
             payload = {"query": question, "k": k}
-            response = requests.post(
+            response = self.session.post(
                 self.retrieve_endpoint,
                 json=payload,
-                headers={"Content-Type": "application/json"},
                 timeout=30
             )
             response.raise_for_status()
@@ -62,10 +82,9 @@ class NewsRAGTester:
     def list_documents(self) -> list | None:
         """List all documents in the knowledge base"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.list_docs_endpoint,
                 json={},
-                headers={"Content-Type": "application/json"},
                 timeout=60
             )
             response.raise_for_status()
@@ -75,6 +94,29 @@ class NewsRAGTester:
             print(f"\n Error listing documents: {e}")
             return None
     
+    def list_documents_page(self, cursor: str | None = None, limit: int = 100, **filters) -> dict | None:
+        """Fetch one page of document metadata (no chunk text) after ``cursor``"""
+        try:
+            payload = {"limit": limit, "cursor": cursor, **filters}
+            response = self.session.post(
+                self.list_docs_page_endpoint,
+                json=payload,
+                timeout=30
+            )
+            response.raise_for_status()
+            page = response.json()
+            if "error" in page:
+                print(f"\n Error listing documents: {page['error']}")
+                return None
+            return page
+        except requests.exceptions.RequestException as e:
+            print(f"\n Error listing documents: {e}")
+            return None
+    
+    def sync_documents(self) -> int:
+        """Bring the local document cache up to date, returning the number of new documents"""
+        return self.doc_cache.sync(self.list_documents_page)
+    
     def print_response(self, response_data: dict | None):
         """Pretty print the RAG response"""
         if not response_data:
@@ -155,7 +197,7 @@ class NewsRAGTester:
         print("Commands:")
         print("  - Type your question to query the RAG system")
         print("  - Type 'context: <question>' to see retrieved context only")
-        print("  - Type 'docs' to list all indexed documents")
+        print("  - Type 'docs' to list indexed documents ('docs refresh' to re-download)")
         print("  - Type 'quit' or 'exit' to stop")
         print("\n" + "="*70)
         
@@ -174,14 +216,15 @@ class NewsRAGTester:
                     break
                 
                 # Handle list documents command
-                if user_input.lower() == 'docs':
-                    print("\n Fetching document list...")
-                    docs = self.list_documents()
+                if user_input.lower() in ('docs', 'docs refresh'):
+                    if user_input.lower() == 'docs refresh':
+                        self.doc_cache.reset()
+                    print("\n Syncing document list...")
+                    new_docs = self.sync_documents()
                     
-                    if docs and isinstance(docs, list):
-                        print(f"\nTotal documents indexed: {len(docs)}")
-                        for i, doc in enumerate(docs[:10], 1):  # Show first 10
-                            metadata = doc.get("metadata", {})
+                    if self.doc_cache.documents:
+                        print(f"\nTotal documents indexed: {len(self.doc_cache.documents)} ({new_docs} new)")
+                        for i, metadata in enumerate(self.doc_cache.latest(10), 1):  # Show latest 10
                             print(f"\n{i}. {metadata.get('title', 'Untitled')}")
                             print(f"   Source: {metadata.get('source', 'Unknown')}")
                             print(f"   Published: {metadata.get('published_at', 'N/A')}")
@@ -263,16 +306,45 @@ class NewsRAGTester:
 
 def main():
     """Main entry point"""
-    # Parse command line arguments
-    if len(sys.argv) > 1:
-        base_url = sys.argv[1]
-    else:
-        base_url = "http://0.0.0.0:8000"
+    parser = argparse.ArgumentParser(description="Query and test the Live News RAG server")
+    parser.add_argument("base_url", nargs="?", default="http://0.0.0.0:8000")
+    parser.add_argument("--batch", action="store_true", help="run the built-in batch questions")
+    parser.add_argument("--load", metavar="QUESTIONS_FILE",
+                        help="run a concurrent load test with questions from a file (one per line)")
+    parser.add_argument("--endpoint", choices=["retrieve", "answer", "both"], default="both",
+                        help="endpoint(s) to drive in load mode")
+    parser.add_argument("--qps", type=float, help="open-loop request rate (default: closed loop)")
+    parser.add_argument("--concurrency", type=int, default=8, help="max in-flight requests")
+    parser.add_argument("--duration", type=float, default=60.0, help="load test duration in seconds")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--output", default="load_test_results.json", help="load test JSON report path")
+    parser.add_argument("--docs-cache", metavar="PATH",
+                        help="keep the synced document list in this file between runs (default: memory only)")
+    args = parser.parse_args()
+    
+    if args.load:
+        from load_driver import LoadDriver, load_questions, print_load_report, save_load_report
+        
+        tester = NewsRAGTester(args.base_url, pool_size=args.concurrency)
+        endpoints = ("retrieve", "answer") if args.endpoint == "both" else (args.endpoint,)
+        driver = LoadDriver(
+            tester,
+            load_questions(args.load),
+            endpoints=endpoints,
+            concurrency=args.concurrency,
+            qps=args.qps,
+            duration=args.duration,
+            max_requests=args.requests,
+        )
+        report = driver.run()
+        print_load_report(report)
+        save_load_report(report, args.output)
+        return
     
-    tester = NewsRAGTester(base_url)
+    tester = NewsRAGTester(args.base_url, docs_cache=args.docs_cache)
     
     # Check if batch mode
-    if "--batch" in sys.argv:
+    if args.batch:
         # Example batch questions
         test_questions = [
             "What are the latest developments in AI?",
@@ -0,0 +1,57 @@
+"""
+JSON POST endpoints on ``http.server``
+
+The base request handler of the snapshot server, the query replicas and the
+admin port: every request is a POST with a JSON payload (``{}`` when empty)
+and every response is JSON, ``{"error": ...}`` when the request fails.
+"""
+
+import json
+import logging
+from http.server import BaseHTTPRequestHandler
+
+
+class JSONRequestHandler(BaseHTTPRequestHandler):
+    """
+    Dispatches POSTs through ``routes``, which maps a path to the name of a
+    method taking the JSON payload and returning the JSON response. Failures
+    are answered with the status ``error_status`` gives them; unexpected ones
+    are logged to ``logger`` as ``failure_event`` and answered with a 500.
+    """
+
+    routes: dict = {}
+    logger = logging.getLogger("news_rag.http")
+    failure_event = "request_failed"
+
+    def do_POST(self):
+        method = self.routes.get(self.path)
+        if method is None:
+            self._reply(404, {"error": f"Unknown route {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = getattr(self, method)(json.loads(self.rfile.read(length) or b"{}"))
+        except Exception as e:
+            status, message = self.error_status(e)
+            if status >= 500:
+                self.logger.exception("Request to %s failed: %s", self.path, e, extra={"event": self.failure_event})
+            self._reply(status, {"error": message})
+            return
+        self._reply(200, body)
+
+    def error_status(self, error: Exception) -> tuple[int, str]:
+        """HTTP status and message of a failed request; invalid payloads (ValueError) are a 400"""
+        if isinstance(error, ValueError):
+            return 400, str(error)
+        return 500, str(error)
+
+    def _reply(self, status: int, body):
+        data = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        self.logger.debug(format, *args)
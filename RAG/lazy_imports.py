@@ -0,0 +1,28 @@
+"""
+Deferred module loading for the command line tools.
+
+``lazy_import("requests")`` returns a module object whose code only runs on
+first attribute access, so a CLI that exits early (``--help``, bad arguments,
+server down) never pays for the import.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return ``name`` as a lazily executed module"""
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,196 @@
+"""
+Admission control and priority scheduling for model server calls
+
+Every call to the Ollama server (answer generations and embeddings, in the
+pipeline and in the query replicas) takes a slot from one ``CallScheduler``
+first. Calls belong to a priority class:
+
+- ``interactive``: user queries (answers, query embeddings)
+- ``ingestion``: embedding new chunks
+- ``evaluation``: answers requested by the evaluation tools
+
+At most ``max_concurrency`` calls run at once, and each class also has its
+own concurrency limit. A call that cannot start waits in its class's bounded
+FIFO queue; when a slot frees, the highest-priority class with a waiter and
+room under its limit goes next. A call that finds its queue full is rejected
+at once with ``SchedulerRejected`` instead of piling up behind the server.
+
+Slots are taken with ``with scheduler.slot(priority):`` from threads or
+``async with scheduler.aslot(priority):`` from coroutines. ``snapshot()``
+reports per-class load, rejections and queue-wait times.
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+
+from config import Config
+
+PRIORITIES = ("interactive", "ingestion", "evaluation")  # highest first
+
+
+class SchedulerRejected(RuntimeError):
+    """The call's priority class has a full queue"""
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued", "wake", "granted")
+
+    def __init__(self, priority: str, wake):
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.wake = wake
+        self.granted = False
+
+
+class CallScheduler:
+    """Thread-safe slot allocator shared by sync and asyncio callers"""
+
+    def __init__(self, max_concurrency: int, limits: dict[str, int], queue_sizes: dict[str, int], window: int = 1000):
+        self.max_concurrency = max_concurrency
+        self.limits = {priority: limits.get(priority, max_concurrency) for priority in PRIORITIES}
+        self.queue_sizes = {priority: queue_sizes.get(priority, 0) for priority in PRIORITIES}
+        self.counters = {priority: Counter() for priority in PRIORITIES}
+        self._running = Counter()
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        self._waits = {priority: deque(maxlen=window) for priority in PRIORITIES}
+        self._lock = threading.Lock()
+
+    def _enter(self, priority: str, wake) -> _Waiter | None:
+        """Take a slot now (returns None) or queue a waiter that ``wake()`` will be called for"""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class: {priority!r} (expected one of {', '.join(PRIORITIES)})")
+        with self._lock:
+            queue = self._queues[priority]
+            if not queue and self._has_room(priority):
+                self._start(priority, 0.0)
+                return None
+            if len(queue) >= self.queue_sizes[priority]:
+                self.counters[priority]["rejected"] += 1
+                raise SchedulerRejected(f"{priority} queue is full ({self.queue_sizes[priority]} waiting)")
+            waiter = _Waiter(priority, wake)
+            queue.append(waiter)
+            return waiter
+
+    def _has_room(self, priority: str) -> bool:
+        return sum(self._running.values()) < self.max_concurrency and self._running[priority] < self.limits[priority]
+
+    def _start(self, priority: str, waited: float):
+        self._running[priority] += 1
+        self.counters[priority]["admitted"] += 1
+        self._waits[priority].append(waited)
+
+    def _dispatch(self):
+        """Hand free slots to queued waiters, highest priority first; call with the lock held"""
+        now = time.monotonic()
+        while True:
+            for priority in PRIORITIES:
+                queue = self._queues[priority]
+                if queue and self._has_room(priority):
+                    waiter = queue.popleft()
+                    waiter.granted = True
+                    self._start(priority, now - waiter.enqueued)
+                    waiter.wake()
+                    break
+            else:
+                return
+
+    def _exit(self, priority: str):
+        with self._lock:
+            self._running[priority] -= 1
+            self.counters[priority]["completed"] += 1
+            self._dispatch()
+
+    def _abandon(self, waiter: _Waiter):
+        """Withdraw a waiter whose caller gave up; frees its slot if one was already granted"""
+        with self._lock:
+            if waiter.granted:
+                self._running[waiter.priority] -= 1
+                self._dispatch()
+            else:
+                self._queues[waiter.priority].remove(waiter)
+            self.counters[waiter.priority]["abandoned"] += 1
+
+    @contextmanager
+    def slot(self, priority: str):
+        """Hold a call slot of class ``priority`` (blocks the thread while queued)"""
+        granted = threading.Event()
+        if self._enter(priority, granted.set) is not None:
+            granted.wait()
+        try:
+            yield
+        finally:
+            self._exit(priority)
+
+    @asynccontextmanager
+    async def aslot(self, priority: str):
+        """Hold a call slot of class ``priority`` (suspends the coroutine while queued)"""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self._enter(priority, wake)
+        if waiter is not None:
+            try:
+                await granted
+            except asyncio.CancelledError:
+                self._abandon(waiter)
+                raise
+        try:
+            yield
+        finally:
+            self._exit(priority)
+
+    def snapshot(self) -> dict:
+        """Per-class limits, load, totals and queue-wait statistics (seconds)"""
+        with self._lock:
+            classes = {}
+            for priority in PRIORITIES:
+                waits = sorted(self._waits[priority])
+                classes[priority] = {
+                    "limit": self.limits[priority],
+                    "queue_size": self.queue_sizes[priority],
+                    "running": self._running[priority],
+                    "queued": len(self._queues[priority]),
+                    **{key: self.counters[priority][key] for key in ("admitted", "completed", "rejected", "abandoned")},
+                    "queue_wait": {
+                        "mean": round(sum(waits) / len(waits), 4) if waits else None,
+                        "p50": round(waits[len(waits) // 2], 4) if waits else None,
+                        "p95": round(waits[int(len(waits) * 0.95)], 4) if waits else None,
+                        "max": round(waits[-1], 4) if waits else None,
+                    },
+                }
+            return {
+                "max_concurrency": self.max_concurrency,
+                "running": sum(self._running.values()),
+                "classes": classes,
+            }
+
+
+_scheduler: CallScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> CallScheduler:
+    """The process-wide scheduler, configured from ``Config`` on first use"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = CallScheduler(
+                Config.MODEL_MAX_CONCURRENCY,
+                limits={
+                    "interactive": Config.INTERACTIVE_CONCURRENCY,
+                    "ingestion": Config.INGESTION_CONCURRENCY,
+                    "evaluation": Config.EVALUATION_CONCURRENCY,
+                },
+                queue_sizes={
+                    "interactive": Config.INTERACTIVE_QUEUE_SIZE,
+                    "ingestion": Config.INGESTION_QUEUE_SIZE,
+                    "evaluation": Config.EVALUATION_QUEUE_SIZE,
+                },
+            )
+        return _scheduler
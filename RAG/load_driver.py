@@ -0,0 +1,264 @@
+"""
+Concurrent load driver for the Live News RAG endpoints
+Drives /v1/retrieve and /v1/pw_ai_answer from a question file over one
+pooled HTTP session and reports latency percentiles, throughput and errors
+"""
+
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (~2.5% relative error per bucket)"""
+
+    GROWTH = 1.05
+    MIN_MS = 0.1
+
+    def __init__(self):
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    def _bucket(self, latency_ms: float) -> int:
+        if latency_ms <= self.MIN_MS:
+            return 0
+        return int(math.log(latency_ms / self.MIN_MS, self.GROWTH)) + 1
+
+    def _upper_bound(self, bucket: int) -> float:
+        return self.MIN_MS * self.GROWTH ** bucket
+
+    def record(self, latency_ms: float):
+        """Add one latency sample"""
+        bucket = self._bucket(latency_ms)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.min_ms = min(self.min_ms, latency_ms)
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, p: float) -> float | None:
+        """Latency (ms) below which ``p`` percent of samples fall"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self._upper_bound(bucket), self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        """Summary statistics plus raw buckets for comparing runs"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "min_ms": round(self.min_ms, 2) if self.count else None,
+            "max_ms": round(self.max_ms, 2) if self.count else None,
+            "p50_ms": _round(self.percentile(50)),
+            "p90_ms": _round(self.percentile(90)),
+            "p99_ms": _round(self.percentile(99)),
+            "buckets": {
+                f"{self._upper_bound(b):.2f}": n for b, n in sorted(self.buckets.items())
+            },
+        }
+
+
+def _round(value: float | None) -> float | None:
+    return round(value, 2) if value is not None else None
+
+
+def load_questions(path: str) -> list[str]:
+    """Read one question per line, skipping blank lines and '#' comments"""
+    with open(path) as f:
+        questions = [
+            line.strip() for line in f
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+    if not questions:
+        raise ValueError(f"No questions found in {path}")
+    return questions
+
+
+class LoadDriver:
+    """
+    Drives the RAG endpoints with concurrent requests:
+    - open loop: requests are issued at a fixed QPS regardless of completions,
+      latency is measured from the scheduled send time (no coordinated omission)
+    - closed loop: ``concurrency`` workers each send back-to-back requests
+    """
+
+    ENDPOINTS = ("retrieve", "answer")
+
+    def __init__(
+        self,
+        tester,
+        questions: list[str],
+        endpoints: tuple[str, ...] = ENDPOINTS,
+        concurrency: int = 8,
+        qps: float | None = None,
+        duration: float = 60.0,
+        max_requests: int | None = None,
+        k: int = 5,
+        timeout: float = 180.0,
+    ):
+        self.tester = tester
+        self.questions = questions
+        self.endpoints = endpoints
+        self.concurrency = concurrency
+        self.qps = qps
+        self.duration = duration
+        self.max_requests = max_requests
+        self.k = k
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._histograms = {name: LatencyHistogram() for name in endpoints}
+        self._errors = {name: {} for name in endpoints}
+        self._issued = 0
+
+    def _request(self, endpoint: str, question: str):
+        """Send one request, raising on any non-2xx response"""
+        if endpoint == "retrieve":
+            url, payload = self.tester.retrieve_endpoint, {"query": question, "k": self.k}
+        else:
+            url, payload = self.tester.answer_endpoint, {"prompt": question}
+
+        response = self.tester.session.post(url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+    def _fire(self, endpoint: str, question: str, scheduled: float):
+        """Run one request and record its outcome"""
+        error = None
+        try:
+            self._request(endpoint, question)
+        except Exception as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            error = f"HTTP {status}" if status else type(e).__name__
+
+        latency_ms = (time.perf_counter() - scheduled) * 1000
+        with self._lock:
+            if error:
+                errors = self._errors[endpoint]
+                errors[error] = errors.get(error, 0) + 1
+            else:
+                self._histograms[endpoint].record(latency_ms)
+
+    def _next_request(self) -> tuple[str, str] | None:
+        """Pick the next (endpoint, question), or None when the request budget is spent"""
+        with self._lock:
+            if self.max_requests is not None and self._issued >= self.max_requests:
+                return None
+            endpoint = self.endpoints[self._issued % len(self.endpoints)]
+            self._issued += 1
+        return endpoint, random.choice(self.questions)
+
+    def _run_open_loop(self, deadline: float):
+        interval = 1.0 / self.qps
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            scheduled = time.perf_counter()
+            while scheduled < deadline:
+                request = self._next_request()
+                if request is None:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._fire, *request, scheduled)
+                scheduled += interval
+
+    def _run_closed_loop(self, deadline: float):
+        def worker():
+            while time.perf_counter() < deadline:
+                request = self._next_request()
+                if request is None:
+                    return
+                self._fire(*request, time.perf_counter())
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for _ in range(self.concurrency):
+                executor.submit(worker)
+
+    def run(self) -> dict:
+        """Run the load test and return the report"""
+        # Create the pooled session (and finish any lazy imports) before the
+        # worker threads race for it
+        self.tester.session
+
+        started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        deadline = start + self.duration
+
+        if self.qps:
+            self._run_open_loop(deadline)
+        else:
+            self._run_closed_loop(deadline)
+
+        elapsed = time.perf_counter() - start
+        return self._build_report(started_at, elapsed)
+
+    def _build_report(self, started_at: str, elapsed: float) -> dict:
+        report = {
+            "started_at": started_at,
+            "base_url": self.tester.base_url,
+            "mode": f"open-loop {self.qps} qps" if self.qps else f"closed-loop x{self.concurrency}",
+            "concurrency": self.concurrency,
+            "qps_target": self.qps,
+            "duration_s": round(elapsed, 2),
+            "questions": len(self.questions),
+            "endpoints": {},
+        }
+
+        for name in self.endpoints:
+            histogram = self._histograms[name]
+            errors = self._errors[name]
+            error_count = sum(errors.values())
+            total = histogram.count + error_count
+            report["endpoints"][name] = {
+                "requests": total,
+                "ok": histogram.count,
+                "errors": errors,
+                "error_rate": round(error_count / total, 4) if total else 0.0,
+                "throughput_rps": round(histogram.count / elapsed, 2) if elapsed else 0.0,
+                "latency": histogram.to_dict(),
+            }
+
+        return report
+
+
+def print_load_report(report: dict):
+    """Pretty print a load test report"""
+    print("\n" + "="*70)
+    print(" LOAD TEST RESULTS")
+    print("="*70)
+    print(f"Target:   {report['base_url']}")
+    print(f"Mode:     {report['mode']}")
+    print(f"Duration: {report['duration_s']}s")
+
+    for name, stats in report["endpoints"].items():
+        latency = stats["latency"]
+        print(f"\n /{name}")
+        print("-"*70)
+        print(f"  Requests:   {stats['requests']} ({stats['ok']} ok)")
+        print(f"  Throughput: {stats['throughput_rps']:.2f} req/s")
+        print(f"  Error rate: {stats['error_rate']:.2%} {stats['errors'] or ''}")
+        if latency["count"]:
+            print(f"  Latency:    p50 {latency['p50_ms']:.1f} ms | "
+                  f"p90 {latency['p90_ms']:.1f} ms | p99 {latency['p99_ms']:.1f} ms | "
+                  f"max {latency['max_ms']:.1f} ms")
+
+    print("\n" + "="*70)
+
+
+def save_load_report(report: dict, path: str):
+    """Dump the report as JSON"""
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nLoad test results saved to {path}")
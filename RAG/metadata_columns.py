@@ -0,0 +1,239 @@
+"""
+Columnar copies of the filterable chunk metadata, and structured filters
+
+Filtering chunks by parsing each one's metadata costs a JSON decode per
+candidate, so selective filters either return too few results or need a
+much larger k. ``FilterColumns`` keeps the fields retrieval filters on as
+compact arrays, one entry per index row:
+
+- ``source``: uint32 codes into a dictionary of source names
+- ``published_at``: int64 epoch seconds (``MISSING_TIME`` when unparseable)
+- ``sentiment``: uint8 label code (``SENTIMENT_LABELS``, ``UNKNOWN_LABEL``)
+- ``sentiment_score``: float32 (NaN when unknown)
+
+A ``StructuredFilter`` (the ``filters`` object of a retrieve request)
+evaluates to a boolean mask over those arrays, so the index can drop rows
+before scoring them instead of after ranking. The pipeline's own index
+filters with JMESPath instead: ``StructuredFilter.to_jmespath`` is the same
+filter over the normalized fields ``filter_fields`` adds to each chunk's
+metadata.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+SENTIMENT_LABELS = ("negative", "neutral", "positive")
+UNKNOWN_LABEL = 255
+MISSING_TIME = np.iinfo(np.int64).min
+
+COLUMN_DTYPES = {
+    "source": "<u4",
+    "published_at": "<i8",
+    "sentiment": "u1",
+    "sentiment_score": "<f4",
+}
+
+
+def parse_published_at(value) -> int:
+    """Epoch seconds of an ISO-8601 timestamp (naive ones are UTC), ``MISSING_TIME`` if unparseable"""
+    if not value:
+        return MISSING_TIME
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return MISSING_TIME
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def parse_sentiment(value) -> tuple[int, float]:
+    """Label code and score of the pipeline's ``"<label>_<score>"`` sentiment string"""
+    label, _, score = str(value or "").rpartition("_")
+    try:
+        code = SENTIMENT_LABELS.index(label)
+        return code, float(score)
+    except ValueError:
+        return UNKNOWN_LABEL, float("nan")
+
+
+def filter_fields(published_at, sentiment) -> dict:
+    """
+    The filterable fields in the form JMESPath can compare: ``published_ts``
+    (epoch seconds), ``sentiment_label`` and ``sentiment_score``, None when
+    unknown
+    """
+    seconds = parse_published_at(published_at)
+    code, score = parse_sentiment(sentiment)
+    return {
+        "published_ts": None if seconds == MISSING_TIME else seconds,
+        "sentiment_label": None if code == UNKNOWN_LABEL else SENTIMENT_LABELS[code],
+        "sentiment_score": None if code == UNKNOWN_LABEL else score,
+    }
+
+
+class FilterColumns:
+    """The filterable fields of ``len(self)`` rows, plus the source dictionary"""
+
+    def __init__(self, arrays: dict[str, np.ndarray], sources: list[str]):
+        self.arrays = arrays
+        self.sources = sources
+        self.source_codes = {name: code for code, name in enumerate(sources)}
+
+    def __len__(self) -> int:
+        return len(self.arrays["source"])
+
+    @classmethod
+    def from_metadata(cls, metadatas) -> "FilterColumns":
+        builder = ColumnBuilder()
+        for metadata in metadatas:
+            builder.add(metadata)
+        return builder.build()
+
+
+class ColumnBuilder:
+    """Accumulates rows one metadata dict at a time"""
+
+    def __init__(self):
+        self.sources: list[str] = []
+        self._source_codes: dict[str, int] = {}
+        self._values = {name: [] for name in COLUMN_DTYPES}
+
+    def add(self, metadata: dict):
+        source = str(metadata.get("source") or "")
+        code = self._source_codes.get(source)
+        if code is None:
+            code = self._source_codes[source] = len(self.sources)
+            self.sources.append(source)
+        label, score = parse_sentiment(metadata.get("sentiment"))
+        self._values["source"].append(code)
+        self._values["published_at"].append(parse_published_at(metadata.get("published_at")))
+        self._values["sentiment"].append(label)
+        self._values["sentiment_score"].append(score)
+
+    def build(self) -> FilterColumns:
+        arrays = {name: np.asarray(values, dtype=COLUMN_DTYPES[name]) for name, values in self._values.items()}
+        return FilterColumns(arrays, self.sources)
+
+
+def _names(value, field: str) -> list[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+        return value
+    raise ValueError(f"filters.{field} must be a string or a list of strings")
+
+
+class StructuredFilter:
+    """
+    Conjunction of metadata predicates, from a JSON object with any of:
+
+    - ``source``: a source name or a list of names
+    - ``published_after`` / ``published_before``: ISO-8601 bounds,
+      inclusive and exclusive (rows without a parseable date never match)
+    - ``sentiment``: a label or a list of labels (``positive`` ...)
+    - ``min_sentiment_score`` / ``max_sentiment_score``: inclusive bounds
+    """
+
+    FIELDS = ("source", "published_after", "published_before", "sentiment", "min_sentiment_score", "max_sentiment_score")
+
+    def __init__(self, filters: dict):
+        if not isinstance(filters, dict):
+            raise ValueError("filters must be a JSON object")
+        unknown = set(filters) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))} (supported: {', '.join(self.FIELDS)})")
+
+        self.sources = _names(filters["source"], "source") if filters.get("source") is not None else None
+        self.after = self._time(filters, "published_after")
+        self.before = self._time(filters, "published_before")
+        self.labels = None
+        if filters.get("sentiment") is not None:
+            labels = _names(filters["sentiment"], "sentiment")
+            if not set(labels) <= set(SENTIMENT_LABELS):
+                raise ValueError(f"filters.sentiment must be among {', '.join(SENTIMENT_LABELS)}")
+            self.labels = [SENTIMENT_LABELS.index(label) for label in labels]
+        self.min_score = self._number(filters, "min_sentiment_score")
+        self.max_score = self._number(filters, "max_sentiment_score")
+
+    def to_jmespath(self) -> str | None:
+        """
+        The filter as a ``metadata_filter`` in request syntax (backticks for
+        string literals) over ``filter_fields``; None when it has no predicates
+        """
+        def text(value: str) -> str:
+            if "`" in value or '"' in value:
+                raise ValueError(f"filters: names with backticks or double quotes are not supported: {value!r}")
+            return f"`{value}`"
+
+        # Backticks become raw string literals, so numbers go through
+        # to_number. The expression must be a boolean: comparing null (an
+        # unknown field) gives null, so numeric clauses check the type first,
+        # and false (an empty list of names) is a comparison.
+        def compare(field: str, operator: str, value) -> str:
+            return f"type({field}) == `number` && {field} {operator} to_number(`{value!r}`)"
+
+        false = "`0` == `1`"
+        clauses = []
+        if self.sources is not None:
+            clauses.append(" || ".join(f"source == {text(name)}" for name in self.sources) or false)
+        if self.after is not None:
+            clauses.append(compare("published_ts", ">=", self.after))
+        if self.before is not None:
+            clauses.append(compare("published_ts", "<", self.before))
+        if self.labels is not None:
+            clauses.append(" || ".join(f"sentiment_label == {text(SENTIMENT_LABELS[code])}" for code in self.labels) or false)
+        if self.min_score is not None:
+            clauses.append(compare("sentiment_score", ">=", self.min_score))
+        if self.max_score is not None:
+            clauses.append(compare("sentiment_score", "<=", self.max_score))
+        if not clauses:
+            return None
+        return " && ".join(f"({clause})" for clause in clauses)
+
+    @staticmethod
+    def _time(filters: dict, field: str) -> int | None:
+        if filters.get(field) is None:
+            return None
+        seconds = parse_published_at(filters[field])
+        if seconds == MISSING_TIME:
+            raise ValueError(f"filters.{field} is not an ISO-8601 timestamp: {filters[field]!r}")
+        return seconds
+
+    @staticmethod
+    def _number(filters: dict, field: str) -> float | None:
+        value = filters.get(field)
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"filters.{field} must be a number")
+        return float(value)
+
+    def mask(self, columns: FilterColumns, rows: np.ndarray | None = None) -> np.ndarray:
+        """Boolean mask of the matching rows among ``rows`` (all rows when None)"""
+        def column(name: str) -> np.ndarray:
+            values = columns.arrays[name]
+            return values if rows is None else values[rows]
+
+        mask = np.ones(len(columns) if rows is None else len(rows), dtype=bool)
+        if self.sources is not None:
+            codes = [columns.source_codes[name] for name in self.sources if name in columns.source_codes]
+            mask &= np.isin(column("source"), codes)
+        if self.after is not None or self.before is not None:
+            published = column("published_at")
+            mask &= published != MISSING_TIME
+            if self.after is not None:
+                mask &= published >= self.after
+            if self.before is not None:
+                mask &= published < self.before
+        if self.labels is not None:
+            mask &= np.isin(column("sentiment"), self.labels)
+        if self.min_score is not None or self.max_score is not None:
+            scores = column("sentiment_score")
+            # NaN (unknown) fails both comparisons
+            if self.min_score is not None:
+                mask &= scores >= self.min_score
+            if self.max_score is not None:
+                mask &= scores <= self.max_score
+        return mask
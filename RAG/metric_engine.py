@@ -0,0 +1,227 @@
+"""
+Batch metric engine for the Hybrid Confidence Evaluator
+Scores many (query, answer, sources) triples at once: each source is
+tokenized once into a shared vocabulary of token ids, and the overlap
+metrics are computed for the whole batch with NumPy set operations.
+Scores are identical to the per-response scorers in
+``HybridConfidenceEvaluator``.
+"""
+
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from grounding import factual_grounding_score
+from lazy_imports import lazy_import
+from text_processing import tokenize
+
+np = lazy_import("numpy")
+
+NEWSAPI_TIMESTAMP = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})Z', re.ASCII)
+
+PUBLISHED_AT_FORMATS = (
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S.%fZ",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+@lru_cache(maxsize=4096)
+def parse_published_at(value: str) -> datetime | None:
+    """
+    Parse a source's ``published_at`` into a naive datetime, or None when it
+    cannot be compared with ``datetime.now()`` (unparseable or tz-aware).
+    """
+    # Fast path for the NewsAPI format, which is nearly every source
+    if match := NEWSAPI_TIMESTAMP.fullmatch(value):
+        try:
+            return datetime(*map(int, match.groups()))
+        except ValueError:
+            pass
+
+    for fmt in PUBLISHED_AT_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is None else None
+
+
+def _published_at_us(value) -> int | None:
+    """``published_at`` as microseconds since the epoch (naive), or None (also when it is not a string)"""
+    return _parse_published_at_us(value) if isinstance(value, str) else None
+
+
+@lru_cache(maxsize=4096)
+def _parse_published_at_us(value: str) -> int | None:
+    parsed = parse_published_at(value)
+    return None if parsed is None else (parsed - EPOCH) // MICROSECOND
+
+
+class MetricEngine:
+    """
+    Scores source relevance, recency, factual grounding and contextual
+    enrichment for batches of responses.
+
+    Token ids are assigned from one vocabulary shared by all batches, and a
+    source's token-id array and grounding word runs are cached by its content,
+    so sources retrieved for several queries are tokenized once.
+    """
+
+    def __init__(self, max_cached_sources: int = 10_000):
+        self.vocab: dict[str, int] = {}
+        self.max_cached_sources = max_cached_sources
+        self._source_ids: dict[tuple[str, str], "np.ndarray"] = {}
+        self._source_runs: dict[str, list[list[str]]] = {}
+
+    def _token_ids(self, *texts: str) -> "np.ndarray":
+        """Unique ids of the 4+ character words of ``texts``"""
+        vocab = self.vocab
+        ids = {vocab.setdefault(word, len(vocab)) for text in texts for word in tokenize(text).long_token_set}
+        return np.fromiter(ids, dtype=np.int64, count=len(ids))
+
+    def _source_token_ids(self, source: dict) -> "np.ndarray":
+        text = source.get("text", "") or ""
+        title = (source.get("metadata", {}) or {}).get("title", "") or ""
+        key = (text, title)
+        ids = self._source_ids.get(key)
+        if ids is None:
+            if len(self._source_ids) >= self.max_cached_sources:
+                self._source_ids.clear()
+            ids = self._source_ids[key] = self._token_ids(text, title)
+        return ids
+
+    def score_batch(self, items: list[tuple[str, str, list[dict]]], now: datetime | None = None) -> list[dict]:
+        """Score (query, answer, sources) triples, returning one metric dict per triple"""
+        now = now or datetime.now()
+        query_ids = [self._token_ids(query) for query, _, _ in items]
+        answer_ids = [self._token_ids(answer) if answer else None for _, answer, _ in items]
+        source_ids = [[self._source_token_ids(s) for s in sources] for _, _, sources in items]
+
+        relevance = self._source_relevance(query_ids, source_ids)
+        enrichment = self._enrichment(answer_ids, source_ids)
+        recency = self._recency([sources for _, _, sources in items], now)
+        if len(self._source_runs) >= self.max_cached_sources:
+            self._source_runs.clear()
+
+        return [
+            {
+                "source_relevance": relevance[i],
+                "recency": recency[i],
+                "factual_grounding": factual_grounding_score(answer, sources, self._source_runs),
+                "contextual_enrichment": enrichment[i],
+            }
+            for i, (_, answer, sources) in enumerate(items)
+        ]
+
+    def _source_relevance(self, query_ids: list, source_ids: list[list]) -> list[float]:
+        """Per item: mean over sources of min(2 * |query words in source| / |query words|, 1)"""
+        vocab_size = max(len(self.vocab), 1)
+        owners = [(i, j) for i, ids in enumerate(source_ids) for j in range(len(ids))]
+
+        results = [0.0 if not ids else 0.5 for ids in source_ids]
+        if not owners:
+            return results
+
+        # Key every token by its batch item so one isin() covers the whole batch
+        query_keys = np.concatenate([ids + i * vocab_size for i, ids in enumerate(query_ids)])
+        flat = [source_ids[i][j] for i, j in owners]
+        lengths = np.array([len(ids) for ids in flat])
+        source_of_token = np.repeat(np.arange(len(flat)), lengths)
+        item_of_token = np.repeat(np.array([i for i, _ in owners]), lengths)
+        token_keys = np.concatenate(flat) + item_of_token * vocab_size
+
+        overlap = np.bincount(
+            source_of_token,
+            weights=np.isin(token_keys, query_keys),
+            minlength=len(flat),
+        )
+        query_len = np.array([len(query_ids[i]) for i, _ in owners], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.minimum(overlap / query_len * 2, 1.0).tolist()
+
+        start = 0
+        for i, ids in enumerate(source_ids):
+            if ids and len(query_ids[i]):
+                results[i] = sum(scores[start:start + len(ids)]) / len(ids)
+            start += len(ids)
+        return results
+
+    def _enrichment(self, answer_ids: list, source_ids: list[list]) -> list[float]:
+        """Per item: score of the share of answer words not found in any source"""
+        vocab_size = max(len(self.vocab), 1)
+        results = [0.0] * len(answer_ids)
+        active = []
+        for i, (answer, sources) in enumerate(zip(answer_ids, source_ids)):
+            if answer is None or not sources or not len(answer):
+                continue
+            if not any(len(ids) for ids in sources):
+                results[i] = 0.5
+                continue
+            active.append(i)
+
+        if not active:
+            return results
+
+        # Duplicates are fine: isin() sorts its second argument anyway
+        source_keys = np.concatenate([
+            np.concatenate(source_ids[i]) + i * vocab_size for i in active
+        ])
+        answer_lengths = np.array([len(answer_ids[i]) for i in active])
+        item_of_token = np.repeat(np.arange(len(active)), answer_lengths)
+        answer_keys = np.concatenate([answer_ids[i] + i * vocab_size for i in active])
+
+        known = np.bincount(
+            item_of_token,
+            weights=np.isin(answer_keys, source_keys),
+            minlength=len(active),
+        )
+        ratio = (answer_lengths - known) / answer_lengths
+        scores = np.where(
+            (ratio >= 0.15) & (ratio <= 0.5),
+            1.0,
+            np.where(
+                ratio < 0.15,
+                np.maximum(ratio / 0.15, 0.3),
+                np.maximum(0.5, 1.0 - (ratio - 0.5)),
+            ),
+        ).tolist()
+
+        for i, score in zip(active, scores):
+            results[i] = score
+        return results
+
+    def _recency(self, batch_sources: list[list[dict]], now: datetime) -> list[float]:
+        """Per item: mean age-bucket score of its sources (0.3 when undated)"""
+        now_us = (now - EPOCH) // MICROSECOND
+        published = [
+            [_published_at_us((s.get("metadata", {}) or {}).get("published_at", "") or "") for s in sources]
+            for sources in batch_sources
+        ]
+        dated = [us for item in published for us in item if us is not None]
+
+        bucket_scores = iter(())
+        if dated:
+            hours_old = (now_us - np.array(dated, dtype=np.int64)) / 1e6 / 3600
+            bucket_scores = iter(np.select(
+                [hours_old <= 24, hours_old <= 48, hours_old <= 72, hours_old <= 168],
+                [1.0, 0.8, 0.6, 0.4],
+                0.2,
+            ).tolist())
+
+        results = []
+        for item in published:
+            if not item:
+                results.append(0.0)
+                continue
+            scores = [0.3 if us is None else next(bucket_scores) for us in item]
+            results.append(sum(scores) / len(scores))
+        return results
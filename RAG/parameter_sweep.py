@@ -0,0 +1,205 @@
+"""
+Chunking / retrieval parameter sweep for the Live News RAG pipeline
+
+Replays a fixed article corpus through the pipeline's own ``chunk_text`` and
+sentiment UDFs and a brute-force cosine index (what ``BruteForceKnnFactory``
+builds) for every combination of CHUNK_SIZE, CHUNK_OVERLAP and TOP_K. The
+corpus is embedded with the deterministic hashing embedder backend, so the
+sweep runs offline and two runs over the same inputs are comparable.
+
+For each configuration it reports index size, ingestion time, retrieval
+latency, prompt tokens (the exact prompt ``BaseRAGQuestionAnswerer`` would
+send) and the retrieval-side evaluator scores. Answer-side scores need an
+LLM and are not part of the sweep.
+
+Usage:
+    python parameter_sweep.py articles.jsonl queries.jsonl
+    python parameter_sweep.py articles.jsonl queries.jsonl \\
+        --chunk-sizes 500 1000 1500 --overlaps 0 200 --top-k 3 5 8 --output sweep.json
+
+Corpus lines are NewsAPI-style articles (url, title, description, content,
+source, author, published_at). Query lines follow the bulk evaluation format
+(``query``, optional ``id``) and may name the article that answers them in
+``expected_url`` to get a hit rate.
+"""
+
+import argparse
+import itertools
+import json
+import re
+import time
+
+import numpy as np
+from pathway.xpacks.llm import prompts
+from pathway.xpacks.llm.question_answering import SimpleContextProcessor
+
+from bulk_evaluation import load_query_set, percentile
+from confidence_score_evaluator import HybridConfidenceEvaluator
+from config import Config, valid_chunk_overlap
+from embedders import HashingNgramEncoder
+from pipeline import analyze_sentiment, chunk_text
+
+# Rough BPE-style token count: words and individual punctuation marks
+PROMPT_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+def load_articles(path: str) -> list[dict]:
+    """Read a JSONL article corpus"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def build_index(articles: list[dict], embedder: HashingNgramEncoder, chunk_size: int, overlap: int) -> dict:
+    """Chunk and embed the corpus the way build_news_analyst_pipeline does"""
+    start = time.perf_counter()
+    docs = []
+    for article in articles:
+        title = article.get("title", "") or ""
+        description = article.get("description", "") or ""
+        full_text = f"Title: {title}\n\nDescription: {description}\n\nContent: {article.get('content', '') or ''}"
+        sentiment = analyze_sentiment.func(f"{title} {description}")
+        for text in chunk_text.func(full_text, chunk_size, overlap):
+            docs.append({
+                "text": text,
+                "metadata": {
+                    "path": article.get("url", ""),
+                    "title": title,
+                    "source": article.get("source", ""),
+                    "author": article.get("author", ""),
+                    "published_at": article.get("published_at", ""),
+                    "sentiment": sentiment,
+                    "text": text,
+                },
+            })
+
+    vectors = embedder.encode([doc["text"] for doc in docs])
+    ingest_ms = (time.perf_counter() - start) * 1000
+
+    text_bytes = sum(len(json.dumps(doc["metadata"]).encode("utf-8")) for doc in docs)
+    return {
+        "docs": docs,
+        "vectors": vectors,
+        "ingest_ms": ingest_ms,
+        "index_bytes": vectors.nbytes + text_bytes,
+    }
+
+
+def retrieve(index: dict, embedder: HashingNgramEncoder, query: str, k: int) -> list[dict]:
+    """Top-k documents by cosine similarity, as ``/v1/retrieve`` returns them"""
+    scores = index["vectors"] @ embedder.encode([query])[0]
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [dict(index["docs"][i], dist=float(1 - scores[i])) for i in top]
+
+
+def prompt_tokens(query: str, docs: list[dict]) -> int:
+    """Tokens of the RAG prompt built from ``docs`` with the pipeline's defaults"""
+    context = SimpleContextProcessor().docs_to_context(docs)
+    return len(PROMPT_TOKEN_PATTERN.findall(prompts.prompt_qa.func(context, query)))
+
+
+def run_sweep(
+    articles: list[dict],
+    queries: list[dict],
+    chunk_sizes: list[int],
+    overlaps: list[int],
+    top_ks: list[int],
+    dimensions: int = Config.HASHING_DIMENSIONS,
+    ngrams: int = Config.HASHING_NGRAMS,
+) -> list[dict]:
+    """Evaluate every valid (chunk_size, overlap, top_k) combination"""
+    evaluator = HybridConfidenceEvaluator(verbose=False)
+    embedder = HashingNgramEncoder(dimensions, ngrams)
+    # Warm the word hash cache so the first configuration's ingest time is not inflated
+    embedder.encode([q["query"] for q in queries])
+    embedder.encode([" ".join(str(v) for v in article.values()) for article in articles])
+    rows = []
+
+    for chunk_size, overlap in itertools.product(chunk_sizes, overlaps):
+        if not valid_chunk_overlap(chunk_size, overlap):
+            print(f"Skipping chunk size {chunk_size} with overlap {overlap}: "
+                  f"the overlap must be >= 0 and smaller than half the chunk size")
+            continue
+        index = build_index(articles, embedder, chunk_size, overlap)
+
+        for k in top_ks:
+            latencies, tokens, relevance, recency, hits = [], [], [], [], []
+            for item in queries:
+                start = time.perf_counter()
+                docs = retrieve(index, embedder, item["query"], k)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+                tokens.append(prompt_tokens(item["query"], docs))
+                relevance.append(evaluator._evaluate_source_relevance(item["query"], docs))
+                recency.append(evaluator._evaluate_recency(docs))
+                if item.get("expected_url"):
+                    hits.append(any(d["metadata"]["path"] == item["expected_url"] for d in docs))
+
+            rows.append({
+                "chunk_size": chunk_size,
+                "overlap": overlap,
+                "top_k": k,
+                "chunks": len(index["docs"]),
+                "index_mb": round(index["index_bytes"] / 2**20, 2),
+                "ingest_ms": round(index["ingest_ms"], 1),
+                "retrieve_p50_ms": round(percentile(latencies, 50), 3),
+                "retrieve_p95_ms": round(percentile(latencies, 95), 3),
+                "prompt_tokens": round(sum(tokens) / len(tokens), 1),
+                "source_relevance": round(sum(relevance) / len(relevance), 3),
+                "recency": round(sum(recency) / len(recency), 3),
+                "hit_rate": round(sum(hits) / len(hits), 3) if hits else None,
+            })
+    return rows
+
+
+def print_sweep(rows: list[dict]):
+    """Pretty print the sweep results side by side"""
+    columns = [
+        ("chunk_size", "size"), ("overlap", "overlap"), ("top_k", "k"), ("chunks", "chunks"),
+        ("index_mb", "index MB"), ("ingest_ms", "ingest ms"), ("retrieve_p50_ms", "p50 ms"),
+        ("retrieve_p95_ms", "p95 ms"), ("prompt_tokens", "tokens"),
+        ("source_relevance", "relevance"), ("recency", "recency"), ("hit_rate", "hit rate"),
+    ]
+    print("\n" + "="*120)
+    print(" PARAMETER SWEEP")
+    print("="*120)
+    print("".join(f"{label:>10}" for _, label in columns))
+    print("-"*120)
+    for row in rows:
+        print("".join(f"{'-' if row[key] is None else row[key]:>10}" for key, _ in columns))
+    print("="*120 + "\n")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Sweep chunking and retrieval parameters offline")
+    parser.add_argument("corpus", help="JSONL file of articles")
+    parser.add_argument("queries", help="JSONL query set")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[500, Config.CHUNK_SIZE, 1500])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, Config.CHUNK_OVERLAP])
+    parser.add_argument("--top-k", type=int, nargs="+", default=[3, Config.TOP_K, 8])
+    parser.add_argument("--dimensions", type=int, default=Config.HASHING_DIMENSIONS, help="hashing embedder width")
+    parser.add_argument("--ngrams", type=int, default=Config.HASHING_NGRAMS, help="hashing embedder n-gram order")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    rows = run_sweep(
+        load_articles(args.corpus),
+        load_query_set(args.queries),
+        sorted(set(args.chunk_sizes)),
+        sorted(set(args.overlaps)),
+        sorted(set(args.top_k)),
+        dimensions=args.dimensions,
+        ngrams=args.ngrams,
+    )
+    print_sweep(rows)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1323 @@
+"""
+Live News RAG pipeline: NewsAPI ingestion, sentiment, chunking and serving.
+
+Importing this module loads pathway and the LLM xpacks; use ``main.py`` as the
+entry point so configuration is validated before that cost is paid.
+"""
+
+import pathway as pw
+from pathway.xpacks.llm.llms import LiteLLMChat, prompt_chat_single_qa
+from pathway.xpacks.llm.document_store import DocumentStore
+from pathway.xpacks.llm.servers import QARestServer
+from pathway.xpacks.llm.question_answering import BaseRAGQuestionAnswerer
+from pathway.stdlib.indexing import BruteForceKnnFactory
+from pathway.stdlib.indexing.nearest_neighbors import BruteForceKnn
+import requests
+from collections import Counter
+from datetime import datetime
+from dataclasses import dataclass, fields
+from typing import Any, List
+import logging
+import time
+
+from admin_server import start_admin_server
+from article_summaries import summary_prompt, wants_summaries
+from config import Config
+from delta_log import DeltaLogWriter
+from document_listing import DEFAULT_PAGE_LIMIT, paginate_documents
+from embedders import build_embedder, embedder_spec
+from embedding_cache import EmbeddingCache
+from index_snapshot import SnapshotRecorder
+from llm_scheduler import SchedulerRejected, get_scheduler
+from metadata_columns import StructuredFilter, filter_fields
+from shadow_evaluation import ANSWER_ROUTES, ShadowEvaluator
+from sentiment_analytics import DIMENSIONS, SentimentAnalytics, sentiment_label, sentiment_polarity, window_start
+from single_flight import SingleFlight, flight_key
+from structured_logging import logging_stats, recent_events
+from text_processing import normalize_prompt, tokenize
+
+# indexed_chunks and SplitEmbedderKnnFactory rely on BruteForceKnn internals of this release
+TESTED_PATHWAY_VERSION = "0.33"
+
+logger = logging.getLogger("news_rag.connector")
+
+
+class SentimentAnalyzer:
+    """Sentiment analysis UDF"""
+    
+    POSITIVE_WORDS = {
+        'good', 'great', 'excellent', 'positive', 'success', 'win', 'gain',
+        'profit', 'growth', 'increase', 'rise', 'surge', 'boost', 'benefit',
+        'improve', 'advance', 'progress', 'achieve', 'breakthrough', 'innovation',
+        'opportunity', 'optimistic', 'strong', 'robust', 'recover', 'bullish',
+        'soar', 'climb', 'expand', 'victory', 'outstanding', 'remarkable'
+    }
+    
+    NEGATIVE_WORDS = {
+        'bad', 'poor', 'negative', 'fail', 'loss', 'decline', 'drop', 'fall',
+        'decrease', 'plunge', 'crash', 'crisis', 'concern', 'worry', 'risk',
+        'threat', 'danger', 'problem', 'issue', 'challenge', 'struggle', 'weak',
+        'bearish', 'cut', 'slash', 'reduce', 'downgrade', 'collapse', 'plummet',
+        'warning', 'fear', 'terrible', 'worst', 'disappointing', 'critical'
+    }
+    
+    INTENSIFIERS = {'very', 'extremely', 'highly', 'absolutely', 'completely', 'incredibly'}
+    NEGATIONS = {'not', 'no', 'never', 'neither', 'nobody', 'nothing', "n't", 'nor'}
+    
+    @staticmethod
+    def analyze(text: str) -> tuple[str, float]:
+        """Analyze sentiment of text"""
+        if not text or not isinstance(text, str):
+            return 'neutral', 0.5
+        
+        words = tokenize(text).tokens
+        if not words:
+            return 'neutral', 0.5
+        
+        positive_score = 0
+        negative_score = 0
+        
+        for i, word in enumerate(words):
+            negated = any(
+                words[max(0, i-3):i].count(neg) > 0 
+                for neg in SentimentAnalyzer.NEGATIONS
+            )
+            
+            intensified = any(
+                words[max(0, i-2):i].count(intens) > 0
+                for intens in SentimentAnalyzer.INTENSIFIERS
+            )
+            
+            multiplier = 1.5 if intensified else 1.0
+            
+            if word in SentimentAnalyzer.POSITIVE_WORDS:
+                if negated:
+                    negative_score += multiplier
+                else:
+                    positive_score += multiplier
+                    
+            elif word in SentimentAnalyzer.NEGATIVE_WORDS:
+                if negated:
+                    positive_score += multiplier
+                else:
+                    negative_score += multiplier
+        
+        total_score = positive_score + negative_score
+        
+        if total_score == 0:
+            return 'neutral', 0.5
+        
+        sentiment_ratio = positive_score / total_score
+        
+        if sentiment_ratio > 0.6:
+            sentiment = 'positive'
+            confidence = min(sentiment_ratio, 0.95)
+        elif sentiment_ratio < 0.4:
+            sentiment = 'negative'
+            confidence = min(1 - sentiment_ratio, 0.95)
+        else:
+            sentiment = 'neutral'
+            confidence = 0.5 + abs(0.5 - sentiment_ratio)
+        
+        return sentiment, round(confidence, 3)
+
+
+@pw.udf
+def analyze_sentiment(text: str) -> str:
+    """Pathway UDF for sentiment analysis"""
+    label, score = SentimentAnalyzer.analyze(text)
+    return f"{label}_{score:.2f}"
+
+
+@pw.udf
+def chunk_text(text: str, chunk_size: int, overlap: int) -> list[str]:
+    """Split text into overlapping chunks"""
+    if not text:
+        return []
+    
+    tokenized = tokenize(text)
+    chunks = []
+    start = 0
+    text_length = len(text)
+    
+    while start < text_length:
+        end = start + chunk_size
+        
+        if end < text_length:
+            # Break after the last sentence end in the second half of the chunk
+            boundary = tokenized.last_sentence_end(start + chunk_size // 2, end - 1)
+            if boundary is not None:
+                end = boundary + 1
+        
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        
+        start = end - overlap if end < text_length else text_length
+    
+    return chunks
+
+
+@pw.udf
+def get_current_timestamp(_: str) -> str:
+    """Returns current timestamp"""
+    return datetime.now().isoformat()
+
+
+class NewsAPIConnector(pw.io.python.ConnectorSubject):
+    """
+    Custom Pathway connector that polls NewsAPI. Each poll's new articles are
+    staged and emitted together, then committed explicitly (read it with
+    ``autocommit_duration_ms=None``), so downstream chunking, embedding and
+    indexing run once per poll. Polls with more than ``max_commit_articles``
+    new articles are committed in batches of that size.
+    """
+    
+    # Empty commits between polls keep the engine's time advancing
+    IDLE_COMMIT_SECONDS = 1.0
+    
+    def __init__(
+        self,
+        api_key: str,
+        category: str = "technology",
+        country: str = "us",
+        query: str = "",
+        poll_interval: int = 300,
+        max_commit_articles: int = 256,
+    ):
+        super().__init__()
+        self.api_key = api_key
+        self.category = category
+        # Several feeds may be polled in turn: "business,technology"
+        self.categories = [c.strip() for c in category.split(",") if c.strip()] or ["general"]
+        self.country = country
+        self.query = query
+        self.poll_interval = poll_interval
+        self.max_commit_articles = max_commit_articles
+        self.seen_urls = set()
+        self.base_url = "https://newsapi.org/v2/top-headlines"
+        self.first_run = True
+        
+    def run(self):
+        """Main polling loop"""
+        logger.info(
+            "Starting NewsAPI connector (category %s, country %s)", self.category, self.country,
+            extra={"event": "connector_start", "category": self.category, "country": self.country},
+        )
+        
+        while True:
+            staged = []
+            # In query mode NewsAPI searches across categories and countries
+            for category in self.categories if not self.query else [""]:
+                try:
+                    staged.extend(self._poll(category))
+                except Exception as e:
+                    # Traceback is rendered on the logging thread, not here
+                    logger.exception("Connector error: %s", e, extra={"event": "connector_error"})
+            self._emit(staged)
+            self.first_run = False
+            
+            logger.info("Sleeping %ds", self.poll_interval, extra={"event": "poll_sleep"})
+            self._idle(self.poll_interval)
+    
+    def _poll(self, category: str) -> list[dict[str, str]]:
+        """Fetch one feed and stage its unseen articles as rows"""
+        articles = self._fetch_articles(category)
+        
+        if self.first_run:
+            logger.info(
+                "Initial fetch: %d articles from API", len(articles),
+                extra={"event": "initial_fetch", "articles": len(articles), "category": category},
+            )
+        
+        new_articles = self._filter_new_articles(articles)
+        
+        if not new_articles:
+            logger.info("No new articles", extra={"event": "poll_empty", "category": category})
+            return []
+        
+        logger.info(
+            "Processing %d new articles", len(new_articles),
+            extra={"event": "poll_new_articles", "articles": len(new_articles), "category": category},
+        )
+        
+        rows = []
+        for i, article in enumerate(new_articles, 1):
+            url = article.get("url") or f"article_{int(time.time())}_{i}"
+            title = article.get("title") or "Untitled"
+            description = article.get("description") or ""
+            content = article.get("content") or description or ""
+            author = article.get("author") or "Unknown"
+            published_at = article.get("publishedAt") or datetime.now().isoformat()
+            source_name = article.get("source", {}).get("name") or "Unknown"
+            
+            rows.append(dict(
+                url=url,
+                title=title,
+                description=description,
+                content=content,
+                author=author,
+                published_at=published_at,
+                source=source_name,
+                category=category,
+                country="" if self.query else self.country,
+            ))
+        return rows
+    
+    def _emit(self, rows: list[dict[str, str]]):
+        """Emit one poll's staged rows, committing every ``max_commit_articles`` rows and at the end"""
+        if not rows:
+            return
+        batch_size = self.max_commit_articles or len(rows)
+        for start in range(0, len(rows), batch_size):
+            for row in rows[start:start + batch_size]:
+                logger.info(
+                    "Emitting: %s", row["title"][:50],
+                    extra={"event": "article_emitted", "url": row["url"], "source": row["source"]},
+                )
+                self.next(**row)
+            self.commit()
+        logger.info(
+            "Committed %d articles", len(rows),
+            extra={"event": "poll_committed", "articles": len(rows), "commits": -(-len(rows) // batch_size)},
+        )
+    
+    def _idle(self, seconds: float):
+        """
+        Sleep between polls, committing (empty) once a second: without the
+        autocommit timer, the engine's time only advances on commits, and
+        queries would wait for the next poll
+        """
+        deadline = time.monotonic() + seconds
+        while (remaining := deadline - time.monotonic()) > 0:
+            time.sleep(min(self.IDLE_COMMIT_SECONDS, remaining))
+            self.commit()
+    
+    def _fetch_articles(self, category: str) -> list[dict[str, Any]]:
+        """Fetch articles of one category from NewsAPI"""
+        params = {
+            "apiKey": self.api_key,
+            "pageSize": 100,
+        }
+        
+        if self.query:
+            params["q"] = self.query
+        else:
+            params["category"] = category
+            params["country"] = self.country
+        
+        try:
+            response = requests.get(self.base_url, params=params, timeout=10)
+            response.raise_for_status()
+            
+            data = response.json()
+            
+            if data.get("status") != "ok":
+                logger.warning(
+                    "NewsAPI error: %s", data.get("message"),
+                    extra={"event": "newsapi_error", "code": data.get("code")},
+                )
+                return []
+            
+            return data.get("articles", [])
+            
+        except Exception as e:
+            logger.warning("NewsAPI request failed: %s", e, extra={"event": "newsapi_request_failed"})
+            return []
+    
+    def _filter_new_articles(self, articles: list[dict]) -> list[dict]:
+        """Filter out seen articles"""
+        new_articles = []
+        for article in articles:
+            url = article.get("url", "")
+            if url and url not in self.seen_urls:
+                self.seen_urls.add(url)
+                new_articles.append(article)
+        return new_articles
+
+
+class NewsArticleSchema(pw.Schema):
+    """Schema for news articles"""
+    url: str
+    title: str
+    description: str
+    content: str
+    author: str
+    published_at: str
+    source: str
+    category: str
+    country: str
+
+
+class DocumentPageQuerySchema(pw.Schema):
+    """Schema for paginated document listing requests"""
+    limit: int = pw.column_definition(default_value=DEFAULT_PAGE_LIMIT)
+    cursor: str | None = pw.column_definition(default_value=None)
+    changed_since: str | None = pw.column_definition(default_value=None)
+    source: str | None = pw.column_definition(default_value=None)
+    published_after: str | None = pw.column_definition(default_value=None)
+    published_before: str | None = pw.column_definition(default_value=None)
+    include_text: bool = pw.column_definition(default_value=False)
+
+
+class ShadowMetricsQuerySchema(pw.Schema):
+    """Schema for shadow evaluation metrics requests (no parameters)"""
+
+
+class PrioritySchema(pw.Schema):
+    """Scheduling class of an answer request (evaluation tools send "evaluation")"""
+    priority: str = pw.column_definition(default_value="interactive")
+
+
+class FiltersSchema(pw.Schema):
+    """
+    Request filters: a JMESPath metadata filter (request syntax) or a
+    structured filter object (``metadata_columns.StructuredFilter``)
+    """
+    filters: pw.Json | None = pw.column_definition(default_value=None)
+
+
+class AnswerModeSchema(pw.Schema):
+    """Grounding of an answer: "chunks", "summaries" or "auto" (summaries for broad questions)"""
+    answer_mode: str = pw.column_definition(default_value="auto")
+
+
+class IndexPartitionsQuerySchema(pw.Schema):
+    """Schema for published index partition requests: list, or drop/restore one"""
+    drop: str | None = pw.column_definition(default_value=None)
+    restore: str | None = pw.column_definition(default_value=None)
+
+
+class SchedulerMetricsQuerySchema(pw.Schema):
+    """Schema for model call scheduler metrics requests (no parameters)"""
+
+
+class EmbeddingCacheMetricsQuerySchema(pw.Schema):
+    """Schema for query embedding cache metrics requests (no parameters)"""
+
+
+class CoalescingMetricsQuerySchema(pw.Schema):
+    """Schema for answer coalescing metrics requests (no parameters)"""
+
+
+class SentimentAnalyticsQuerySchema(pw.Schema):
+    """Schema for sentiment analytics requests: group by source, category or window"""
+    group_by: str = pw.column_definition(default_value="source")
+    since: str | None = pw.column_definition(default_value=None)
+    limit: int = pw.column_definition(default_value=100)
+
+
+class RecentLogsQuerySchema(pw.Schema):
+    """Schema for recent log event requests"""
+    limit: int = pw.column_definition(default_value=100)
+
+
+@pw.udf
+def format_document_page(
+    metadatas: list[pw.Json] | None,
+    limit: int,
+    cursor: str | None,
+    changed_since: str | None,
+    source: str | None,
+    published_after: str | None,
+    published_before: str | None,
+    include_text: bool,
+) -> pw.Json:
+    """Pathway UDF selecting one page of document metadata"""
+    documents = []
+    for m in metadatas or ():
+        metadata = m.as_dict()
+        metadata["id"] = metadata.pop("_file_id", None)
+        documents.append(metadata)
+    
+    try:
+        page = paginate_documents(
+            documents,
+            limit=limit,
+            cursor=cursor,
+            changed_since=changed_since,
+            source=source,
+            published_after=published_after,
+            published_before=published_before,
+            include_text=include_text,
+        )
+    except ValueError as e:
+        page = {"error": str(e)}
+    return pw.Json(page)
+
+
+class NewsRestServer(QARestServer):
+    """
+    QARestServer plus a paginated, filterable document listing endpoint and
+    a dump of recent structured log events (/v1/recent_logs) and the model
+    call scheduler's per-class metrics (/v1/scheduler_metrics). With a
+    snapshot ``recorder``, partitions of the published index can be listed,
+    dropped and restored at /v1/index_partitions. With the query embedder's
+    ``embedding_cache``, its hit rate is served at /v1/embedding_cache_metrics.
+    With a ``shadow`` evaluator, answers are also sampled for online scoring
+    and the rolling scores are served at /v1/shadow_metrics.
+    Answer prompts are normalized before retrieval, so requests differing
+    only in whitespace or Unicode form share one completion when the LLM
+    coalesces them (/v1/coalescing_metrics).
+    """
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        rag_question_answerer: BaseRAGQuestionAnswerer,
+        document_store: DocumentStore,
+        shadow: ShadowEvaluator | None = None,
+        recorder: SnapshotRecorder | None = None,
+        analytics: SentimentAnalytics | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+        **rest_kwargs,
+    ):
+        # Set before QARestServer registers the answer routes through serve()
+        self.shadow = shadow
+        super().__init__(host, port, rag_question_answerer, **rest_kwargs)
+        self.document_store = document_store
+        self.recorder = recorder
+        self.analytics = analytics
+        self.embedding_cache = embedding_cache
+        
+        self.serve(
+            "/v1/pw_list_documents_page",
+            DocumentPageQuerySchema,
+            self.list_documents_page,
+            **rest_kwargs,
+        )
+        self.serve(
+            "/v1/recent_logs",
+            RecentLogsQuerySchema,
+            self.recent_logs,
+            **rest_kwargs,
+        )
+        self.serve(
+            "/v1/scheduler_metrics",
+            SchedulerMetricsQuerySchema,
+            self.scheduler_metrics,
+            **rest_kwargs,
+        )
+        self.serve(
+            "/v1/coalescing_metrics",
+            CoalescingMetricsQuerySchema,
+            self.coalescing_metrics,
+            **rest_kwargs,
+        )
+        if embedding_cache is not None:
+            self.serve(
+                "/v1/embedding_cache_metrics",
+                EmbeddingCacheMetricsQuerySchema,
+                self.embedding_cache_metrics,
+                **rest_kwargs,
+            )
+        if analytics is not None:
+            self.serve(
+                "/v1/sentiment_analytics",
+                SentimentAnalyticsQuerySchema,
+                self.sentiment_analytics,
+                **rest_kwargs,
+            )
+        if recorder is not None:
+            self.serve(
+                "/v1/index_partitions",
+                IndexPartitionsQuerySchema,
+                self.index_partitions,
+                **rest_kwargs,
+            )
+        if shadow is not None:
+            self.serve(
+                "/v1/shadow_metrics",
+                ShadowMetricsQuerySchema,
+                self.shadow_metrics,
+                **rest_kwargs,
+            )
+    
+    def serve(self, route, schema, handler, **additional_endpoint_kwargs):
+        """Register an endpoint, normalizing and tapping answer routes"""
+        if route in ANSWER_ROUTES:
+            handler = self._with_normalized_prompt(handler)
+            if self.shadow is not None:
+                handler = self._with_shadow(handler)
+        super().serve(route, schema, handler, **additional_endpoint_kwargs)
+    
+    def _with_normalized_prompt(self, handler):
+        def normalized(queries: pw.Table) -> pw.Table:
+            return handler(queries.with_columns(prompt=pw.apply_with_type(normalize_prompt, str, pw.this.prompt)))
+        return normalized
+    
+    def _with_shadow(self, handler):
+        def shadowed(queries: pw.Table) -> pw.Table:
+            results = handler(queries)
+            pw.io.subscribe(results, on_change=self._offer_to_shadow)
+            return results
+        return shadowed
+    
+    def _offer_to_shadow(self, key, row: dict, time: int, is_addition: bool):
+        # Runs on the output path: only sample and enqueue, scoring happens in the workers
+        if is_addition:
+            self.shadow.offer(row["prompt"], row["response"], row["docs"])
+    
+    def shadow_metrics(self, queries: pw.Table) -> pw.Table:
+        """Answer with the shadow evaluator's current rolling aggregates"""
+        return queries.select(
+            result=pw.apply_with_type(lambda _: pw.Json(self.shadow.snapshot()), pw.Json, pw.this.id)
+        )
+    
+    def index_partitions(self, queries: pw.Table) -> pw.Table:
+        """Drop or restore a partition of the published index, then list the partitions"""
+        def apply(drop: str | None, restore: str | None) -> pw.Json:
+            if drop is not None:
+                self.recorder.drop_partition(drop)
+            if restore is not None:
+                self.recorder.restore_partition(restore)
+            return pw.Json(self.recorder.partitions())
+        
+        return queries.select(
+            result=pw.apply_with_type(apply, pw.Json, pw.this.drop, pw.this.restore)
+        )
+    
+    def sentiment_analytics(self, queries: pw.Table) -> pw.Table:
+        """Answer with the current sentiment and volume aggregates"""
+        def apply(group_by: str, since: str | None, limit: int) -> pw.Json:
+            try:
+                return pw.Json(self.analytics.query(group_by, since, limit))
+            except ValueError as e:
+                return pw.Json({"error": str(e)})
+        
+        return queries.select(
+            result=pw.apply_with_type(apply, pw.Json, pw.this.group_by, pw.this.since, pw.this.limit)
+        )
+    
+    def scheduler_metrics(self, queries: pw.Table) -> pw.Table:
+        """Answer with per-class model call load, rejections and queue waits"""
+        return queries.select(
+            result=pw.apply_with_type(lambda _: pw.Json(get_scheduler().snapshot()), pw.Json, pw.this.id)
+        )
+    
+    def coalescing_metrics(self, queries: pw.Table) -> pw.Table:
+        """Answer with completion coalescing totals and per-prompt waiter counts"""
+        return queries.select(
+            result=pw.apply_with_type(lambda _: pw.Json(answer_flights.snapshot()), pw.Json, pw.this.id)
+        )
+    
+    def embedding_cache_metrics(self, queries: pw.Table) -> pw.Table:
+        """Answer with the query embedding cache's hit rate and estimated time saved"""
+        return queries.select(
+            result=pw.apply_with_type(lambda _: pw.Json(self.embedding_cache.snapshot()), pw.Json, pw.this.id)
+        )
+    
+    def recent_logs(self, queries: pw.Table) -> pw.Table:
+        """Answer with the newest events from the logging ring buffer"""
+        return queries.select(
+            result=pw.apply_with_type(
+                lambda limit: pw.Json({"events": recent_events(limit), "stats": logging_stats()}),
+                pw.Json,
+                pw.this.limit,
+            )
+        )
+    
+    def list_documents_page(self, queries: pw.Table) -> pw.Table:
+        """Answer paginated listing queries from the DocumentStore progress table"""
+        all_metas = self.document_store.progress_table.reduce(
+            metadatas=pw.reducers.tuple(pw.this.metadata),
+        )
+        
+        results = queries.join_left(all_metas, id=queries.id).select(
+            result=format_document_page(
+                pw.right.metadatas,
+                pw.left.limit,
+                pw.left.cursor,
+                pw.left.changed_since,
+                pw.left.source,
+                pw.left.published_after,
+                pw.left.published_before,
+                pw.left.include_text,
+            )
+        )
+        return results
+
+
+def check_pathway_version():
+    """Fail fast on a pathway release whose BruteForceKnn internals were not checked"""
+    if pw.__version__.split(".")[:2] != TESTED_PATHWAY_VERSION.split("."):
+        raise RuntimeError(
+            f"pathway {pw.__version__} is installed, the pipeline reads BruteForceKnn internals "
+            f"checked against pathway {TESTED_PATHWAY_VERSION}.x only (pip install 'pathway=={TESTED_PATHWAY_VERSION}.*')"
+        )
+
+
+def indexed_chunks(doc_store: DocumentStore) -> pw.Table:
+    """The DocumentStore's chunks with the vectors its KNN index was built from"""
+    # BruteForceKnn keeps its embedded data column on the inner index (private
+    # in pathway); reading it from there means snapshots never call the
+    # embedder a second time
+    inner_index = doc_store.index.inner_index
+    vectors = getattr(inner_index, "_data_column", None)
+    if not isinstance(vectors, pw.ColumnReference):
+        raise RuntimeError(
+            f"{type(inner_index).__name__} of pathway {pw.__version__} has no embedded data column; "
+            f"index snapshots need BruteForceKnn as of pathway {TESTED_PATHWAY_VERSION}.x"
+        )
+    return vectors.table.select(text=pw.this.text, metadata=pw.this.metadata, vector=vectors)
+
+
+def sentiment_tables(articles: pw.Table, window_minutes: int) -> dict[str, pw.Table]:
+    """Article count, label counts and mean sentiment per source, category and time window"""
+    scored = articles.select(
+        source=pw.this.source,
+        category=pw.this.category,
+        window=pw.apply_with_type(lambda published_at: window_start(published_at, window_minutes), str, pw.this.published_at),
+        label=pw.apply_with_type(sentiment_label, str, pw.this.sentiment),
+        polarity=pw.apply_with_type(sentiment_polarity, float, pw.this.sentiment),
+    )
+    tables = {}
+    for dimension in DIMENSIONS:
+        # groupby/reduce keeps each group current as articles are added or retracted
+        tables[dimension] = scored.filter(pw.this[dimension] != "").groupby(pw.this[dimension]).reduce(
+            group=pw.this[dimension],
+            articles=pw.reducers.count(),
+            positive=pw.reducers.sum(pw.if_else(pw.this.label == "positive", 1, 0)),
+            neutral=pw.reducers.sum(pw.if_else(pw.this.label == "neutral", 1, 0)),
+            negative=pw.reducers.sum(pw.if_else(pw.this.label == "negative", 1, 0)),
+            mean_sentiment=pw.reducers.avg(pw.this.polarity),
+        )
+    return tables
+
+
+class AdmissionRetryStrategy(pw.udfs.ExponentialBackoffRetryStrategy):
+    """Backoff retries for model errors; a call the scheduler rejects is answered with None at once"""
+    
+    async def invoke(self, func, /, *args, **kwargs):
+        async def admitted(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except SchedulerRejected as e:
+                logger.warning("Model call rejected: %s", e, extra={"event": "model_call_rejected"})
+                return None
+        return await super().invoke(admitted, *args, **kwargs)
+
+
+class SummaryRetryStrategy(pw.udfs.ExponentialBackoffRetryStrategy):
+    """
+    Backoff retries for article summaries, including calls the scheduler
+    rejects (they are retried on a later poll); None once retries run out
+    """
+    
+    async def invoke(self, func, /, *args, **kwargs):
+        async def summarized(*args, **kwargs):
+            summary = await func(*args, **kwargs)
+            if not summary:
+                raise ValueError("empty summary")
+            return summary
+        try:
+            return await super().invoke(summarized, *args, **kwargs)
+        except Exception as e:
+            logger.warning("Article summary failed, using the headline: %s", e, extra={"event": "summary_failed"})
+            return None
+
+
+class ScheduledChat(LiteLLMChat):
+    """
+    LiteLLMChat whose completions wait for a model call slot. The class is
+    the call's ``priority`` argument (default ``interactive``).
+    """
+    
+    def __wrapped__(self, messages: list[dict] | pw.Json, **kwargs) -> str | None:
+        priority = kwargs.pop("priority", None)
+        priority = getattr(priority, "value", priority) or "interactive"
+        with get_scheduler().slot(priority):
+            return super().__wrapped__(messages, **kwargs)
+
+
+# Completions in flight in this process, shared by identical concurrent requests
+answer_flights = SingleFlight()
+
+
+class CoalescingChat(ScheduledChat):
+    """
+    ScheduledChat that runs one completion for concurrent identical requests:
+    same messages (the RAG prompt, i.e. the question and its retrieved
+    context) and same arguments. Later callers wait for the running call
+    without taking a scheduler slot of their own. Requests overlap only when
+    the model runs ``fully_async`` (``build_llm``): in pathway's default
+    ``batch_async`` mode the next batch starts after the current one is done.
+    """
+    
+    def __init__(self, flights: SingleFlight, **kwargs):
+        super().__init__(**kwargs)
+        self.flights = flights
+    
+    def __wrapped__(self, messages: list[dict] | pw.Json, **kwargs) -> str | None:
+        plain = getattr(messages, "value", messages)
+        arguments = {name: getattr(value, "value", value) for name, value in {**self.kwargs, **kwargs}.items()}
+        complete = super().__wrapped__
+        return self.flights.run(
+            flight_key(plain, arguments),
+            lambda: complete(messages, **kwargs),
+            # The QA prompt ends with "Query: <question>\nAnswer:"
+            label=plain[-1]["content"].rpartition("Query: ")[2].removesuffix("\nAnswer:")[:120] if plain else "",
+        )
+
+
+def request_filter(filters) -> str | None:
+    """A request's ``filters`` as a metadata filter in request syntax; ValueError when invalid"""
+    value = getattr(filters, "value", filters)
+    if value is None or isinstance(value, str):
+        return value or None
+    return StructuredFilter(value).to_jmespath()
+
+
+@pw.udf
+def filters_error(filters: pw.Json | None) -> str | None:
+    """Why a request's ``filters`` are invalid, None when they are valid"""
+    try:
+        request_filter(filters)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+@pw.udf
+def with_request_filter(metadata_filter: str | None, filters: pw.Json | None) -> str | None:
+    """``metadata_filter`` narrowed by the request's ``filters`` (unfiltered when those are invalid)"""
+    try:
+        narrowed = request_filter(filters)
+    except ValueError:
+        narrowed = None  # the request is answered with ``filters_error``
+    if metadata_filter and narrowed:
+        return f"({metadata_filter}) && ({narrowed})"
+    return metadata_filter or narrowed
+
+
+@pw.udf
+def unless_filters_error(result: pw.Json, error: str | None) -> pw.Json:
+    return result if error is None else pw.Json({"error": error})
+
+
+@pw.udf
+def rag_response(response: str | None, docs: pw.Json, return_context_docs: bool) -> pw.Json:
+    """Answer endpoint result: the response, plus the documents when requested"""
+    result = {"response": response}
+    if return_context_docs:
+        result["context_docs"] = docs.value
+    return pw.Json(result)
+
+
+class NewsQuestionAnswerer(BaseRAGQuestionAnswerer):
+    """
+    BaseRAGQuestionAnswerer whose answer requests take an optional
+    ``priority`` (``interactive`` or ``evaluation``), passed to the LLM call
+    so the model call scheduler can rank it. With a ``summary_store`` they also
+    take an ``answer_mode``, and the answers it selects are grounded in the
+    ``summary_topk`` best matching article summaries (``summary_store``)
+    instead of chunks. Retrieve and answer requests both take ``filters``
+    as a JMESPath string or a structured filter object, the same as on the
+    snapshot server and the query replicas. No reranking.
+    """
+    
+    def __init__(
+        self,
+        *args,
+        summary_store: DocumentStore | None = None,
+        summary_topk: int = 8,
+        **kwargs,
+    ):
+        if kwargs.get("reranker") is not None:
+            raise ValueError("NewsQuestionAnswerer does not rerank")
+        super().__init__(*args, **kwargs)
+        self.summary_store = summary_store
+        self.summary_topk = summary_topk
+        self.AnswerQuerySchema = self.AnswerQuerySchema.without("filters") | FiltersSchema | PrioritySchema
+        self.RetrieveQuerySchema = self.RetrieveQuerySchema | FiltersSchema
+        if summary_store is not None:
+            self.AnswerQuerySchema = self.AnswerQuerySchema | AnswerModeSchema
+    
+    def _retrieve_chunks(self, queries: pw.Table) -> pw.Table:
+        return self.indexer.retrieve_query(
+            queries.select(
+                metadata_filter=with_request_filter(None, pw.this.filters),
+                filepath_globpattern=pw.cast(str | None, None),
+                query=pw.this.prompt,
+                k=self.search_topk,
+            )
+        ).select(docs=pw.this.result)
+    
+    def _retrieve_summaries(self, queries: pw.Table) -> pw.Table:
+        return self.summary_store.retrieve_query(
+            queries.select(
+                metadata_filter=with_request_filter(None, pw.this.filters),
+                filepath_globpattern=pw.cast(str | None, None),
+                query=pw.this.prompt,
+                k=self.summary_topk,
+            )
+        ).select(docs=pw.this.result)
+    
+    def _retrieve(self, pw_ai_queries: pw.Table) -> pw.Table:
+        """Each query's documents: summaries when its ``answer_mode`` selects them, else chunks"""
+        if self.summary_store is None:
+            return self._retrieve_chunks(pw_ai_queries)
+        # Split the queries so each one is searched in one index only
+        routed = pw_ai_queries.with_columns(
+            use_summaries=pw.apply_with_type(wants_summaries, bool, pw.this.answer_mode, pw.this.prompt),
+        )
+        chunk_docs = self._retrieve_chunks(routed.filter(~pw.this.use_summaries))
+        summary_docs = self._retrieve_summaries(routed.filter(pw.this.use_summaries))
+        chunk_docs.promise_universes_are_disjoint(summary_docs)
+        return chunk_docs.concat(summary_docs).with_universe_of(pw_ai_queries)
+    
+    @pw.table_transformer
+    def retrieve(self, retrieve_queries: pw.Table) -> pw.Table:
+        """Retrieve documents matching both ``metadata_filter`` and ``filters``"""
+        queries = retrieve_queries.with_columns(
+            metadata_filter=with_request_filter(pw.this.metadata_filter, pw.this.filters),
+            error=filters_error(pw.this.filters),
+        )
+        results = self.indexer.retrieve_query(queries.without(pw.this.filters, pw.this.error))
+        return results.select(result=unless_filters_error(pw.this.result, queries.error))
+    
+    @pw.table_transformer
+    def answer_query(self, pw_ai_queries: pw.Table) -> pw.Table:
+        """Answer a question from its retrieved documents, at the request's priority"""
+        pw_ai_results = pw_ai_queries + self._retrieve(pw_ai_queries)
+        pw_ai_results += pw_ai_results.select(context=self.docs_to_context_transformer(pw.this.docs))
+        pw_ai_results += pw_ai_results.select(rag_prompt=self.prompt_udf(pw.this.context, pw.this.prompt))
+        pw_ai_results += pw_ai_results.select(
+            response=self.llm(
+                prompt_chat_single_qa(pw.this.rag_prompt),
+                model=pw.this.model,
+                priority=pw.if_else(pw.this.priority == "evaluation", "evaluation", "interactive"),
+            )
+        )
+        pw_ai_results = pw_ai_results.await_futures()
+        return pw_ai_results + pw_ai_results.select(
+            result=unless_filters_error(
+                rag_response(pw.this.response, pw.this.docs, pw.this.return_context_docs),
+                filters_error(pw.this.filters),
+            ),
+        )
+
+
+@dataclass(kw_only=True)
+class SplitEmbedderKnnFactory(BruteForceKnnFactory):
+    """BruteForceKnnFactory that embeds queries with ``query_embedder`` instead of the chunk embedder"""
+    
+    query_embedder: pw.UDF | None = None
+    
+    def build_inner_index(self, data_column, metadata_column=None):
+        inner_index = super().build_inner_index(data_column, metadata_column)
+        if self.query_embedder is not None:
+            # The chunks were embedded when the index was built; only queries
+            # use this embedder. BruteForceKnn is a frozen dataclass that
+            # embeds queries with its ``embedder`` field (pathway 0.33).
+            if not isinstance(inner_index, BruteForceKnn) or "embedder" not in {f.name for f in fields(inner_index)}:
+                raise RuntimeError(
+                    f"{type(inner_index).__name__} of pathway {pw.__version__} has no embedder field; "
+                    f"a separate query embedder needs BruteForceKnn as of pathway {TESTED_PATHWAY_VERSION}.x"
+                )
+            object.__setattr__(inner_index, "embedder", self.query_embedder)
+        return inner_index
+
+
+@pw.udf
+def within_articles(metadata_filter: str | None, articles: tuple) -> str | None:
+    """``metadata_filter`` (request syntax) narrowed to the chunks of the matched articles"""
+    if not articles:
+        return metadata_filter  # nothing matched at article level: search all chunks
+    paths = " || ".join(f"path == `{article['path'].as_str()}`" for article in articles)
+    return f"({metadata_filter}) && ({paths})" if metadata_filter else paths
+
+
+class TwoStageDocumentStore(DocumentStore):
+    """
+    DocumentStore of chunks that retrieves in two stages: a query first picks
+    the ``article_topk`` best matching articles from ``articles`` (a
+    DocumentStore of article headlines whose ``path`` is the article URL),
+    then only those articles' chunks are returned. Request filters apply to
+    both stages. The restriction is a metadata filter, so the chunk search
+    still scores every chunk: this trades an extra article search for results
+    focused on the best matching stories, not for a cheaper search.
+    """
+    
+    def __init__(self, *args, articles: DocumentStore, article_topk: int, **kwargs):
+        self.articles = articles
+        self.article_topk = article_topk
+        super().__init__(*args, **kwargs)
+    
+    @pw.table_transformer
+    def retrieve_query(self, retrieval_queries: pw.Table) -> pw.Table:
+        merged = self.merge_filters(retrieval_queries)
+        top_articles = merged + self.articles.index.query_as_of_now(
+            merged.query,
+            number_of_matches=self.article_topk,
+            metadata_filter=merged.metadata_filter,
+        ).select(
+            articles=pw.coalesce(pw.right.metadata, ()),
+        )
+        return super().retrieve_query(
+            retrieval_queries.with_columns(
+                metadata_filter=within_articles(retrieval_queries.metadata_filter, top_articles.articles),
+            )
+        )
+
+
+def article_document_store(articles: pw.Table, embedder, query_embedder, dimensions: int) -> DocumentStore:
+    """DocumentStore of one document per article (its ``text`` column) whose ``path`` is the article URL"""
+    docs = articles.select(
+        data=pw.apply(lambda text: text.encode("utf-8"), pw.this.text),
+        _metadata=pw.apply(
+            lambda url, title, source, author, pub, cat, country, sent, idx, summarized: {
+                "path": url,
+                "title": title,
+                "source": source,
+                "author": author,
+                "published_at": pub,
+                "category": cat,
+                "country": country,
+                "sentiment": sent,
+                "indexed_at": idx,
+                "summarized": summarized,
+                **filter_fields(pub, sent),
+            },
+            pw.this.url,
+            pw.this.title,
+            pw.this.source,
+            pw.this.author,
+            pw.this.published_at,
+            pw.this.category,
+            pw.this.country,
+            pw.this.sentiment,
+            pw.this.indexed_at,
+            pw.this.summarized,
+        ),
+    )
+    return DocumentStore(
+        docs=docs,
+        retriever_factory=SplitEmbedderKnnFactory(
+            embedder=embedder,
+            query_embedder=query_embedder,
+            dimensions=dimensions,
+            reserved_space=1000,
+        ),
+        parser=None,
+        splitter=None,
+    )
+
+
+def build_llm() -> LiteLLMChat:
+    """Chat model that writes the answers (also used by the query replicas)"""
+    kwargs = dict(
+        model=f"ollama_chat/{Config.LLM_MODEL}",
+        api_base=Config.OLLAMA_HOST,
+        temperature=0.1,
+        retry_strategy=AdmissionRetryStrategy(
+            max_retries=4,
+            initial_delay=1000
+        ),
+        # Each answer runs on its own, so a request arriving while an
+        # identical one is being answered joins its flight instead of
+        # waiting for the whole batch to finish
+        async_mode="fully_async",
+    )
+    if Config.COALESCE_ANSWERS:
+        return CoalescingChat(answer_flights, **kwargs)
+    return ScheduledChat(**kwargs)
+
+
+def build_news_analyst_pipeline():
+    """Build the RAG pipeline with FIXED metadata handling"""
+    
+    if not Config.NEWSAPI_KEY:
+        raise ValueError("NEWSAPI_KEY must be set")
+    check_pathway_version()
+    
+    print("=" * 70)
+    print("LIVE NEWS ANALYST - Fixed Metadata Version")
+    print("=" * 70)
+    
+    # Ingest news stream
+    connector = NewsAPIConnector(
+        api_key=Config.NEWSAPI_KEY,
+        category=Config.NEWS_CATEGORY,
+        country=Config.NEWS_COUNTRY,
+        query=Config.NEWS_QUERY,
+        poll_interval=Config.POLL_INTERVAL,
+        max_commit_articles=Config.MAX_COMMIT_ARTICLES,
+    )
+    news_stream = pw.io.python.read(
+        subject=connector,
+        schema=NewsArticleSchema,
+        # The connector commits once per poll (see NewsAPIConnector._emit)
+        autocommit_duration_ms=None,
+    )
+    
+    # Process articles with sentiment; the headline (title and description)
+    # is what the sentiment is read from and what articles are retrieved by
+    news_stream = news_stream.with_columns(
+        headline=pw.apply(lambda t, d: f"{t} {d}", pw.this.title, pw.this.description),
+    )
+    processed_articles = news_stream.select(
+        url=pw.this.url,
+        title=pw.this.title,
+        source=pw.this.source,
+        author=pw.this.author,
+        published_at=pw.this.published_at,
+        category=pw.this.category,
+        country=pw.this.country,
+        full_text=pw.apply(
+            lambda t, d, c: f"Title: {t}\n\nDescription: {d}\n\nContent: {c}",
+            pw.this.title,
+            pw.this.description,
+            pw.this.content,
+        ),
+        headline=pw.this.headline,
+        sentiment=analyze_sentiment(pw.this.headline),
+        indexed_at=get_current_timestamp(pw.this.url),
+    )
+    
+    # Sentiment and volume aggregates, served by /v1/sentiment_analytics
+    analytics = SentimentAnalytics()
+    for dimension, table in sentiment_tables(processed_articles, Config.ANALYTICS_WINDOW_MINUTES).items():
+        pw.io.subscribe(table, on_change=analytics.subscriber(dimension))
+    
+    # Chunk documents
+    chunked_articles = processed_articles.select(
+        url=pw.this.url,
+        title=pw.this.title,
+        source=pw.this.source,
+        author=pw.this.author,
+        published_at=pw.this.published_at,
+        category=pw.this.category,
+        country=pw.this.country,
+        sentiment=pw.this.sentiment,
+        indexed_at=pw.this.indexed_at,
+        chunks=chunk_text(pw.this.full_text, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP),
+    )
+    
+    # Flatten chunks
+    chunks_flat = chunked_articles.flatten(pw.this.chunks).select(
+        text=pw.this.chunks,
+        url=pw.this.url,
+        title=pw.this.title,
+        source=pw.this.source,
+        author=pw.this.author,
+        published_at=pw.this.published_at,
+        category=pw.this.category,
+        country=pw.this.country,
+        sentiment=pw.this.sentiment,
+        indexed_at=pw.this.indexed_at,
+    )
+    
+    # CRITICAL FIX: Create documents with proper metadata structure
+    # The key is to have 'data' as bytes and '_metadata' as a dict
+    documents_for_store = chunks_flat.select(
+        data=pw.apply(
+            lambda text: text.encode('utf-8'),
+            pw.this.text,
+        ),
+        _metadata=pw.apply(
+            lambda url, title, source, author, pub, cat, country, sent, idx, text: {
+                "path": url,  # Required by DocumentStore
+                "title": title,
+                "source": source,
+                "author": author,
+                "published_at": pub,
+                "category": cat,
+                "country": country,
+                "sentiment": sent,
+                "indexed_at": idx,
+                "text": text,  # Keep original text accessible
+                **filter_fields(pub, sent),  # Normalized copies for structured filters
+            },
+            pw.this.url,
+            pw.this.title,
+            pw.this.source,
+            pw.this.author,
+            pw.this.published_at,
+            pw.this.category,
+            pw.this.country,
+            pw.this.sentiment,
+            pw.this.indexed_at,
+            pw.this.text,
+        ),
+    )
+    
+    # Build embedders (Ollama, or the in-process hashing backend): chunks are
+    # embedded at ingestion priority, queries at interactive priority
+    embedder, embedding_dimension = build_embedder("ingestion")
+    query_embedder, _ = build_embedder("interactive")
+    
+    retriever_factory = SplitEmbedderKnnFactory(
+        embedder=embedder,
+        query_embedder=query_embedder,
+        dimensions=embedding_dimension,
+        reserved_space=1000,
+    )
+    
+    # Create DocumentStore with no parser/splitter since we already chunked
+    store_kwargs = dict(
+        docs=documents_for_store,
+        retriever_factory=retriever_factory,
+        parser=None,  # We already have text chunks
+        splitter=None,  # We already chunked
+    )
+    if Config.ARTICLE_TOP_K:
+        # Article-level index of headlines: two-stage retrieval picks articles
+        # first and keeps only their chunks
+        article_store = article_document_store(
+            processed_articles.with_columns(text=pw.this.headline, summarized=False),
+            embedder, query_embedder, embedding_dimension,
+        )
+        doc_store = TwoStageDocumentStore(articles=article_store, article_topk=Config.ARTICLE_TOP_K, **store_kwargs)
+    else:
+        doc_store = DocumentStore(**store_kwargs)
+    
+    # Compact per-article summaries, generated behind interactive model calls
+    # and indexed as one document per article (the headline when summarizing
+    # failed for good); broad questions are answered from this index
+    summary_store = None
+    if Config.ARTICLE_SUMMARIES:
+        summarizer = ScheduledChat(
+            model=f"ollama_chat/{Config.SUMMARY_MODEL or Config.LLM_MODEL}",
+            api_base=Config.OLLAMA_HOST,
+            temperature=0.0,
+            # Summaries, retried a poll apart, must not hold back the rest of the batch
+            async_mode="fully_async",
+            retry_strategy=SummaryRetryStrategy(
+                max_retries=Config.SUMMARY_RETRIES,
+                initial_delay=Config.POLL_INTERVAL * 1000,
+                backoff_factor=1,
+            ),
+        )
+        summarized_articles = processed_articles.with_columns(
+            summary=summarizer(
+                prompt_chat_single_qa(
+                    pw.apply_with_type(
+                        lambda title, text: summary_prompt(title, text, Config.SUMMARY_MAX_WORDS),
+                        str,
+                        pw.this.title,
+                        pw.this.full_text,
+                    )
+                ),
+                priority="ingestion",
+            ),
+        ).await_futures()
+        summary_store = article_document_store(
+            summarized_articles.with_columns(
+                text=pw.apply_with_type(lambda summary, headline: summary or headline, str, pw.this.summary, pw.this.headline),
+                summarized=pw.this.summary.is_not_none(),
+            ),
+            embedder, query_embedder, embedding_dimension,
+        )
+    
+    # Periodic snapshots of the index, plus a delta log of every change in
+    # between, for replicas (index_snapshot.py serve, query_replica.py)
+    recorder = None
+    if Config.INDEX_SNAPSHOT_PATH:
+        recorder = SnapshotRecorder(
+            Config.INDEX_SNAPSHOT_PATH,
+            embedder_spec(),
+            interval=Config.INDEX_SNAPSHOT_INTERVAL,
+            delta_log=DeltaLogWriter(Config.INDEX_DELTA_LOG) if Config.INDEX_DELTA_LOG else None,
+            partition_key=Config.INDEX_PARTITION_KEY,
+            dropped=tuple(name.strip() for name in Config.INDEX_DROPPED_PARTITIONS.split(",") if name.strip()),
+        )
+        pw.io.subscribe(
+            indexed_chunks(doc_store),
+            on_change=recorder.on_change,
+            on_time_end=recorder.on_time_end,
+        )
+        recorder.start()
+    
+    # Create LLM with better prompt
+    llm = build_llm()
+    
+    # Create RAG app (/v1/pw_ai_answer returns the documents it prompted with
+    # as "context_docs" when called with "return_context_docs": true)
+    rag_app = NewsQuestionAnswerer(
+        llm=llm,
+        indexer=doc_store,
+        search_topk=Config.TOP_K,
+        summary_store=summary_store,
+        summary_topk=Config.SUMMARY_TOP_K,
+    )
+    
+    # Online shadow evaluation of a sample of live answers
+    shadow = None
+    if Config.SHADOW_SAMPLE_RATE > 0:
+        shadow = ShadowEvaluator(
+            sample_rate=Config.SHADOW_SAMPLE_RATE,
+            workers=Config.SHADOW_WORKERS,
+            queue_size=Config.SHADOW_QUEUE_SIZE,
+            window=Config.SHADOW_WINDOW,
+            log_path=Config.SHADOW_LOG_PATH or None,
+            log_interval=Config.SHADOW_LOG_INTERVAL,
+        )
+        shadow.start()
+    
+    # Start server
+    server = NewsRestServer(
+        host=Config.HOST,
+        port=Config.PORT,
+        rag_question_answerer=rag_app,
+        document_store=doc_store,
+        shadow=shadow,
+        recorder=recorder,
+        analytics=analytics,
+        # Only the LiteLLM query embedder uses the cache (not the hashing backend)
+        embedding_cache=getattr(query_embedder, "cache", None),
+    )
+    
+    # Profiling and memory introspection on a side port
+    if Config.ADMIN_PORT:
+        index_entries = Counter()
+        pw.io.subscribe(
+            documents_for_store,
+            on_change=lambda key, row, time, is_addition: index_entries.update(chunks=1 if is_addition else -1),
+        )
+        structures = {
+            "connector_seen_urls": lambda: len(connector.seen_urls),
+            "index_chunks": lambda: index_entries["chunks"],
+            "scheduler_queued": lambda: {
+                priority: load["queued"] for priority, load in get_scheduler().snapshot()["classes"].items()
+            },
+            "answers_in_flight": lambda: len(answer_flights.snapshot()["in_flight"]),
+            "log_ring": lambda: logging_stats()["buffered"],
+        }
+        if server.embedding_cache is not None:
+            structures["query_embedding_cache"] = lambda: server.embedding_cache.snapshot()["entries"]
+        if shadow is not None:
+            structures["shadow_queue"] = lambda: shadow.snapshot()["queue_depth"]
+        if recorder is not None:
+            structures["published_chunks"] = lambda: sum(recorder.partitions()["partitions"].values())
+        start_admin_server(Config.ADMIN_HOST, Config.ADMIN_PORT, structures)
+    
+    print("Pipeline built successfully!")
+    print("=" * 70)
+    print(f"Server: http://{Config.HOST}:{Config.PORT}")
+    if Config.EMBEDDER_BACKEND == "hashing":
+        print(f"Embedder: hashing ({embedding_dimension} dims, {Config.HASHING_NGRAMS}-grams)")
+    else:
+        print(f"Embedder: {Config.EMBEDDING_MODEL}")
+    if Config.ARTICLE_TOP_K:
+        print(f"Retrieval: top {Config.TOP_K} chunks, limited to the top {Config.ARTICLE_TOP_K} articles")
+    if Config.ARTICLE_SUMMARIES:
+        print(f"Article summaries: {Config.SUMMARY_MODEL or Config.LLM_MODEL}, broad questions answered from the top {Config.SUMMARY_TOP_K}")
+    print(f"LLM: {Config.LLM_MODEL}" + (" (identical concurrent answers coalesced)" if Config.COALESCE_ANSWERS else ""))
+    print(
+        f"Model calls: {Config.MODEL_MAX_CONCURRENCY} at once (interactive {Config.INTERACTIVE_CONCURRENCY}, "
+        f"ingestion {Config.INGESTION_CONCURRENCY}, evaluation {Config.EVALUATION_CONCURRENCY})"
+    )
+    if shadow is not None:
+        print(f"Shadow evaluation: {Config.SHADOW_SAMPLE_RATE:.0%} of answers")
+    if Config.INDEX_SNAPSHOT_PATH:
+        print(f"Index snapshots: {Config.INDEX_SNAPSHOT_PATH} every {Config.INDEX_SNAPSHOT_INTERVAL:.0f}s, partitioned by {Config.INDEX_PARTITION_KEY}")
+    if Config.INDEX_DELTA_LOG:
+        print(f"Index delta log: {Config.INDEX_DELTA_LOG}")
+    if Config.ADMIN_PORT:
+        print(f"Admin: http://{Config.ADMIN_HOST}:{Config.ADMIN_PORT}/admin/ (profile, tracemalloc, structures)")
+    print("=" * 70)
+    
+    return server
+
@@ -0,0 +1,407 @@
+"""
+Read-replica query processes for the Live News RAG pipeline
+
+With INDEX_SNAPSHOT_PATH and INDEX_DELTA_LOG set, the ingestion pipeline
+publishes its index as periodic snapshots plus an append-only log of every
+change in between. This module answers ``/v1/retrieve``, ``/v1/pw_ai_answer``
+and ``/v2/answer`` from that published index in separate, stateless
+processes: each one memory-maps the latest snapshot, tails the delta log,
+embeds queries and calls the LLM itself, so query load scales across cores
+without competing with ingestion or duplicating it. All processes bind the
+same port (SO_REUSEPORT) and the kernel spreads connections across them.
+
+Answers are built like ``BaseRAGQuestionAnswerer.answer_query``: the top
+TOP_K chunks, the default context processor and QA prompt, the same model.
+Requests with ``"partitions": [...]`` only search those partitions of the
+index (values of INDEX_PARTITION_KEY, e.g. feed categories), and a
+structured ``"filters": {...}`` object (see ``metadata_columns.py``) is
+evaluated on the metadata columns before scoring; a string ``filters`` is
+still a JMESPath ``metadata_filter``.
+Identical concurrent answers within a process share one completion.
+
+Usage:
+    python query_replica.py
+    python query_replica.py --processes 4 --port 8001
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+from pathway.xpacks.llm import prompts
+from pathway.xpacks.llm.question_answering import SimpleContextProcessor
+
+from config import Config
+from delta_log import UPSERT, DeltaLogReader
+from index_snapshot import (
+    MANIFEST_FILE,
+    IndexSnapshot,
+    SnapshotRequestHandler,
+    cosine_scores,
+    metadata_matcher,
+    partition_of,
+    query_encoder,
+    rank,
+    routing_partitions,
+    structured_filter,
+)
+from llm_scheduler import SchedulerRejected, get_scheduler
+from metadata_columns import FilterColumns, StructuredFilter
+from text_processing import normalize_prompt
+
+logger = logging.getLogger("news_rag.replica")
+
+
+class ReplicaIndex:
+    """
+    The published index: a memory-mapped snapshot plus the chunks the delta
+    log added, updated or retracted since. ``refresh()`` (run every
+    ``poll_interval`` seconds by ``start()``) applies new log entries and
+    switches to a newer snapshot when one is published.
+    """
+
+    def __init__(self, snapshot_path: str, delta_log_path: str | None, poll_interval: float = 0.5):
+        self.path = snapshot_path
+        self.delta_log_path = delta_log_path
+        self.poll_interval = poll_interval
+        self.counters = Counter()
+        self.snapshot: IndexSnapshot | None = None
+        self._reader: DeltaLogReader | None = None
+        self._manifest_stat = None
+        self._added: dict[str, tuple[dict, np.ndarray]] = {}  # chunk id -> (record, vector)
+        self._deleted_rows: set[int] = set()  # snapshot rows retracted or superseded
+        self._arrays = None  # search arrays for the current deltas, rebuilt on change
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def manifest(self) -> dict:
+        return dict(
+            self.snapshot.manifest,
+            delta_chunks=len(self._added),
+            deleted_chunks=len(self._deleted_rows),
+            **self.counters,
+        )
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, MANIFEST_FILE)
+
+    def _load(self):
+        """Open the published snapshot and the delta log generation that follows it"""
+        stat = os.stat(self._manifest_path())
+        snapshot = IndexSnapshot(self.path)
+        reader = None
+        position = snapshot.manifest.get("delta_log")
+        if position and self.delta_log_path:
+            try:
+                reader = DeltaLogReader(self.delta_log_path, position["id"], position["offset"])
+            except (OSError, ValueError) as e:
+                # Only when the log was deleted by hand: the writer keeps a
+                # published snapshot's generation until a newer one is published
+                logger.warning("Delta log not readable: %s", e, extra={"event": "replica_delta_log_unavailable"})
+
+        with self._lock:
+            previous = self._reader
+            self.snapshot, self._reader = snapshot, reader
+            self._manifest_stat = (stat.st_ino, stat.st_mtime_ns)
+            self._added, self._deleted_rows, self._arrays = {}, set(), None
+        if previous is not None:
+            previous.close()
+        self.counters["snapshots_loaded"] += 1
+
+    def refresh(self):
+        """Switch to a newer snapshot if one was published, then apply new delta log entries"""
+        try:
+            stat = os.stat(self._manifest_path())
+            if (stat.st_ino, stat.st_mtime_ns) != self._manifest_stat:
+                self._load()
+        except (OSError, ValueError):
+            pass  # mid-swap; the next poll sees the complete snapshot
+
+        if self._reader is None:
+            return
+        entries = list(self._reader.read())
+        if not entries:
+            return
+        row_ids = self.snapshot.row_ids()
+        with self._lock:
+            for op, record, vector in entries:
+                self._apply(op, record, vector, row_ids)
+            self._arrays = None
+        self.counters["deltas_applied"] += len(entries)
+
+    def _apply(self, op: bytes, record: dict, vector, row_ids: dict[str, int]):
+        chunk_id = record["id"]
+        # Any change to a chunk from the snapshot means the snapshot's version is gone
+        if chunk_id in row_ids:
+            self._deleted_rows.add(row_ids[chunk_id])
+        if op == UPSERT:
+            self._added[chunk_id] = (record, vector)
+        else:
+            current = self._added.get(chunk_id)
+            # An update may deliver the new row before the retraction of the old one
+            if current is not None and current[0]["text"] == record["text"] and current[0]["metadata"] == record["metadata"]:
+                del self._added[chunk_id]
+
+    @property
+    def partition_key(self) -> str | None:
+        return self.snapshot.partition_key
+
+    def _delta_arrays(self):
+        """Deleted snapshot rows (sorted) and the added chunks' records, partitions, filter columns, vectors and norms"""
+        if self._arrays is None:
+            records = [record for record, _ in self._added.values()]
+            vectors = np.array([vector for _, vector in self._added.values()], dtype=np.float32)
+            key = self.snapshot.partition_key
+            self._arrays = (
+                np.sort(np.fromiter(self._deleted_rows, dtype=np.int64, count=len(self._deleted_rows))),
+                records,
+                np.array([partition_of(record["metadata"], key) if key else "" for record in records], dtype=object),
+                FilterColumns.from_metadata(record["metadata"] for record in records),
+                vectors,
+                np.linalg.norm(vectors, axis=1) if records else None,
+            )
+        return self._arrays
+
+    def search(
+        self,
+        query_vector,
+        k: int,
+        metadata_filter: str | None = None,
+        filepath_globpattern: str | None = None,
+        partitions: list[str] | None = None,
+        filters: StructuredFilter | None = None,
+    ) -> list[dict]:
+        """
+        Top-``k`` chunks of the snapshot and the deltas, in the ``/v1/retrieve``
+        format, searching only the given ``partitions`` when there are any and
+        only the chunks that pass the structured ``filters``
+        """
+        with self._lock:
+            snapshot = self.snapshot
+            deleted_rows, records, labels, columns, vectors, norms = self._delta_arrays()
+
+        rows = snapshot.candidate_rows(partitions, filters)
+        if rows is None:
+            scores = snapshot.scores(query_vector) if snapshot.count else np.empty(0, dtype=np.float32)
+            scores[deleted_rows] = -np.inf
+            searched = snapshot.count
+        else:
+            scores = snapshot.scores(query_vector, rows)
+            # Positions of the deleted rows among the searched ones
+            positions = np.searchsorted(rows, deleted_rows)
+            inside = positions < len(rows)
+            inside[inside] = rows[positions[inside]] == deleted_rows[inside]
+            scores[positions[inside]] = -np.inf
+            searched = len(rows)
+
+        if records and (partitions is not None or filters is not None):
+            mask = np.ones(len(records), dtype=bool) if filters is None else filters.mask(columns)
+            if partitions is not None:
+                mask &= np.isin(labels, partitions)
+            selected = np.flatnonzero(mask)
+            records = [records[i] for i in selected]
+            vectors, norms = vectors[selected], norms[selected]
+        if records:
+            scores = np.concatenate([scores, cosine_scores(vectors, norms, query_vector)])
+
+        def record_at(i: int) -> dict:
+            if i >= searched:
+                return records[i - searched]
+            return snapshot.record(i if rows is None else rows[i])
+
+        return rank(scores, k, record_at, metadata_matcher(metadata_filter, filepath_globpattern))
+
+    def partition_counts(self) -> dict[str, int]:
+        """Chunks per partition, snapshot and deltas combined"""
+        with self._lock:
+            snapshot = self.snapshot
+            deleted_rows, _, labels, _, _, _ = self._delta_arrays()
+        counts = Counter()
+        for name, (start, end) in snapshot.partitions.items():
+            deleted = np.searchsorted(deleted_rows, end) - np.searchsorted(deleted_rows, start)
+            counts[name] = end - start - int(deleted)
+        counts.update(labels.tolist())
+        return {name: count for name, count in sorted(counts.items()) if count}
+
+    def start(self):
+        """Start following the published index"""
+        threading.Thread(target=self._follow, name="replica-refresh", daemon=True).start()
+
+    def _follow(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.exception("Replica refresh failed: %s", e, extra={"event": "replica_refresh_failed"})
+
+
+class ReplicaRequestHandler(SnapshotRequestHandler):
+    """Retrieval plus RAG answers over a ``ReplicaIndex``"""
+
+    llm = None  # LiteLLMChat from pipeline.build_llm()
+    context_processor = SimpleContextProcessor()
+    routes = {
+        **SnapshotRequestHandler.routes,
+        "/v1/pw_ai_answer": "answer",
+        "/v2/answer": "answer",
+        "/v1/coalescing_metrics": "coalescing_metrics",
+        "/v1/scheduler_metrics": "scheduler_metrics",
+    }
+
+    def answer(self, payload: dict) -> dict:
+        query = normalize_prompt(payload["prompt"])
+        priority = payload.get("priority") or "interactive"
+        if priority not in ("interactive", "evaluation"):
+            raise ValueError(f"priority must be 'interactive' or 'evaluation', not {priority!r}")
+        filters = payload.get("filters")
+        structured = isinstance(filters, dict)
+        docs = self.snapshot.search(
+            self.encode(query),
+            Config.TOP_K,
+            metadata_filter=None if structured else filters,
+            partitions=routing_partitions(payload),
+            filters=structured_filter(filters) if structured else None,
+        )
+        rag_prompt = prompts.prompt_qa.func(self.context_processor.docs_to_context(docs), query)
+        response = complete(
+            self.llm,
+            [{"role": "user", "content": rag_prompt}],
+            payload.get("model") or self.llm.model,
+            priority=priority,
+        )
+
+        result = {"response": response}
+        if payload.get("return_context_docs"):
+            result["context_docs"] = docs
+        return result
+
+    def coalescing_metrics(self, payload: dict) -> dict:
+        flights = getattr(self.llm, "flights", None)
+        if flights is None:
+            raise ValueError("Answer coalescing is disabled (COALESCE_ANSWERS)")
+        return dict(flights.snapshot(), pid=os.getpid())
+
+    def scheduler_metrics(self, payload: dict) -> dict:
+        return dict(get_scheduler().snapshot(), pid=os.getpid())
+
+
+def complete(
+    llm,
+    messages: list[dict],
+    model: str,
+    priority: str = "interactive",
+    max_retries: int = 4,
+    initial_delay: float = 1.0,
+) -> str:
+    """Chat completion with exponential backoff, like the pipeline's retry strategy"""
+    for attempt in range(max_retries + 1):
+        try:
+            return llm.__wrapped__(messages, model=model, priority=priority)
+        except SchedulerRejected:
+            raise  # answered with 503 right away, retrying would only lengthen the queue
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(initial_delay * 2 ** attempt)
+
+
+class ReplicaHTTPServer(ThreadingHTTPServer):
+    """Threaded server whose port every replica process can bind"""
+
+    allow_reuse_port = True
+    daemon_threads = True
+
+
+def wait_for_snapshot(path: str, poll_interval: float):
+    """Block until a snapshot is published at ``path``"""
+    announced = False
+    while not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        if not announced:
+            print(f"Waiting for the first snapshot at {path}...")
+            announced = True
+        time.sleep(poll_interval)
+
+
+def run_replica(snapshot_path: str, delta_log_path: str | None, host: str, port: int, poll_interval: float):
+    """One query process: follow the published index and serve until interrupted"""
+    from main import setup_logging
+    from pipeline import build_llm
+
+    setup_logging()
+    wait_for_snapshot(snapshot_path, max(poll_interval, 1.0))
+    index = ReplicaIndex(snapshot_path, delta_log_path, poll_interval)
+    index.refresh()
+    index.start()
+
+    handler = type("Handler", (ReplicaRequestHandler,), {
+        "snapshot": index,
+        "encode": staticmethod(query_encoder(index.snapshot.manifest["embedder"])),
+        "llm": build_llm(),
+    })
+    server = ReplicaHTTPServer((host, port), handler)
+    logger.info(
+        "Query replica serving %d chunks on %s:%d", index.snapshot.count, host, port,
+        extra={"event": "replica_start", "pid": os.getpid(), "chunks": index.snapshot.count},
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Serve queries from the index the pipeline publishes")
+    parser.add_argument("--snapshot", default=Config.INDEX_SNAPSHOT_PATH, help="snapshot directory")
+    parser.add_argument("--delta-log", default=Config.INDEX_DELTA_LOG, help="delta log to tail")
+    parser.add_argument("--processes", type=int, default=Config.REPLICA_PROCESSES)
+    parser.add_argument("--host", default=Config.HOST)
+    parser.add_argument("--port", type=int, default=Config.REPLICA_PORT)
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="seconds between delta log reads")
+    args = parser.parse_args()
+
+    if not args.snapshot:
+        parser.error("no snapshot: set INDEX_SNAPSHOT_PATH or pass --snapshot")
+
+    print("\n" + "="*70)
+    print(" QUERY REPLICAS")
+    print("="*70)
+    print(f"Snapshot: {args.snapshot}")
+    print(f"Delta log: {args.delta_log or '(none, snapshots only)'}")
+    print(f"Processes: {args.processes}")
+    print(f"Server: http://{args.host}:{args.port}")
+    print("="*70)
+
+    replica_args = (args.snapshot, args.delta_log or None, args.host, args.port, args.poll_interval)
+    if args.processes == 1:
+        run_replica(*replica_args)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_replica, args=replica_args, name=f"query-replica-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("\nQuery replicas stopped")
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
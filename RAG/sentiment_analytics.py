@@ -0,0 +1,98 @@
+"""
+Incrementally maintained sentiment and volume aggregates over the article stream
+
+The pipeline groups articles by source, by category and by publication time
+window (ANALYTICS_WINDOW_MINUTES). Each group is reduced to its article
+count, per-label counts and mean sentiment. In the mean, a positive article
+counts as +score, a negative one as -score and a neutral one as 0. Pathway
+updates the groups as articles arrive or are retracted. ``SentimentAnalytics``
+keeps the current rows of each table, fed by subscriptions, so
+``/v1/sentiment_analytics`` reads them without rescanning documents.
+"""
+
+import threading
+from datetime import datetime, timezone
+
+from metadata_columns import MISSING_TIME, SENTIMENT_LABELS, UNKNOWN_LABEL, parse_published_at, parse_sentiment
+
+DIMENSIONS = ("source", "category", "window")
+
+
+def sentiment_label(sentiment: str) -> str:
+    """Label of the pipeline's ``"<label>_<score>"`` sentiment string (``unknown`` if malformed)"""
+    code, _ = parse_sentiment(sentiment)
+    return "unknown" if code == UNKNOWN_LABEL else SENTIMENT_LABELS[code]
+
+
+def sentiment_polarity(sentiment: str) -> float:
+    """Signed sentiment: +score when positive, -score when negative, 0 otherwise"""
+    code, score = parse_sentiment(sentiment)
+    if code == UNKNOWN_LABEL or SENTIMENT_LABELS[code] == "neutral":
+        return 0.0
+    return score if SENTIMENT_LABELS[code] == "positive" else -score
+
+
+def window_start(published_at: str, minutes: int) -> str:
+    """UTC start of the ``minutes``-long window ``published_at`` falls in, "" when it has no date"""
+    seconds = parse_published_at(published_at)
+    if seconds == MISSING_TIME:
+        return ""
+    start = seconds - seconds % (minutes * 60)
+    return datetime.fromtimestamp(start, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SentimentAnalytics:
+    """Current aggregate rows per dimension, kept in step with the pipeline's tables"""
+
+    def __init__(self):
+        self._groups: dict[str, dict] = {dimension: {} for dimension in DIMENSIONS}
+        self._lock = threading.Lock()
+
+    def subscriber(self, dimension: str):
+        """``on_change`` callback for the aggregate table of ``dimension``"""
+        groups = self._groups[dimension]
+
+        def on_change(key, row: dict, time: int, is_addition: bool):
+            with self._lock:
+                if is_addition:
+                    groups[key] = row
+                # An update may deliver the new row before the retraction of the old one
+                elif groups.get(key) == row:
+                    del groups[key]
+
+        return on_change
+
+    def query(self, group_by: str = "source", since: str | None = None, limit: int = 100) -> dict:
+        """
+        Aggregates grouped by ``group_by``: the largest groups first, or for
+        ``window`` the latest ``limit`` windows (starting at ``since`` or
+        later) in time order. Raises ``ValueError`` on bad arguments.
+        """
+        if group_by not in DIMENSIONS:
+            raise ValueError(f"group_by must be one of {', '.join(DIMENSIONS)}, not {group_by!r}")
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        with self._lock:
+            rows = list(self._groups[group_by].values())
+
+        groups = [
+            {
+                group_by: row["group"],
+                "articles": row["articles"],
+                "positive": row["positive"],
+                "neutral": row["neutral"],
+                "negative": row["negative"],
+                "mean_sentiment": round(row["mean_sentiment"], 4),
+            }
+            for row in rows
+        ]
+        if group_by == "window":
+            if since is not None:
+                start = parse_published_at(since)
+                if start == MISSING_TIME:
+                    raise ValueError(f"since is not an ISO-8601 timestamp: {since!r}")
+                groups = [group for group in groups if parse_published_at(group["window"]) >= start]
+            groups = sorted(groups, key=lambda group: group["window"])[-limit:]
+        else:
+            groups = sorted(groups, key=lambda group: (-group["articles"], group[group_by]))[:limit]
+        return {"group_by": group_by, "groups": groups}
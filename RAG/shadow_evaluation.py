@@ -0,0 +1,161 @@
+"""
+Online shadow evaluation of live RAG traffic
+Samples a fraction of answered queries as they leave the pipeline, queues
+them and scores them with the Hybrid Confidence Evaluator metrics in
+background worker threads. The request path only pays for a random draw
+and a non-blocking queue put; samples are dropped when the queue is full.
+Rolling aggregates over the most recent scored answers are exposed through
+``snapshot()`` and optionally appended to a JSONL log at a fixed interval.
+"""
+
+import json
+import queue
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+import metric_engine
+from bulk_evaluation import METRICS, percentile
+from confidence_score_evaluator import HybridConfidenceEvaluator
+
+# Routes whose answers are sampled (both serve BaseRAGQuestionAnswerer.answer_query)
+ANSWER_ROUTES = ("/v1/pw_ai_answer", "/v2/answer")
+
+
+def _plain(value):
+    """Unwrap a pw.Json value into plain Python objects"""
+    return getattr(value, "value", value)
+
+
+class ShadowEvaluator:
+    """
+    Scores sampled live answers off the request path.
+
+    ``offer()`` is called for every answer; it keeps ``sample_rate`` of them.
+    Each worker owns its own evaluator (the batch metric engine is not
+    thread-safe) and scores up to ``batch_size`` queued answers per pass.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.05,
+        workers: int = 2,
+        queue_size: int = 256,
+        window: int = 500,
+        batch_size: int = 16,
+        log_path: str | None = None,
+        log_interval: float = 60.0,
+    ):
+        self.sample_rate = sample_rate
+        self.workers = workers
+        self.batch_size = batch_size
+        self.log_path = log_path
+        self.log_interval = log_interval
+        self.counters = Counter()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._window: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        """Start the scoring workers (and the log publisher when ``log_path`` is set)"""
+        metric_engine.np.ndarray  # finish the lazy numpy import before the workers race on it
+        for i in range(self.workers):
+            self._threads.append(threading.Thread(target=self._work, name=f"shadow-eval-{i}", daemon=True))
+        if self.log_path:
+            self._threads.append(threading.Thread(target=self._publish, name="shadow-eval-log", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def offer(self, query: str, answer, docs) -> bool:
+        """
+        Sample an answered query for scoring; never blocks. Called from the
+        pathway output callback only, so its counters need no lock.
+        """
+        self.counters["seen"] += 1
+        if random.random() >= self.sample_rate:
+            return False
+        try:
+            self._queue.put_nowait((query, answer, docs))
+        except queue.Full:
+            self.counters["dropped"] += 1
+            return False
+        self.counters["sampled"] += 1
+        return True
+
+    def _work(self):
+        evaluator = HybridConfidenceEvaluator(verbose=False)
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            items, skipped = [], 0
+            for query, answer, docs in batch:
+                answer, docs = _plain(answer), _plain(docs)
+                if isinstance(answer, dict):
+                    answer = answer.get("response") or answer.get("answer", "")
+                # Same failures evaluate_response reports instead of scoring
+                if not answer or not docs:
+                    skipped += 1
+                    continue
+                items.append((query, answer, list(docs)))
+
+            try:
+                results = evaluator.score_batch(items) if items else []
+            except Exception as e:
+                print(f"Shadow evaluation failed: {e}")
+                with self._lock:
+                    self.counters["failed"] += len(items)
+                    self.counters["skipped"] += skipped
+                continue
+
+            scored_at = time.time()
+            with self._lock:
+                self._window.extend((scored_at, scores) for scores in results)
+                self.counters["scored"] += len(results)
+                self.counters["skipped"] += skipped
+
+    def snapshot(self) -> dict:
+        """Rolling aggregates over the scored window, plus sampling counters"""
+        with self._lock:
+            window = list(self._window)
+            counters = dict(self.counters)
+
+        snapshot = {
+            "timestamp": datetime.now().isoformat(),
+            "sample_rate": self.sample_rate,
+            "counters": counters,
+            "queue_depth": self._queue.qsize(),
+            "window": len(window),
+            "metrics": {},
+            "interpretations": dict(Counter(scores["interpretation"] for _, scores in window)),
+        }
+        if window:
+            snapshot["window_seconds"] = round(window[-1][0] - window[0][0], 1)
+
+        for metric in METRICS:
+            values = [scores[metric] for _, scores in window if scores.get(metric) is not None]
+            if not values:
+                continue
+            snapshot["metrics"][metric] = {
+                "mean": round(sum(values) / len(values), 3),
+                "p10": round(percentile(values, 10), 3),
+                "p50": round(percentile(values, 50), 3),
+                "p90": round(percentile(values, 90), 3),
+            }
+        return snapshot
+
+    def _publish(self):
+        while True:
+            time.sleep(self.log_interval)
+            try:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps(self.snapshot()) + "\n")
+            except OSError as e:
+                print(f"Shadow metrics log failed: {e}")
@@ -0,0 +1,99 @@
+"""
+Single-flight coalescing of identical in-flight computations
+
+When a story breaks, many users ask the same question within seconds. With
+``SingleFlight.run(key, fn)`` the first caller for a key (the leader) runs
+``fn``; callers arriving with the same key while it runs wait for it and get
+its result (or its exception) instead of starting their own. Nothing is
+cached: once the leader finishes, the next caller starts a new computation.
+
+``snapshot()`` reports the in-flight keys with their waiter counts, totals,
+and the most recent computations that were shared by more than one caller.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import Counter, deque
+
+
+def flight_key(*parts) -> str:
+    """Stable digest of JSON-serializable ``parts``"""
+    data = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("label", "started", "waiters", "done", "result", "error")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.started = time.monotonic()
+        self.waiters = 0
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Thread-safe: one running computation per key, shared by all its callers"""
+
+    def __init__(self, history: int = 50):
+        self.counters = Counter()
+        self._flights: dict[str, _Flight] = {}
+        self._shared: deque = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def run(self, key: str, fn, label: str = ""):
+        """Result of ``fn()``, computed once for all concurrent callers with ``key``"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(label)
+                self.counters["computed"] += 1
+            else:
+                flight.waiters += 1
+                self.counters["coalesced"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            self.counters["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.waiters:
+                    self._shared.append({
+                        "key": key,
+                        "label": flight.label,
+                        "waiters": flight.waiters,
+                        "seconds": round(time.monotonic() - flight.started, 3),
+                        "failed": flight.error is not None,
+                    })
+            flight.done.set()
+
+    def snapshot(self) -> dict:
+        """Totals, in-flight keys with their waiter counts, recently shared computations"""
+        now = time.monotonic()
+        with self._lock:
+            in_flight = [
+                {"key": key, "label": flight.label, "waiters": flight.waiters, "seconds": round(now - flight.started, 3)}
+                for key, flight in self._flights.items()
+            ]
+            return {
+                "computed": self.counters["computed"],
+                "coalesced": self.counters["coalesced"],
+                "failed": self.counters["failed"],
+                "in_flight": sorted(in_flight, key=lambda f: -f["waiters"]),
+                "recently_shared": list(self._shared)[::-1],
+            }
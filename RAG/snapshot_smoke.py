@@ -0,0 +1,125 @@
+"""
+Smoke check for the snapshot and replica retrieve servers.
+
+Writes a tiny snapshot embedded with the in-process hashing backend, serves
+it the way ``index_snapshot.py serve`` and ``query_replica.py`` do (on an
+ephemeral port, from a thread) and posts to their endpoints. Fails (exit
+code 1) when a request does not get the expected status or results. Needs
+no model server and no pipeline.
+
+Usage:
+    python snapshot_smoke.py
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+from embedders import HashingNgramEncoder
+from index_snapshot import IndexSnapshot, SnapshotRequestHandler, query_encoder, write_snapshot
+from query_replica import ReplicaIndex, ReplicaRequestHandler
+
+EMBEDDER = {"backend": "hashing", "dimensions": 256, "ngrams": 2}
+
+ARTICLES = [
+    ("business", "Reuters", "positive_0.91", "Chip makers rally as AI demand lifts earnings"),
+    ("business", "Bloomberg", "negative_0.74", "Oil prices slide on weak growth outlook"),
+    ("technology", "Reuters", "neutral_0.55", "New smartphone chips promise longer battery life"),
+    ("technology", "The Verge", "positive_0.82", "Open source AI model tops coding benchmark"),
+]
+
+# (route, payload, expected status, expected result check)
+CASES = [
+    ("/v1/retrieve", {"query": "AI chips earnings", "k": 2}, 200, lambda body: len(body) == 2),
+    ("/v1/retrieve", {"query": "chips", "k": 4, "filters": {"source": "Reuters"}}, 200,
+     lambda body: len(body) == 2 and all(doc["metadata"]["source"] == "Reuters" for doc in body)),
+    ("/v1/retrieve", {"query": "chips", "k": 4, "partitions": "technology"}, 200,
+     lambda body: len(body) == 2 and all(doc["metadata"]["category"] == "technology" for doc in body)),
+    ("/v1/retrieve", {"k": 2}, 400, None),
+    ("/v1/snapshot_info", {}, 200, lambda body: body["count"] == len(ARTICLES)),
+    ("/v1/embedding_cache_metrics", {}, 400, None),  # hashing snapshot: no query cache in use
+    ("/v1/no_such_route", {}, 404, None),
+]
+
+
+def snapshot_records():
+    """The articles as one chunk each, grouped by category"""
+    encoder = HashingNgramEncoder(EMBEDDER["dimensions"], EMBEDDER["ngrams"])
+    for i, (category, source, sentiment, text) in enumerate(ARTICLES):
+        metadata = {
+            "path": f"https://example.com/article/{i}",
+            "title": text,
+            "source": source,
+            "published_at": "2026-10-19T00:00:00Z",
+            "category": category,
+            "sentiment": sentiment,
+        }
+        yield f"^{i:026d}", text, metadata, encoder.encode([text])[0]
+
+
+def post(url: str, payload: dict) -> tuple[int, object]:
+    """POST ``payload`` as JSON; (status, decoded body)"""
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def check_server(name: str, handler: type) -> list[str]:
+    """Run ``CASES`` against ``handler`` served on an ephemeral port; the failures"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    failures = []
+    try:
+        for route, payload, expected_status, check in CASES:
+            try:
+                status, body = post(base_url + route, payload)
+            except Exception as e:
+                failures.append(f"{name} {route} {payload}: {type(e).__name__}: {e}")
+                continue
+            if status != expected_status:
+                failures.append(f"{name} {route} {payload}: status {status}, expected {expected_status}: {body}")
+            elif check is not None and not check(body):
+                failures.append(f"{name} {route} {payload}: unexpected result {body}")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return failures
+
+
+def main():
+    """Main entry point"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = f"{directory}/snapshot"
+        write_snapshot(path, snapshot_records(), EMBEDDER["dimensions"], EMBEDDER, partition_key="category")
+        encode = staticmethod(query_encoder(EMBEDDER))
+
+        replica = ReplicaIndex(path, None)
+        replica.refresh()
+        failures = check_server("snapshot", type("Handler", (SnapshotRequestHandler,), {
+            "snapshot": IndexSnapshot(path),
+            "encode": encode,
+        }))
+        failures += check_server("replica", type("Handler", (ReplicaRequestHandler,), {
+            "snapshot": replica,
+            "encode": encode,
+        }))
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    checks = 2 * len(CASES)
+    print(f"{checks - len(failures)}/{checks} snapshot server checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Startup-time budget check for the Live News RAG entry points.
+
+Imports each entry module in a fresh interpreter with ``-X importtime`` and
+fails (exit code 1) when
+- the cumulative import time exceeds the module's budget, or
+- a heavy dependency that must stay lazy shows up at import time.
+
+Usage:
+    python startup_budget.py                      # report + check
+    python startup_budget.py --json report.json   # also dump machine-readable results
+    python startup_budget.py --budget main=80     # override a budget (ms)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Cumulative import-time budget per entry module, in milliseconds
+BUDGETS_MS = {
+    "main": 60,
+    "interactive_chatbot": 40,
+    "confidence_score_evaluator": 40,
+}
+
+# Modules that must only be loaded on first use, never at startup
+FORBIDDEN_AT_STARTUP = ("pathway", "litellm", "requests", "numpy")
+
+RAG_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_imports(module: str) -> list[tuple[str, int]]:
+    """Import ``module`` in a fresh interpreter, return (name, cumulative us) for its import subtree"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=RAG_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Drop the separator space; remaining indentation is the nesting depth
+        entries.append((name[1:].rstrip(), int(cumulative)))
+
+    # Children are reported before their parent, so the subtree of ``module``
+    # is everything between the previous top-level entry and its own line
+    end = max(i for i, (name, _) in enumerate(entries) if name == module)
+    start = end
+    while start > 0 and entries[start - 1][0].startswith(" "):
+        start -= 1
+    return entries[start:end + 1]
+
+
+def check_module(module: str, budget_ms: float, runs: int, top: int) -> dict:
+    """Measure a module ``runs`` times and compare the best run against its budget"""
+    best = None
+    for _ in range(runs):
+        entries = measure_imports(module)
+        total_us = entries[-1][1]
+        if best is None or total_us < best[0]:
+            best = (total_us, entries)
+
+    total_us, entries = best
+    forbidden = sorted(
+        name.strip() for name, _ in entries
+        if name.strip().split(".")[0] in FORBIDDEN_AT_STARTUP
+    )
+    # Direct imports of the module are indented by exactly two spaces
+    direct = [
+        (name.strip(), us) for name, us in entries
+        if name.startswith("  ") and not name.startswith("   ")
+    ]
+    slowest = sorted(direct, key=lambda item: item[1], reverse=True)[:top]
+
+    total_ms = total_us / 1000
+    return {
+        "module": module,
+        "total_ms": round(total_ms, 2),
+        "budget_ms": budget_ms,
+        "forbidden_imports": forbidden,
+        "slowest": [{"module": name, "ms": round(us / 1000, 2)} for name, us in slowest],
+        "ok": total_ms <= budget_ms and not forbidden,
+    }
+
+
+def print_report(results: list[dict]):
+    """Pretty print the budget report"""
+    print("\n" + "="*70)
+    print(" STARTUP BUDGET REPORT")
+    print("="*70)
+
+    for result in results:
+        status = "OK  " if result["ok"] else "FAIL"
+        print(f"\n[{status}] {result['module']}: {result['total_ms']:.1f} ms "
+              f"(budget {result['budget_ms']:.0f} ms)")
+        for entry in result["slowest"]:
+            print(f"   {entry['ms']:8.1f} ms  {entry['module']}")
+        if result["forbidden_imports"]:
+            print(f"   Heavy modules loaded at startup: {', '.join(result['forbidden_imports'][:10])}")
+
+    print("\n" + "="*70)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Check entry-point import time against a budget")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="override the budget of one module")
+    parser.add_argument("--runs", type=int, default=3, help="measurements per module (best is kept)")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to show per module")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS_MS)
+    for override in args.budget:
+        module, _, ms = override.partition("=")
+        budgets[module] = float(ms)
+
+    results = [
+        check_module(module, budget, args.runs, args.top)
+        for module, budget in budgets.items()
+    ]
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f" Saved to: {args.json}")
+
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
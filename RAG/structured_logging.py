@@ -0,0 +1,202 @@
+"""
+Non-blocking structured logging for the Live News RAG pipeline
+
+Log calls on hot paths (the NewsAPI connector) only pay for a sampling
+check and a non-blocking queue put. A background ``QueueListener`` thread
+formats records as JSON lines (tracebacks included), writes them out and
+keeps the most recent events in a bounded ring buffer for on-demand dumps.
+
+Records carry a message type in ``extra={"event": ...}``; ``EventSampler``
+applies per-event 1-in-N sampling and a per-second rate limit, and reports
+how many records of that event were suppressed on the next one it lets
+through. When the queue is full, records are dropped and counted instead of
+blocking the caller.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_ring: "RingBufferHandler | None" = None
+_queue_handler: "NonBlockingQueueHandler | None" = None
+_sampler: "EventSampler | None" = None
+_listener: logging.handlers.QueueListener | None = None
+
+
+def record_to_dict(record: logging.LogRecord) -> dict:
+    """Structured form of a record: fixed fields, ``extra`` fields, then the traceback"""
+    event = {
+        "ts": datetime.fromtimestamp(record.created).isoformat(),
+        "level": record.levelname,
+        "logger": record.name,
+        "msg": record.getMessage(),
+    }
+    for key, value in vars(record).items():
+        if key not in _RECORD_ATTRIBUTES:
+            event[key] = value
+    if record.exc_info:
+        event["exc"] = logging.Formatter().formatException(record.exc_info)
+    return event
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record_to_dict(record), default=str)
+
+
+class EventSampler(logging.Filter):
+    """
+    Per-event sampling and rate limiting. ``sample_every[event] = n`` keeps
+    one record in ``n``; ``max_per_second[event] = r`` is a token bucket of
+    rate ``r`` and burst ``max(r, 1)``. Records without an ``event`` pass.
+    """
+
+    def __init__(self, sample_every: dict[str, int] | None = None, max_per_second: dict[str, float] | None = None):
+        super().__init__()
+        self.sample_every = sample_every or {}
+        self.max_per_second = max_per_second or {}
+        self.suppressed_total = 0
+        self._state: dict[str, list] = {}  # event -> [seen, tokens, last refill, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None or (event not in self.sample_every and event not in self.max_per_second):
+            return True
+
+        with self._lock:
+            now = time.monotonic()
+            state = self._state.get(event)
+            if state is None:
+                state = self._state[event] = [0, max(self.max_per_second.get(event, 1.0), 1.0), now, 0]
+            state[0] += 1
+
+            allowed = (state[0] - 1) % self.sample_every.get(event, 1) == 0
+            if allowed and event in self.max_per_second:
+                rate = self.max_per_second[event]
+                state[1] = min(max(rate, 1.0), state[1] + (now - state[2]) * rate)
+                state[2] = now
+                if state[1] >= 1.0:
+                    state[1] -= 1.0
+                else:
+                    allowed = False
+
+            if not allowed:
+                state[3] += 1
+                self.suppressed_total += 1
+                return False
+            if state[3]:
+                record.suppressed = state[3]
+                state[3] = 0
+            return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of waiting on a full queue"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same process: hand the record over as is, formatting (and any
+        # traceback rendering) happens on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the last ``capacity`` records as structured dicts"""
+
+    def __init__(self, capacity: int = 1000):
+        super().__init__()
+        self.events: deque = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord):
+        self.events.append(record_to_dict(record))
+
+
+def configure_logging(
+    level: str = "INFO",
+    path: str | None = None,
+    ring_size: int = 1000,
+    queue_size: int = 10_000,
+    sample_every: dict[str, int] | None = None,
+    max_per_second: dict[str, float] | None = None,
+):
+    """
+    Route the root logger through a non-blocking queue to a JSON-lines writer
+    (``path``, or stdout) and the ring buffer. Safe to call more than once.
+    """
+    global _ring, _queue_handler, _sampler, _listener
+    shutdown_logging()
+
+    output = logging.FileHandler(path) if path else logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    _ring = RingBufferHandler(ring_size)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _sampler = EventSampler(sample_every, max_per_second)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(_sampler)
+    _listener = logging.handlers.QueueListener(log_queue, output, _ring, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and detach the handlers installed by ``configure_logging``"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def recent_events(limit: int | None = None) -> list[dict]:
+    """The most recent logged events, oldest first"""
+    if _ring is None:
+        return []
+    events = list(_ring.events)
+    return events[-limit:] if limit else events
+
+
+def dump_recent_events(path: str, limit: int | None = None) -> int:
+    """Write the ring buffer to ``path`` as JSON lines; returns the number of events"""
+    events = recent_events(limit)
+    with open(path, "w") as f:
+        for event in events:
+            f.write(json.dumps(event, default=str) + "\n")
+    return len(events)
+
+
+def logging_stats() -> dict:
+    """Records dropped on a full queue and suppressed by sampling"""
+    return {
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "suppressed": _sampler.suppressed_total if _sampler else 0,
+        "buffered": len(_ring.events) if _ring else 0,
+    }
@@ -0,0 +1,145 @@
+"""
+Shared text processing for ingestion and evaluation
+
+One tokenizer for the chunker, the sentiment analyzer and the evaluator
+metrics. ``tokenize(text)`` returns a ``TokenizedText`` whose views (word
+tokens, their offsets, 4+ character tokens, sentence boundaries) are each
+computed once on first use. Results are memoized in a bounded LRU cache keyed
+by a hash of the content, so a chunk retrieved for many queries, or scored by
+several metrics, is only tokenized once.
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from bisect import bisect_right
+from collections import OrderedDict
+
+WORD_PATTERN = re.compile(r'\w+')
+# The 4+ character subset of WORD_PATTERN matches, selected in C
+LONG_TOKEN_PATTERN = re.compile(r'\b\w{4,}\b')
+SENTENCE_END_PATTERN = re.compile(r'[.!?\n]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+class TokenizedText:
+    """
+    Tokens of one text. ``tokens`` are the lower-cased ``\\w+`` words (what
+    ``re.findall(r'\\b\\w+\\b', text.lower())`` returns), ``offsets`` their
+    start positions in ``normalized`` and ``sentence_ends`` the positions of
+    ``.!?`` and newlines in the original ``text``.
+    """
+
+    __slots__ = ("text", "_normalized", "_tokens", "_offsets", "_long_tokens", "_long_token_set", "_sentence_ends")
+
+    def __init__(self, text: str):
+        self.text = text
+        self._normalized = None
+        self._tokens = None
+        self._offsets = None
+        self._long_tokens = None
+        self._long_token_set = None
+        self._sentence_ends = None
+
+    @property
+    def normalized(self) -> str:
+        if self._normalized is None:
+            self._normalized = self.text.lower()
+        return self._normalized
+
+    @property
+    def tokens(self) -> tuple[str, ...]:
+        if self._tokens is None:
+            self._tokens = tuple(WORD_PATTERN.findall(self.normalized))
+        return self._tokens
+
+    @property
+    def offsets(self) -> tuple[int, ...]:
+        if self._offsets is None:
+            self._offsets = tuple(m.start() for m in WORD_PATTERN.finditer(self.normalized))
+        return self._offsets
+
+    @property
+    def long_tokens(self) -> tuple[str, ...]:
+        """Tokens of 4+ characters, i.e. ``re.findall(r'\\b\\w{4,}\\b', text.lower())``"""
+        if self._long_tokens is None:
+            self._long_tokens = tuple(LONG_TOKEN_PATTERN.findall(self.normalized))
+        return self._long_tokens
+
+    @property
+    def long_token_set(self) -> frozenset[str]:
+        if self._long_token_set is None:
+            self._long_token_set = frozenset(self.long_tokens)
+        return self._long_token_set
+
+    @property
+    def sentence_ends(self) -> tuple[int, ...]:
+        if self._sentence_ends is None:
+            self._sentence_ends = tuple(m.start() for m in SENTENCE_END_PATTERN.finditer(self.text))
+        return self._sentence_ends
+
+    def last_sentence_end(self, low: int, high: int) -> int | None:
+        """Largest sentence boundary position ``p`` with ``low < p <= high``, if any"""
+        ends = self.sentence_ends
+        i = bisect_right(ends, high) - 1
+        if i >= 0 and ends[i] > low:
+            return ends[i]
+        return None
+
+
+class TokenCache:
+    """Thread-safe LRU of ``TokenizedText`` keyed by a content digest"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, TokenizedText] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> TokenizedText:
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = TokenizedText(text)
+        with self._lock:
+            self._entries[key] = entry
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+_cache = TokenCache()
+
+
+def tokenize(text: str) -> TokenizedText:
+    """Memoized ``TokenizedText`` for ``text``"""
+    return _cache.get(text)
+
+
+def cache_info() -> dict:
+    """Hit/miss counters and size of the shared token cache"""
+    return _cache.info()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """``prompt`` in NFKC form with runs of whitespace collapsed and ends stripped"""
+    return WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFKC", prompt)).strip()